@@ -3,6 +3,12 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the API through this module (e.g. ``uvicorn backend.asgi:application``)
+so the Server-Sent Events stream at /api/reports/{id}/events/ runs as async
+coroutines; under WSGI each open stream would hold a worker thread.
+Exports still stream here: inspectionform/export.py hands ASGI an async
+iterator instead of the sync one Django would read into memory first.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
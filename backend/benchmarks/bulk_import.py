@@ -0,0 +1,77 @@
+"""
+Throughput of the bulk importer against creating the same reports one at a
+time through POST /api/reports/.  Target: 100k schedule rows per minute.
+
+    python -m benchmarks.bulk_import                    # 2,500 reports × 40 rows
+    python -m benchmarks.bulk_import --reports 10000 --batch-size 1000
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from .harness import setup, test_database, emit
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from inspectionform.importer import import_file  # noqa: E402
+
+
+def record(n, items, entries):
+    return {
+        'date': f'2024-{n % 12 + 1:02d}-{n % 28 + 1:02d}',
+        'part_name': f'PART-{n % 300}', 'operation_name': f'OP-{n % 40}', 'customer_name': 'ACME',
+        'items': [
+            {'sr_no': sr_no, 'item': f'Item {sr_no}', 'spec': '25.0', 'tolerance': '±0.05', 'inst': 'VC'}
+            for sr_no in range(1, items + 1)
+        ],
+        'schedule_entries': [
+            {
+                'sr': 1, 'slot_index': i // 2, 'row_order': i % 2, 'time_type': 'SETUP',
+                'operator': 'RAM', 'machine_no': f'M{n % 8}',
+                'values': [f'25.{(n + i + k) % 6:02d}' for k in range(items)],
+            } for i in range(entries)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reports', type=int, default=2500)
+    parser.add_argument('--items', type=int, default=20)
+    parser.add_argument('--entries', type=int, default=40)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--api-sample', type=int, default=50, help='Reports posted one by one for comparison')
+    args = parser.parse_args()
+
+    with test_database(), tempfile.TemporaryFile() as source:
+        for n in range(args.reports):
+            source.write(json.dumps(record(n, args.items, args.entries)).encode() + b'\n')
+        source.seek(0)
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            job = import_file(source, 'benchmark.jsonl', 'jsonl', batch_size=args.batch_size)
+            elapsed = time.perf_counter() - start
+        emit('bulk_import', mode='import_file', reports=job.reports_created, rows=job.entries_created,
+             seconds=round(elapsed, 2), rows_per_min=round(job.entries_created / elapsed * 60),
+             queries=len(queries))
+
+        client = APIClient()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for n in range(args.api_sample):
+                client.post('/api/reports/', record(n, args.items, args.entries), format='json')
+            elapsed = time.perf_counter() - start
+        rows = args.api_sample * args.entries
+        emit('bulk_import', mode='api_post', reports=args.api_sample, rows=rows,
+             seconds=round(elapsed, 2), rows_per_min=round(rows / elapsed * 60),
+             queries_per_report=round(len(queries) / args.api_sample, 1))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Dashboard latency from the daily rollups versus the same figures aggregated
+live from the schedule rows, as history grows.
+
+    python -m benchmarks.dashboard                          # 1k, 4k, 16k reports
+    python -m benchmarks.dashboard --reports 10000 50000 --rounds 50
+
+For every history size the database is refilled with synthetic data spread
+over ``--days`` days (denser history, same key space), then both paths
+answer "per-day NG and first-pass yield over the last 365 days".  Also
+reports what refresh-on-save adds to one report POST.
+"""
+import argparse
+import statistics
+import time
+from datetime import timedelta
+
+from .harness import setup, test_database, emit
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Count, F, Q  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from inspectionform import dashboard  # noqa: E402
+from inspectionform.models import (  # noqa: E402
+    DailyPDIRollup, DailyQualityRollup, DailyReportRollup, InspectionItem, InspectionReport, PDIItem, PDIReport,
+    ScheduleEntry,
+)
+from inspectionform.specs import NG, OK  # noqa: E402
+from inspectionform.synthetic import generate  # noqa: E402
+
+
+def live_daily(date_from, date_to):
+    """What the dashboard would run without rollups"""
+    return list(
+        ScheduleEntry.objects.filter(report__date__range=(date_from, date_to))
+        .values(day=F('report__date'))
+        .annotate(rows=Count('id'), ok_rows=Count('id', filter=Q(judgment=OK)), ng_rows=Count('id', filter=Q(judgment=NG)))
+        .order_by('day')
+    )
+
+
+def p50(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def clear():
+    for model in (ScheduleEntry, InspectionItem, InspectionReport, PDIItem, PDIReport, DailyQualityRollup,
+                  DailyReportRollup, DailyPDIRollup):
+        model.objects.all().delete()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reports', type=int, nargs='+', default=[1000, 4000, 16000])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database(), override_settings(SLOW_REQUEST_MS=10 ** 9):
+        today = timezone.localdate()
+        params = {'date_from': (today - timedelta(days=364)).isoformat(), 'date_to': today.isoformat()}
+        for reports in args.reports:
+            clear()
+            start = time.perf_counter()
+            counts = generate(reports=reports, pdi_reports=reports // 5, days=args.days)
+            emit('dashboard', reports=reports, schedule_rows=counts['schedule_entries'],
+                 rollup_rows=counts['quality_rollups'], generate_seconds=round(time.perf_counter() - start, 2))
+            emit('dashboard', reports=reports, path='rollups', p50_ms=p50(lambda: dashboard.daily(params), args.rounds))
+            emit('dashboard', reports=reports, path='live',
+                 p50_ms=p50(lambda: live_daily(today - timedelta(days=364), today), args.rounds))
+
+        # Refresh-on-save: the same POST with the on-commit refresh and with it disabled
+        client = APIClient()
+        body = client.get(f'/api/reports/{InspectionReport.objects.order_by("-id").first().id}/').json()
+        payload = {key: value for key, value in body.items() if key not in ('id', 'version', 'updated_at')}
+        for entry in payload['schedule_entries']:
+            entry.pop('id', None)
+            entry.pop('report', None)
+        for item in payload['items']:
+            item.pop('id', None)
+
+        def post():
+            client.post('/api/reports/', payload, format='json')
+
+        with_refresh = p50(post, args.rounds)
+        from inspectionform import rollups
+        original, rollups.flush = rollups.flush, lambda: None
+        try:
+            without = p50(post, args.rounds)
+        finally:
+            rollups.flush = original
+        emit('dashboard', vendor=connection.vendor, post_p50_ms=with_refresh, post_without_refresh_p50_ms=without)
+
+
+if __name__ == '__main__':
+    main()
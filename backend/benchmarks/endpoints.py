@@ -0,0 +1,241 @@
+"""
+p50 / p99 latency and query count for every endpoint in inspectionform/urls.py,
+on synthetic data from inspectionform.synthetic.
+
+    python -m benchmarks.endpoints                          # small scale, 30 requests each
+    python -m benchmarks.endpoints --scale medium --requests 100 --output results.json
+    DJANGO_SETTINGS_MODULE=... python -m benchmarks.endpoints   # another database
+
+Requests go through Django's test client in process, so nothing touches the
+network; point DJANGO_SETTINGS_MODULE at a local Postgres to compare with
+SQLite.  Each case gets one untimed warm-up request (PDFs are therefore
+measured from the disk cache).  Any URL name the CASES below do not cover is
+reported, so a new endpoint cannot silently drop out of the run.
+"""
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import tempfile
+import time
+
+from .harness import setup, test_database, emit
+
+setup()
+
+import django  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from django.urls import URLResolver, get_resolver  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from inspectionform.masterdata import master_data  # noqa: E402
+from inspectionform.models import InspectionReport, PDIReport  # noqa: E402
+from inspectionform.synthetic import SCALES, generate  # noqa: E402
+
+# Streams until the client goes away — see benchmarks/sse_idle.py
+SKIP = {'report-events'}
+
+
+class Context:
+    """Ids and filter values taken from the generated data"""
+
+    def __init__(self, client):
+        report = InspectionReport.objects.order_by('-id').first()
+        pdi = PDIReport.objects.order_by('-id').first()
+        self.report_id = report.id
+        self.date = report.date.isoformat()
+        self.part = report.part_name
+        self.operation = report.operation_name
+        self.item_id = report.items.values_list('id', flat=True).first()
+        self.entry_id = report.schedule_entries.values_list('id', flat=True).first()
+        self.pdi_id = pdi.id
+        self.pdi_date = pdi.inspection_date.isoformat()
+
+        body = client.get(f'/api/reports/{report.id}/').json()
+        self.report_payload = {
+            key: body[key] for key in ('date', 'part_name', 'part_number', 'operation_name', 'customer_name',
+                                       'prepared_by', 'approved_by', 'items')
+        }
+        self.report_payload['schedule_entries'] = [
+            {key: value for key, value in entry.items() if key not in ('id', 'report')}
+            for entry in body['schedule_entries']
+        ]
+        pdi_body = client.get(f'/api/pdi-reports/{pdi.id}/').json()
+        self.pdi_payload = {key: value for key, value in pdi_body.items() if key not in ('id', 'created_at')}
+        for item in self.pdi_payload.get('items', []):
+            item.pop('id', None)
+        self.created = []
+        self.counter = itertools.count()
+
+    def created_report(self):
+        """A report made by the POST case, so DELETE never eats the ids the other cases use"""
+        if not self.created:
+            self.created.append(InspectionReport.objects.create(part_name=self.part).id)
+        return self.created.pop()
+
+
+def cases(ctx):
+    """(url name, method, path factory, body factory or None)"""
+    r, p = ctx.report_id, ctx.pdi_id
+
+    def import_file():
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        record = dict(ctx.report_payload, prepared_by=f'IMPORT-{next(ctx.counter)}')
+        return {'file': SimpleUploadedFile('bench.jsonl', json.dumps(record).encode() + b'\n')}
+
+    def batch():
+        n = next(ctx.counter)
+        return {'mutations': [
+            {'key': f'bench-{n}-create', 'op': 'create', 'data': ctx.report_payload},
+            {'key': f'bench-{n}-update', 'op': 'update', 'ref': f'bench-{n}-create', 'data': {'approved_by': 'QA2'}},
+        ]}
+
+    return [
+        ('api-root', 'get', lambda: '/api/', None),
+        ('inspection-report-list', 'get', lambda: '/api/reports/', None),
+        ('inspection-report-list', 'get', lambda: f'/api/reports/?part_name={ctx.part}', None),
+        ('inspection-report-list', 'get', lambda: '/api/reports/?view=summary', None),
+        ('inspection-report-list', 'post', lambda: '/api/reports/', lambda: ctx.report_payload),
+        ('inspection-report-latest', 'get',
+         lambda: f'/api/reports/latest/?part_name={ctx.part}&operation_name={ctx.operation}', None),
+        ('inspection-report-export', 'get', lambda: f'/api/reports/export/?date={ctx.date}&type=csv', None),
+        ('inspection-report-print-day', 'get', lambda: f'/api/reports/pdf/?date={ctx.date}', None),
+        ('inspection-report-bulk-import', 'post', lambda: '/api/reports/import/', import_file),
+        ('inspection-report-batch', 'post', lambda: '/api/reports/batch/', batch),
+        ('inspection-report-detail', 'get', lambda: f'/api/reports/{r}/', None),
+        ('inspection-report-detail', 'put', lambda: f'/api/reports/{r}/', lambda: ctx.report_payload),
+        ('inspection-report-detail', 'patch', lambda: f'/api/reports/{r}/', lambda: {'approved_by': 'QA'}),
+        ('inspection-report-detail', 'delete', lambda: f'/api/reports/{ctx.created_report()}/', None),
+        ('inspection-report-pdf', 'get', lambda: f'/api/reports/{r}/pdf/', None),
+        ('inspection-item-list', 'get', lambda: f'/api/items/?report_id={r}', None),
+        ('inspection-item-detail', 'get', lambda: f'/api/items/{ctx.item_id}/', None),
+        ('schedule-entry-list', 'get', lambda: f'/api/schedule/?report_id={r}', None),
+        ('schedule-entry-detail', 'get', lambda: f'/api/schedule/{ctx.entry_id}/', None),
+        ('schedule-entry-detail', 'patch', lambda: f'/api/schedule/{ctx.entry_id}/', lambda: {'operator': 'RAM'}),
+        ('pdi-report-list', 'get', lambda: '/api/pdi-reports/', None),
+        ('pdi-report-list', 'post', lambda: '/api/pdi-reports/', lambda: ctx.pdi_payload),
+        ('pdi-report-latest', 'get', lambda: f'/api/pdi-reports/latest/?part_name={ctx.part}', None),
+        ('pdi-report-export', 'get', lambda: f'/api/pdi-reports/export/?date={ctx.pdi_date}&type=csv', None),
+        ('pdi-report-print-day', 'get', lambda: f'/api/pdi-reports/pdf/?date={ctx.pdi_date}', None),
+        ('pdi-report-detail', 'get', lambda: f'/api/pdi-reports/{p}/', None),
+        ('pdi-report-pdf', 'get', lambda: f'/api/pdi-reports/{p}/pdf/', None),
+        ('dropdown-options', 'get', lambda: '/api/dropdown-options/', None),
+        ('dropdown-suggest', 'get', lambda: f'/api/dropdown-options/suggest/?field=part_name&q={ctx.part[:3]}', None),
+        ('dropdown-tree', 'get', lambda: '/api/dropdown-options/tree/', None),
+        ('inspection-items', 'get', lambda: f'/api/inspection-items/?operation={ctx.operation}', None),
+        ('spc', 'get', lambda: f'/api/spc/?part_name={ctx.part}&operation_name={ctx.operation}', None),
+        ('sync', 'get', lambda: f'/api/sync/?date={ctx.date}', None),
+        ('search', 'get', lambda: f'/api/search/?q={ctx.part[:4]}', None),
+        ('dashboard-daily', 'get', lambda: '/api/dashboard/daily/', None),
+        ('dashboard-breakdown', 'get', lambda: '/api/dashboard/breakdown/?by=machine', None),
+        ('metrics', 'get', lambda: '/api/metrics/', None),
+    ]
+
+
+def url_names(patterns=None):
+    names = set()
+    for pattern in patterns if patterns is not None else get_resolver().url_patterns:
+        if isinstance(pattern, URLResolver):
+            if patterns is None and not str(pattern.pattern).startswith('api/'):
+                continue
+            names |= url_names(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(client, ctx, method, path, body, requests):
+    def call():
+        kwargs = {}
+        if body is not None:
+            data = body()
+            kwargs = {'data': data, 'format': 'multipart' if 'file' in data else 'json'}
+        url = path()
+        response = getattr(client, method)(url, **kwargs)
+        if method == 'post' and response.status_code == 201 and url == '/api/reports/':
+            ctx.created.append(response.data['id'])
+        return url, response
+
+    call()  # warm-up
+    samples, queries, statuses, size = [], [], set(), 0
+    for _ in range(requests):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            url, response = call()
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            samples.append(time.perf_counter() - start)
+        queries.append(counter.count)
+        statuses.add(response.status_code)
+        size = len(content)
+    cuts = statistics.quantiles(samples, n=100, method='inclusive') if len(samples) > 1 else samples * 99
+    return {
+        'path': url,
+        'status': sorted(statuses),
+        'p50_ms': round(statistics.median(samples) * 1000, 3),
+        'p99_ms': round(cuts[98] * 1000, 3),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'queries': statistics.median_low(queries),
+        'max_queries': max(queries),
+        'bytes': size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--reports', type=int, help='Overrides --scale')
+    parser.add_argument('--requests', type=int, default=30, help='Timed requests per case')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--only', help='Run only URL names containing this text')
+    parser.add_argument('--output', help='Also write all results to this JSON file')
+    args = parser.parse_args()
+
+    sizes = dict(SCALES[args.scale])
+    if args.reports is not None:
+        sizes['reports'] = args.reports
+
+    with test_database(), tempfile.TemporaryDirectory() as pdf_cache, \
+            override_settings(PDF_WORKERS=0, PDF_CACHE_DIR=pdf_cache, SLOW_REQUEST_MS=10 ** 9):
+        start = time.perf_counter()
+        counts = generate(seed=args.seed, **sizes)
+        master_data.invalidate()
+        meta = {
+            'vendor': connection.vendor, 'django': django.get_version(), 'python': platform.python_version(),
+            'scale': args.scale, 'seed': args.seed, 'rows': counts, 'requests': args.requests,
+            'generate_seconds': round(time.perf_counter() - start, 2),
+        }
+        emit('endpoints', **meta)
+
+        client = APIClient()
+        ctx = Context(client)
+        results = []
+        for name, method, path, body in cases(ctx):
+            if args.only and args.only not in name:
+                continue
+            result = {'endpoint': name, 'method': method.upper(), **measure(client, ctx, method, path, body, args.requests)}
+            results.append(result)
+            emit('endpoints', **result)
+
+        uncovered = sorted(url_names() - {name for name, *_ in cases(ctx)} - SKIP)
+        if uncovered:
+            emit('endpoints', uncovered=uncovered)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'meta': meta, 'results': results, 'uncovered': uncovered}, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Time to first byte, total time and peak Python memory of the streaming
+CSV export, next to serializing the same reports through /api/reports/.
+
+    python -m benchmarks.export_stream                  # 2,000 reports × 40 rows
+    python -m benchmarks.export_stream --reports 10000
+
+Peak memory comes from tracemalloc, so it only counts Python allocations —
+enough to show whether it grows with the export size.
+"""
+import argparse
+import time
+import tracemalloc
+
+from .harness import setup, test_database, emit
+
+setup()
+
+from django.db import transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from inspectionform.models import InspectionItem, InspectionReport, ScheduleEntry  # noqa: E402
+
+CHUNK = 500
+
+
+def seed(reports, entries, items):
+    for offset in range(0, reports, CHUNK):
+        with transaction.atomic():
+            created = InspectionReport.objects.bulk_create([
+                InspectionReport(part_name='SHAFT', operation_name='TURNING', customer_name='ACME')
+                for _ in range(min(CHUNK, reports - offset))
+            ])
+            InspectionItem.objects.bulk_create([
+                InspectionItem(report=report, sr_no=n, item=f'Item {n}', spec='25.0', tolerance='±0.05')
+                for report in created for n in range(1, items + 1)
+            ])
+            ScheduleEntry.objects.bulk_create([
+                ScheduleEntry(
+                    report=report, slot_index=n // 2, row_order=n % 2, time_type='SETUP',
+                    values=[f'25.{k:02d}' for k in range(items)],
+                )
+                for report in created for n in range(entries)
+            ])
+
+
+def measure(name, url, **fields):
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = Client().get(url)
+    first_byte = None
+    size = 0
+    if response.streaming:
+        for chunk in response.streaming_content:
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+    else:
+        size = len(response.content)
+        first_byte = time.perf_counter() - start
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    emit('export_stream', endpoint=name, status=response.status_code, bytes=size,
+         first_byte_ms=round(first_byte * 1000, 1), total_ms=round(total * 1000, 1),
+         peak_mb=round(peak / 2 ** 20, 1), **fields)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reports', type=int, default=2000)
+    parser.add_argument('--entries', type=int, default=40)
+    parser.add_argument('--items', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database():
+        seed(args.reports, args.entries, args.items)
+        rows = args.reports * args.entries
+        measure('reports_export_csv', '/api/reports/export/', rows=rows)
+        measure('reports_list_json', '/api/reports/', rows=rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Shared plumbing for the scripts in this package.
+
+Run any benchmark from the backend/ directory, e.g.
+
+    python -m benchmarks.item_sync
+
+Each script works on a throwaway test database (``test_<NAME>`` for Postgres,
+in-memory for SQLite) so real inspection data is never touched.  Point
+DJANGO_SETTINGS_MODULE at another settings module to benchmark a different
+database.
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database():
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+@contextlib.contextmanager
+def timer(result, key='seconds'):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        result[key] = round(time.perf_counter() - start, 6)
+
+
+def emit(name, **fields):
+    """One JSON line per measurement, so results can be diffed or piped into jq."""
+    sys.stdout.write(json.dumps({'benchmark': name, **fields}) + '\n')
+    sys.stdout.flush()
@@ -0,0 +1,66 @@
+"""
+Rows written per report save: delete-and-recreate vs the sr_no diff.
+
+    python -m benchmarks.item_sync
+"""
+from .harness import setup, test_database, emit
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from inspectionform.models import InspectionItem, InspectionReport  # noqa: E402
+from inspectionform.serializers import InspectionReportCreateSerializer, sync_items  # noqa: E402
+
+ITEMS = 20
+
+
+def items_payload():
+    return [
+        {'sr_no': sr_no, 'item': f'Item {sr_no}', 'special_char': '', 'spec': '25.0',
+         'tolerance': '±0.05', 'inst': 'VC'}
+        for sr_no in range(1, ITEMS + 1)
+    ]
+
+
+def scenarios():
+    unchanged = items_payload()
+
+    one_edit = items_payload()
+    one_edit[3]['spec'] = '25.5'
+
+    add_remove = items_payload()[:-1] + [{'sr_no': ITEMS + 1, 'item': 'Extra', 'spec': '10.0'}]
+
+    return [('unchanged', unchanged), ('one_edit', one_edit), ('add_remove', add_remove)]
+
+
+def item_writes(queries):
+    return sum(
+        1 for q in queries
+        if InspectionItem._meta.db_table in q['sql'] and not q['sql'].lstrip().upper().startswith('SELECT')
+    )
+
+
+def main():
+    with test_database():
+        for name, items in scenarios():
+            serializer = InspectionReportCreateSerializer(data={'date': '2026-01-05', 'items': items_payload()})
+            serializer.is_valid(raise_exception=True)
+            report = serializer.save()
+
+            # Old behaviour: every save deletes and re-inserts the full list
+            emit('item_sync', scenario=name, strategy='delete_recreate',
+                 rows_written=report.items.count() + len(items))
+
+            with CaptureQueriesContext(connection) as ctx:
+                changes = sync_items(InspectionItem, report, items)
+            emit('item_sync', scenario=name, strategy='diff',
+                 rows_written=sum(changes.values()), write_statements=item_writes(ctx.captured_queries),
+                 **changes)
+
+            InspectionReport.objects.filter(pk=report.pk).delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-request cost of MetricsMiddleware: the same requests with and without it
+in MIDDLEWARE, interleaved so drift hits both sides alike.
+
+    python -m benchmarks.metrics_overhead               # 2,000 requests per side
+    python -m benchmarks.metrics_overhead --requests 10000
+"""
+import argparse
+import statistics
+import time
+
+from .harness import setup, test_database, emit
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+
+from inspectionform.models import InspectionItem, InspectionReport, ScheduleEntry  # noqa: E402
+
+METRICS = 'inspectionform.metrics.MetricsMiddleware'
+
+
+def seed():
+    report = InspectionReport.objects.create(part_name='SHAFT', operation_name='TURNING', customer_name='ACME')
+    InspectionItem.objects.bulk_create([
+        InspectionItem(report=report, sr_no=n, item=f'Item {n}', spec='25.0', tolerance='±0.05') for n in range(1, 21)
+    ])
+    ScheduleEntry.objects.bulk_create([
+        ScheduleEntry(report=report, slot_index=n // 2, row_order=n % 2, time_type='SETUP', values=['25.01'] * 20)
+        for n in range(40)
+    ])
+    return report
+
+
+def timed(client, url, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        client.get(url)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    with test_database():
+        report = seed()
+        without = [name for name in settings.MIDDLEWARE if name != METRICS]
+        for label, url in (('detail', f'/api/reports/{report.id}/'), ('summary_list', '/api/reports/?view=summary')):
+            on, off = [], []
+            for _ in range(10):
+                on += timed(Client(), url, args.requests // 10)
+                with override_settings(MIDDLEWARE=without):
+                    off += timed(Client(), url, args.requests // 10)
+            on_us, off_us = statistics.median(on) * 1e6, statistics.median(off) * 1e6
+            emit('metrics_overhead', endpoint=label, requests=len(on),
+                 median_us_with=round(on_us, 1), median_us_without=round(off_us, 1),
+                 overhead_us=round(on_us - off_us, 1), overhead_percent=round((on_us - off_us) / off_us * 100, 2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Cost of a server-side printout: first (rendering) request versus a cached
+one, for single reports and for a whole day printed as one PDF.
+
+    python -m benchmarks.pdf_print
+    python -m benchmarks.pdf_print --reports 40 --workers 0   # render in-thread
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+
+from .harness import setup, test_database, emit
+
+setup()
+
+from django.test import Client, override_settings  # noqa: E402
+
+from inspectionform.models import InspectionItem, InspectionReport, ScheduleEntry  # noqa: E402
+from inspectionform.printing import printer  # noqa: E402
+
+
+def seed(reports):
+    created = []
+    for n in range(reports):
+        report = InspectionReport.objects.create(
+            date='2026-01-05', part_name=f'PART-{n}', operation_name='TURNING', customer_name='ACME',
+        )
+        InspectionItem.objects.bulk_create([
+            InspectionItem(report=report, sr_no=sr_no, item=f'Item {sr_no}', spec='25.0', tolerance='±0.05', inst='VC')
+            for sr_no in range(1, 21)
+        ])
+        ScheduleEntry.objects.bulk_create([
+            ScheduleEntry(
+                report=report, slot_index=i // 2, row_order=i % 2, time_type=['SETUP', '4HRS', 'LAST'][i // 2],
+                operator='RAM', machine_no='M1', values=['25.01'] * 20, judgment='OK',
+            ) for i in range(6)
+        ])
+        created.append(report)
+    return created
+
+
+def fetch(client, url):
+    start = time.perf_counter()
+    response = client.get(url)
+    size = len(b''.join(response.streaming_content))
+    return time.perf_counter() - start, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reports', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        with test_database(), override_settings(PDF_CACHE_DIR=cache_dir, PDF_WORKERS=args.workers):
+            reports = seed(args.reports)
+            client = Client()
+            printer.get('warm-up', 0, 'pdi', list)   # start the worker processes outside the timings
+
+            for phase in ('render', 'cached'):
+                timings = [fetch(client, f'/api/reports/{report.id}/pdf/') for report in reports]
+                emit('pdf_print', target='report', phase=phase, workers=args.workers,
+                     p50_ms=round(statistics.median(t for t, _ in timings) * 1000, 2),
+                     bytes=timings[0][1])
+            for phase in ('render', 'cached'):
+                seconds, size = fetch(client, '/api/reports/pdf/?date=2026-01-05')
+                emit('pdf_print', target='day', phase=phase, workers=args.workers, reports=args.reports,
+                     ms=round(seconds * 1000, 2), bytes=size)
+            if printer._pool is not None:
+                printer._pool.shutdown()
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Query plans and latency of the report list filters, without and with the
+composite indexes from migration 0008.
+
+    python -m benchmarks.report_indexes                 # 1,000,000 reports
+    python -m benchmarks.report_indexes --reports 100000
+
+Seeds a throwaway database, drops the Meta.indexes, times every filter path,
+recreates the indexes and times them again.  Prints one JSON line per
+(query, phase) with p50 latency and the EXPLAIN output.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from .harness import setup, test_database, emit
+
+setup()
+
+from django.db import connection, transaction  # noqa: E402
+
+from inspectionform.models import InspectionReport, PDIReport  # noqa: E402
+
+CHUNK = 10000
+PARTS = [f'PART-{n:04d}' for n in range(2000)]
+OPERATIONS = [f'OP-{n:03d}' for n in range(150)]
+CUSTOMERS = [f'CUSTOMER-{n:02d}' for n in range(40)]
+START = date(2020, 1, 1)
+
+
+def seed(reports):
+    rng = random.Random(42)
+
+    def day():
+        return START + timedelta(days=rng.randrange(2000))
+
+    for offset in range(0, reports, CHUNK):
+        size = min(CHUNK, reports - offset)
+        with transaction.atomic():
+            InspectionReport.objects.bulk_create([
+                InspectionReport(
+                    date=day(), part_name=rng.choice(PARTS), operation_name=rng.choice(OPERATIONS),
+                    customer_name=rng.choice(CUSTOMERS),
+                ) for _ in range(size)
+            ])
+            PDIReport.objects.bulk_create([
+                PDIReport(
+                    inspection_date=day(), part_name=rng.choice(PARTS), part_no=rng.choice(PARTS),
+                    customer_name=rng.choice(CUSTOMERS),
+                ) for _ in range(size)
+            ])
+    analyze()
+
+
+def analyze():
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def queries():
+    day = START + timedelta(days=1000)
+    reports = InspectionReport.objects.order_by('-date', '-id')
+    pdi = PDIReport.objects.order_by('-inspection_date', '-id')
+    return {
+        'reports_all_first_page': reports[:50],
+        'reports_by_date': reports.filter(date=day),
+        'reports_by_part': reports.filter(part_name=PARTS[7])[:50],
+        'reports_by_operation': reports.filter(operation_name=OPERATIONS[3])[:50],
+        'reports_by_customer': reports.filter(customer_name=CUSTOMERS[5])[:50],
+        'reports_latest_by_part': InspectionReport.objects.filter(part_name=PARTS[7]).order_by('-id')[:1],
+        'pdi_all_first_page': pdi[:50],
+        'pdi_by_date': pdi.filter(inspection_date=day),
+        'pdi_by_part': pdi.filter(part_name=PARTS[7])[:50],
+        'pdi_by_customer': pdi.filter(customer_name=CUSTOMERS[5])[:50],
+        'pdi_by_part_no': pdi.filter(part_no=PARTS[9])[:50],
+    }
+
+
+def measure(phase, repeat):
+    for name, queryset in queries().items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.all())  # fresh clone, no result cache
+            timings.append(time.perf_counter() - start)
+        emit('report_indexes', phase=phase, query=name,
+             p50_ms=round(statistics.median(timings) * 1000, 3),
+             max_ms=round(max(timings) * 1000, 3),
+             plan=queryset.explain())
+
+
+def model_indexes():
+    for model in (InspectionReport, PDIReport):
+        for index in model._meta.indexes:
+            yield model, index
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reports', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database():
+        started = time.perf_counter()
+        seed(args.reports)
+        emit('report_indexes', phase='seed', reports=args.reports,
+             seconds=round(time.perf_counter() - started, 2))
+
+        with connection.schema_editor() as editor:
+            for model, index in model_indexes():
+                editor.remove_index(model, index)
+        measure('before', args.repeat)
+
+        with connection.schema_editor() as editor:
+            for model, index in model_indexes():
+                editor.add_index(model, index)
+        analyze()
+        measure('after', args.repeat)
+
+
+if __name__ == '__main__':
+    main()
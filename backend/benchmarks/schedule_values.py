@@ -0,0 +1,76 @@
+"""
+Payload size and serializer time of a full patrol report, with measurements
+sent once as the `values` array versus the ?legacy_values=1 compatibility
+view (value_1 .. value_20 alongside the array, as every response used to be).
+
+    python -m benchmarks.schedule_values
+"""
+import argparse
+import json
+import time
+
+from .harness import setup, test_database, emit
+
+setup()
+
+from django.db import connection  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+
+from inspectionform.models import InspectionItem, InspectionReport, ScheduleEntry  # noqa: E402
+from inspectionform.serializers import InspectionReportSerializer  # noqa: E402
+
+
+def seed(items, entries, readings):
+    report = InspectionReport.objects.create(part_name='SHAFT', operation_name='TURNING')
+    InspectionItem.objects.bulk_create([
+        InspectionItem(report=report, sr_no=n, item=f'Item {n}', spec='25.0', tolerance='±0.05')
+        for n in range(1, items + 1)
+    ])
+    ScheduleEntry.objects.bulk_create([
+        ScheduleEntry(
+            report=report, slot_index=n // 2, row_order=n % 2, time_type='SETUP',
+            values=[f'25.{k:02d}' for k in range(readings)],
+        ) for n in range(entries)
+    ])
+    return report
+
+
+def serialize(report, query, repeat):
+    request = Request(APIRequestFactory().get('/api/reports/', query))
+    instance = InspectionReport.objects.prefetch_related('items', 'schedule_entries').get(pk=report.pk)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        data = InspectionReportSerializer(instance, context={'request': request}).data
+    elapsed = (time.perf_counter() - start) / repeat
+    return data, elapsed
+
+
+def row_width():
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT avg(pg_column_size("values")) FROM schedule_entries')
+        else:
+            cursor.execute('SELECT avg(length("values")) FROM schedule_entries')
+        return float(cursor.fetchone()[0] or 0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--entries', type=int, default=40)
+    parser.add_argument('--readings', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with test_database():
+        report = seed(20, args.entries, args.readings)
+        for mode, query in (('legacy_columns', {'legacy_values': '1'}), ('values_array', {})):
+            data, elapsed = serialize(report, query, args.repeat)
+            emit('schedule_values', mode=mode, entries=args.entries,
+                 payload_bytes=len(json.dumps(data).encode()),
+                 serialize_ms=round(elapsed * 1000, 3))
+        emit('schedule_values', mode='storage', vendor=connection.vendor, avg_values_bytes=row_width())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+/api/search/ latency on synthetic data, per kind of query.
+
+    python -m benchmarks.search                         # 10,000 reports
+    python -m benchmarks.search --reports 50000 --rounds 200
+
+Reports the backend in use (in-process index on SQLite, pg_trgm on
+Postgres), the time to build the in-process index, and p50 / p99 of
+search() for prefix, typo, part-number, invoice and multi-word queries,
+plus the same queries as the LIKE '%x%' scans the admin falls back to.
+"""
+import argparse
+import statistics
+import time
+
+from .harness import setup, test_database, emit
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Q  # noqa: E402
+
+from inspectionform import search  # noqa: E402
+from inspectionform.models import InspectionItem, InspectionReport, PDIReport, ScheduleEntry  # noqa: E402
+from inspectionform.synthetic import generate  # noqa: E402
+
+
+def queries():
+    report = InspectionReport.objects.order_by('id').first()
+    pdi = PDIReport.objects.order_by('id').first()
+    part = report.part_name.split()[0]
+    typo = part[0] + part[2] + part[1] + part[3:] if len(part) > 3 else part
+    return {
+        'prefix': part[:3].lower(),
+        'typo': typo.lower(),
+        'part_number': report.part_number,
+        'invoice': pdi.invoice_no,
+        'item': 'groove wid',
+        'multi_word': f'{report.part_name} {report.operation_name[:4]}',
+    }
+
+
+def like_scan(query):
+    """What a naive icontains search over the same columns costs"""
+    found = set()
+    for word in query.split():
+        ids = set(InspectionReport.objects.filter(
+            Q(part_name__icontains=word) | Q(part_number__icontains=word) | Q(operation_name__icontains=word)
+            | Q(customer_name__icontains=word)
+        ).values_list('id', flat=True))
+        ids |= set(InspectionItem.objects.filter(item__icontains=word).values_list('report_id', flat=True))
+        ids |= set(ScheduleEntry.objects.filter(
+            Q(operator__icontains=word) | Q(machine_no__icontains=word)
+        ).values_list('report_id', flat=True))
+        found = ids if not found else found & ids
+    return found
+
+
+def timed(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    cuts = statistics.quantiles(samples, n=100, method='inclusive') if rounds > 1 else samples * 99
+    return round(statistics.median(samples) * 1000, 3), round(cuts[98] * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reports', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=100)
+    args = parser.parse_args()
+
+    with test_database():
+        counts = generate(reports=args.reports, pdi_reports=args.reports // 5)
+        backend = search.get_backend()
+        emit('search', vendor=connection.vendor, backend=type(backend).__name__, rows=counts)
+
+        start = time.perf_counter()
+        backend.invalidate()
+        search.search('warm-up')
+        stats = {key: value for key, value in backend.stats().items() if key != 'built_at'}
+        emit('search', build_seconds=round(time.perf_counter() - start, 3), **stats)
+
+        for name, query in queries().items():
+            p50, p99 = timed(lambda: search.search(query), args.rounds)
+            hits = len(search.search(query))
+            like_p50, _ = timed(lambda: like_scan(query), max(3, args.rounds // 20))
+            emit('search', query=name, q=query, hits=hits, p50_ms=p50, p99_ms=p99, like_scan_p50_ms=like_p50)
+
+
+if __name__ == '__main__':
+    main()
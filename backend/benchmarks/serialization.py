@@ -0,0 +1,101 @@
+"""
+Serialization time and bytes on the wire for the report and PDI endpoints.
+
+    python -m benchmarks.serialization                    # small scale
+    python -m benchmarks.serialization --scale medium --rounds 500 --requests 50
+
+For each endpoint the serializer output (response.data) is taken once.  Then
+the script times encoding it with DRF's JSONRenderer, with FastJSONRenderer
+(orjson) and, if installed, with msgpack, and reports the body size of
+each.  The fast JSON body is then compressed with gzip and, if installed,
+brotli at the levels in settings.  Finally it reports the full
+request p50 through the middleware stack, uncompressed and with
+``Accept-Encoding: gzip, br``.
+"""
+import argparse
+import statistics
+import time
+
+from .harness import setup, test_database, emit
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from inspectionform import compression  # noqa: E402
+from inspectionform.models import InspectionReport, PDIReport  # noqa: E402
+from inspectionform.renderers import FastJSONRenderer, MessagePackRenderer, orjson  # noqa: E402
+from inspectionform.synthetic import SCALES, generate  # noqa: E402
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def p50(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def urls():
+    report = InspectionReport.objects.order_by('-id').first()
+    pdi = PDIReport.objects.order_by('-id').first()
+    return {
+        'report-detail': f'/api/reports/{report.id}/',
+        'report-list': '/api/reports/',
+        'report-summary': '/api/reports/?view=summary',
+        'pdi-detail': f'/api/pdi-reports/{pdi.id}/',
+        'pdi-list': '/api/pdi-reports/',
+    }
+
+
+def encoders():
+    found = {'drf_json': JSONRenderer().render, 'fast_json': FastJSONRenderer().render}
+    if msgpack is not None:
+        found['msgpack'] = MessagePackRenderer().render
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--rounds', type=int, default=200, help='Timed encodes per endpoint')
+    parser.add_argument('--requests', type=int, default=20, help='Timed full requests per endpoint')
+    args = parser.parse_args()
+
+    with test_database(), override_settings(SLOW_REQUEST_MS=10 ** 9):
+        counts = generate(**SCALES[args.scale])
+        emit('serialization', vendor=connection.vendor, rows=counts, orjson=orjson is not None,
+             msgpack=msgpack is not None, brotli=compression.brotli is not None,
+             gzip_level=settings.GZIP_LEVEL, brotli_quality=settings.BROTLI_QUALITY)
+
+        client = APIClient()
+        codings = ['gzip'] + (['br'] if compression.brotli is not None else [])
+        for name, url in urls().items():
+            data = client.get(url).data
+            result = {'endpoint': name, 'url': url}
+            for encoder, render in encoders().items():
+                body = render(data)
+                result[f'{encoder}_bytes'] = len(body)
+                result[f'{encoder}_ms'] = p50(lambda: render(data), args.rounds)
+            body = FastJSONRenderer().render(data)
+            for coding in codings:
+                result[f'{coding}_bytes'] = len(compression.compress(coding, body))
+                result[f'{coding}_ms'] = p50(lambda: compression.compress(coding, body), args.rounds)
+            result['request_ms'] = p50(lambda: client.get(url), args.requests)
+            result['request_compressed_ms'] = p50(
+                lambda: client.get(url, HTTP_ACCEPT_ENCODING='gzip, br'), args.requests)
+            emit('serialization', **result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Cost of holding SSE subscribers open: CPU burnt while they sit idle, and how
+long one publish takes to reach every one of them.  The streams are the same
+event_stream() generators the /api/reports/{id}/events/ view returns, driven
+on one event loop the way an ASGI server drives them.
+
+    python -m benchmarks.sse_idle                       # 500 subscribers, 5 s idle
+    python -m benchmarks.sse_idle --subscribers 5000 --idle 10
+"""
+import argparse
+import asyncio
+import time
+
+from .harness import setup, emit
+
+setup()
+
+from inspectionform.events import event_stream, get_broker, report_topic  # noqa: E402
+
+
+async def run(subscribers, reports, idle):
+    broker = get_broker()
+    streams = [event_stream(report_topic(n % reports)) for n in range(subscribers)]
+    for stream in streams:
+        await anext(stream)  # retry preamble; the subscription is now live
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.sleep(idle)
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    emit('sse_idle', mode='idle', subscribers=broker.subscriber_count(), seconds=round(wall, 2),
+         cpu_seconds=round(cpu, 4), cpu_percent=round(cpu / wall * 100, 3))
+
+    waiting = [asyncio.ensure_future(anext(stream)) for stream in streams]
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    for report in range(reports):
+        broker.publish(report_topic(report), {'type': 'updated', 'report': report, 'id': 1, 'values': ['25.01']})
+    await asyncio.gather(*waiting)
+    elapsed = time.perf_counter() - start
+    emit('sse_idle', mode='fan_out', subscribers=subscribers, topics=reports,
+         ms=round(elapsed * 1000, 2), us_per_subscriber=round(elapsed / subscribers * 1e6, 2))
+
+    for stream in streams:
+        await stream.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--subscribers', type=int, default=500)
+    parser.add_argument('--reports', type=int, default=50, help='Distinct reports being watched')
+    parser.add_argument('--idle', type=float, default=5.0, help='Seconds to sit idle')
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers, args.reports, args.idle))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Typeahead lookups against the SuggestIndex versus shipping whole lists.
+
+    python -m benchmarks.suggest                    # 50,000 part rows
+    python -m benchmarks.suggest --parts 200000
+
+Fills the L1/L2 stand-in tables, then reports the index build time, the
+p50 of SuggestIndex.suggest() in microseconds for 1-, 2- and 4-letter
+prefixes (and of a linear scan doing the same), and the size and p50 of
+/api/dropdown-options/ next to /api/dropdown-options/suggest/ and the
+customer → part → operation tree, whole and for one customer.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from .harness import setup, test_database, emit
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+
+from inspectionform.masterdata import (  # noqa: E402
+    L1_TABLE, L2_TABLE, SuggestIndex, create_stand_in_tables, master_data, table,
+)
+from inspectionform.synthetic import CUSTOMERS, OPERATIONS, PARTS  # noqa: E402
+
+
+def seed(parts):
+    rng = random.Random(7)
+    create_stand_in_tables(force=True)
+    l1 = [
+        (n, rng.choice(CUSTOMERS), f'{rng.choice(PARTS)} {rng.choice("ABCDEFGH")}{n}', f'KG-{n:06d}')
+        for n in range(1, parts + 1)
+    ]
+    l2 = [(n, n, rng.choice(OPERATIONS)) for n in range(1, parts + 1)]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {table(L1_TABLE)} (id, customer_name, part_name, part_no) VALUES (%s, %s, %s, %s)', l1)
+        cursor.executemany(f'INSERT INTO {table(L2_TABLE)} (id, part_id, report_name) VALUES (%s, %s, %s)', l2)
+
+
+def micros(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--parts', type=int, default=50000)
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    with test_database(), override_settings(SLOW_REQUEST_MS=10 ** 9):
+        seed(args.parts)
+        master_data.invalidate()
+        options = master_data.dropdown_options()
+        start = time.perf_counter()
+        index = SuggestIndex(options, 'bench')
+        emit('suggest', parts=args.parts, part_names=len(options['part_names']),
+             build_ms=round((time.perf_counter() - start) * 1000, 1))
+
+        names = options['part_names']
+        for prefix in ('s', 'sh', 'shaf', 'a1'):
+            emit('suggest', prefix=prefix, results=index.suggest('part_name', prefix),
+                 index_p50_us=micros(lambda: index.suggest('part_name', prefix), args.rounds),
+                 scan_p50_us=micros(lambda: [n for n in names if n.lower().startswith(prefix)][:10], 20))
+
+        client = Client()
+        customer = options['customers'][0]
+        for url in ('/api/dropdown-options/', '/api/dropdown-options/suggest/?field=part_name&q=shaf',
+                    '/api/dropdown-options/tree/', f'/api/dropdown-options/tree/?customer={customer.replace(" ", "+")}'):
+            client.get(url)
+            size = len(client.get(url).content)
+            emit('suggest', url=url, bytes=size, p50_us=micros(lambda: client.get(url), 50))
+
+
+if __name__ == '__main__':
+    main()
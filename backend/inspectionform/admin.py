@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import InspectionReport, InspectionItem, ScheduleEntry
+from .models import InspectionReport, InspectionItem, ScheduleEntry, ImportJob
 
 
 # ✅ InspectionItems — Report ke andar inline dikhenge
@@ -16,11 +16,7 @@ class ScheduleEntryInline(admin.TabularInline):
     extra = 0
     fields = [
         'sr', 'slot_index', 'row_order', 'date', 'operator', 'machine_no', 'time_type',
-        'value_1',  'value_2',  'value_3',  'value_4',  'value_5',
-        'value_6',  'value_7',  'value_8',  'value_9',  'value_10',
-        'value_11', 'value_12', 'value_13', 'value_14',
-        'value_15', 'value_16', 'value_17', 'value_18', 'value_19', 'value_20',  # ✅ FIXED
-        'judgment', 'signature', 'filled_at'  # ✅ FIXED
+        'values', 'judgment', 'signature', 'filled_at'
     ]
     ordering = ['sr', 'slot_index', 'row_order']
 
@@ -107,21 +103,28 @@ class ScheduleEntryAdmin(admin.ModelAdmin):
         ('Schedule Info', {
             'fields': ('sr', 'slot_index', 'row_order', 'date', 'operator', 'machine_no', 'time_type')  # ✅ FIXED
         }),
-        ('Measured Values (1–10)', {
-            'fields': (
-                'value_1',  'value_2',  'value_3',  'value_4',  'value_5',
-                'value_6',  'value_7',  'value_8',  'value_9',  'value_10',
-            ),
-            'classes': ('collapse',)
-        }),
-        ('Measured Values (11–20)', {  # ✅ FIXED — split into two groups for clarity
-            'fields': (
-                'value_11', 'value_12', 'value_13', 'value_14',
-                'value_15', 'value_16', 'value_17', 'value_18', 'value_19', 'value_20',  # ✅ FIXED
-            ),
-            'classes': ('collapse',)
+        ('Measured Values', {
+            'fields': ('values',),
         }),
         ('Results', {
             'fields': ('judgment', 'signature', 'filled_at')  # ✅ FIXED
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'source',
+        'file_type',
+        'status',
+        'records_done',
+        'reports_created',
+        'entries_created',
+        'error_count',
+        'updated_at',
+    ]
+    list_filter = ['status', 'file_type']
+    search_fields = ['source', 'checksum']
+    readonly_fields = ['checksum', 'created_at', 'updated_at']
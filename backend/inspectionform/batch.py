@@ -0,0 +1,166 @@
+"""
+Offline batch save: one request carrying the report mutations an
+offline-capable client queued while the shop-floor Wi-Fi was down.
+
+Each mutation has a client-generated idempotency key:
+
+    {"key": "tab7-000123", "op": "create", "data": {...report form...}}
+    {"key": "tab7-000124", "op": "update", "ref": "tab7-000123", "data": {...}}
+    {"key": "tab7-000125", "op": "update", "id": 42, "version": 3, "data": {...}}
+    {"key": "tab7-000126", "op": "delete", "id": 41}
+
+``ref`` names the key of an earlier ``create`` (in this batch or an earlier
+one), so a report made offline can be edited before the server ever
+assigned it an id.  An update that names the ``version`` it was based on
+fails if the report has moved on since (see InspectionReportCreateSerializer.
+update).  The whole batch runs in one transaction: either every
+mutation is applied or none is.  Keys already applied are not run again —
+their stored result is returned — so resending a batch after a dropped
+response never creates a duplicate report.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import rollups
+from .models import InspectionReport, IdempotencyKey
+from .serializers import InspectionReportCreateSerializer, VersionConflict
+
+
+OPS = ('create', 'update', 'delete')
+
+
+class BatchError(Exception):
+    """The batch was rolled back; ``errors`` lists the failing mutations"""
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} mutations failed')
+        self.errors = errors
+
+
+def max_mutations():
+    return getattr(settings, 'BATCH_MAX_MUTATIONS', 200)
+
+
+def check(mutation):
+    """Shape errors of one mutation, before anything touches the database"""
+    if not isinstance(mutation, dict):
+        return ['Each mutation must be an object.']
+    errors = []
+    key = mutation.get('key')
+    if not isinstance(key, str) or not key or len(key) > 100:
+        errors.append('key must be a non-empty string of at most 100 characters.')
+    op = mutation.get('op')
+    if op not in OPS:
+        errors.append(f'op must be one of {", ".join(OPS)}.')
+    if op in ('create', 'update') and not isinstance(mutation.get('data'), dict):
+        errors.append('data must be an object.')
+    if op in ('update', 'delete') and mutation.get('id') is None and mutation.get('ref') is None:
+        errors.append('update and delete need the report "id" or the "ref" key of its create.')
+    if mutation.get('version') is not None and not isinstance(mutation['version'], int):
+        errors.append('version must be an integer.')
+    return errors
+
+
+def apply(mutation, created):
+    """Run one mutation; returns (result, errors)"""
+    op = mutation['op']
+    if op == 'create':
+        data = dict(mutation['data'])
+        data.pop('_isNew', None)
+        serializer = InspectionReportCreateSerializer(data=data)
+        if not serializer.is_valid():
+            return None, serializer.errors
+        report = serializer.save()
+        created[mutation['key']] = report.pk
+        return {'op': op, 'id': report.pk, 'version': report.version}, None
+
+    report_id = mutation.get('id')
+    if report_id is None:
+        report_id = created.get(mutation['ref'])
+        if report_id is None:
+            return None, [f'No create with key "{mutation["ref"]}" has been applied.']
+    report = InspectionReport.objects.filter(pk=report_id).first()
+
+    if op == 'delete':
+        # Already gone counts as done: the client only wants it not to exist
+        if report is not None:
+            report.delete()
+            rollups.mark(quality=[rollups.quality_key(report)])
+        return {'op': op, 'id': report_id, 'version': None}, None
+
+    if report is None:
+        return None, [f'Report with ID {report_id} not found.']
+    expected = report.version if mutation.get('version') is None else mutation['version']
+    serializer = InspectionReportCreateSerializer(
+        report, data=mutation['data'], partial=True, context={'expected_version': expected},
+    )
+    if not serializer.is_valid():
+        return None, serializer.errors
+    try:
+        report = serializer.save()
+    except VersionConflict:
+        return None, [f'Report {report.pk} is at version {report.version}, not {expected}.']
+    return {'op': op, 'id': report.pk, 'version': report.version}, None
+
+
+def run(mutations):
+    keys = {mutation['key'] for mutation in mutations}
+    applied = {row.key: row for row in IdempotencyKey.objects.filter(key__in=keys)}
+    created = {key: row.report_id for key, row in applied.items() if row.op == 'create'}
+    refs = {mutation['ref'] for mutation in mutations if mutation.get('ref') is not None} - keys - set(created)
+    if refs:
+        created.update(IdempotencyKey.objects.filter(key__in=refs, op='create').values_list('key', 'report_id'))
+
+    results, errors, new_keys = [], [], []
+    now = timezone.now()
+    for index, mutation in enumerate(mutations):
+        key = mutation['key']
+        if key in applied:
+            results.append(dict(applied[key].result, key=key, duplicate=True))
+            continue
+        result, problems = apply(mutation, created)
+        if problems:
+            errors.append({'index': index, 'key': key, 'errors': problems})
+            continue
+        row = applied[key] = IdempotencyKey(key=key, op=mutation['op'], report_id=result['id'], result=result, created_at=now)
+        new_keys.append(row)
+        results.append(dict(result, key=key, duplicate=False))
+
+    if errors:
+        raise BatchError(errors)
+    IdempotencyKey.objects.bulk_create(new_keys)
+    return results
+
+
+def apply_batch(mutations):
+    """
+    Apply ``mutations`` atomically and return one {key, op, id, version,
+    duplicate} per mutation.  Raises BatchError (nothing applied) when any
+    mutation is malformed or fails validation.
+    """
+    errors = [
+        {'index': index, 'key': mutation.get('key') if isinstance(mutation, dict) else None, 'errors': problems}
+        for index, mutation in enumerate(mutations)
+        for problems in [check(mutation)] if problems
+    ]
+    if errors:
+        raise BatchError(errors)
+
+    try:
+        with transaction.atomic():
+            return run(mutations)
+    except IntegrityError:
+        # A concurrent retry of the same batch committed these keys first;
+        # our copy was rolled back, so run again and replay its results.
+        with transaction.atomic():
+            return run(mutations)
+
+
+def prune_idempotency_keys():
+    """Drop keys older than IDEMPOTENCY_KEY_DAYS; returns how many were deleted"""
+    days = getattr(settings, 'IDEMPOTENCY_KEY_DAYS', 30)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
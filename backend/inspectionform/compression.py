@@ -0,0 +1,144 @@
+"""
+Response compression: brotli when the client accepts ``br`` and the brotli
+package is installed, gzip otherwise.
+
+Only text-like types (JSON, MessagePack, CSV, HTML, plain text) are
+compressed.  PDFs and XLSX files are compressed already.  Bodies under
+COMPRESS_MIN_BYTES are sent as they are, because the saving would not pay
+for the CPU.  text/event-stream is never compressed: every event has to reach the
+browser as soon as it is written.  Streaming CSV exports yield one row per
+chunk.  Rows are gathered into STREAM_BUFFER_BYTES before each compress and
+flush, so data keeps flowing without a flush per row: flushing every row made
+the output about 50% larger and compression nearly 4x slower.
+
+Strong ETags become weak, as Django's GZipMiddleware does; make_etag()
+already produces weak ones.
+"""
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+STREAM_BUFFER_BYTES = 32 * 1024
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/msgpack', 'application/javascript', 'text/csv', 'text/html', 'text/plain',
+)
+
+
+def accepted_encoding(header):
+    """'br', 'gzip' or None for an Accept-Encoding header"""
+    qualities = {}
+    for coding in header.split(','):
+        name, _, params = coding.partition(';')
+        quality = 1.0
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+    wildcard = qualities.get('*', 0.0)
+    for name in ('br', 'gzip') if brotli is not None else ('gzip',):
+        if qualities.get(name, wildcard) > 0:
+            return name
+    return None
+
+
+class GzipCompressor:
+    def __init__(self):
+        # wbits 31: zlib stream with a gzip header and trailer
+        self._zlib = zlib.compressobj(getattr(settings, 'GZIP_LEVEL', 1), zlib.DEFLATED, 31)
+
+    def process(self, chunk):
+        return self._zlib.compress(chunk) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, chunk=b''):
+        return self._zlib.compress(chunk) + self._zlib.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self._brotli = brotli.Compressor(quality=getattr(settings, 'BROTLI_QUALITY', 5))
+
+    def process(self, chunk):
+        return self._brotli.process(chunk) + self._brotli.flush()
+
+    def finish(self, chunk=b''):
+        return self._brotli.process(chunk) + self._brotli.finish()
+
+
+def compress(encoding, body):
+    if encoding == 'br':
+        return brotli.compress(body, quality=getattr(settings, 'BROTLI_QUALITY', 5))
+    compressor = zlib.compressobj(getattr(settings, 'GZIP_LEVEL', 1), zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def compressor(encoding):
+    return BrotliCompressor() if encoding == 'br' else GzipCompressor()
+
+
+def compress_stream(encoding, chunks):
+    stream = compressor(encoding)
+    pending, size = [], 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_BUFFER_BYTES:
+            yield stream.process(b''.join(pending))
+            pending, size = [], 0
+    yield stream.finish(b''.join(pending))
+
+
+async def acompress_stream(encoding, chunks):
+    stream = compressor(encoding)
+    pending, size = [], 0
+    async for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_BUFFER_BYTES:
+            yield stream.process(b''.join(pending))
+            pending, size = [], 0
+    yield stream.finish(b''.join(pending))
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').partition(';')[0].strip().lower()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(encoding, response.streaming_content)
+            else:
+                response.streaming_content = compress_stream(encoding, response.streaming_content)
+            del response['Content-Length']
+        else:
+            if len(response.content) < getattr(settings, 'COMPRESS_MIN_BYTES', 1024):
+                return response
+            compressed = compress(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
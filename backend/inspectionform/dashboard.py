@@ -0,0 +1,161 @@
+"""
+Dashboard figures for /api/dashboard/, read only from the daily rollup
+tables (rollups.py) — never from the report tables — so the cost depends on
+the date range asked for, not on how much history is stored.
+
+    first_pass_yield   OK rows / judged (OK + NG) schedule rows
+    report_pass_rate   share of reports without a single NG row
+    pdi_pass_rate      share of PDI reports without a single NG item
+
+Rates are None where nothing was inspected.  Report counts come from
+DailyReportRollup, which counts every report once.  When the query filters
+or groups by machine they come from the per-machine quality rows instead, so
+a report that ran on two machines counts once for each.  PDI reports
+carry no machine, so PDI figures are None in that case.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import DailyPDIRollup, DailyQualityRollup, DailyReportRollup
+
+
+FILTERS = ['customer_name', 'part_name', 'operation_name', 'machine_no']
+GROUPS = {
+    'customer': 'customer_name',
+    'part': 'part_name',
+    'operation': 'operation_name',
+    'machine': 'machine_no',
+}
+QUALITY_SUMS = ('rows', 'ok_rows', 'ng_rows')
+REPORT_SUMS = ('reports', 'ng_reports')
+PDI_SUMS = ('reports', 'ng_reports', 'items', 'ng_items')
+DEFAULT_DAYS = 30
+
+
+class DashboardError(ValueError):
+    pass
+
+
+def max_days():
+    return getattr(settings, 'DASHBOARD_MAX_DAYS', 366)
+
+
+def date_range(params):
+    """(date_from, date_to) from the query, default the last DEFAULT_DAYS days"""
+    bounds = {}
+    for name in ('date_from', 'date_to'):
+        value = params.get(name)
+        if value:
+            try:
+                bounds[name] = parse_date(value)
+            except ValueError:
+                # Well formed but not a real date, e.g. 2026-02-30
+                raise DashboardError(f'{name} is not a valid date.')
+            if bounds[name] is None:
+                raise DashboardError(f'{name} must be YYYY-MM-DD.')
+    date_to = bounds.get('date_to') or timezone.localdate()
+    date_from = bounds.get('date_from') or date_to - timedelta(days=DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        raise DashboardError('date_from is after date_to.')
+    if (date_to - date_from).days + 1 > max_days():
+        raise DashboardError(f'At most {max_days()} days per request.')
+    return date_from, date_to
+
+
+def ratio(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def figures(quality, reports, pdi):
+    """One response row from summed quality, report and PDI counters (pdi None: not applicable)"""
+    quality = {**{field: reports.get(field) or 0 for field in REPORT_SUMS},
+               **{field: quality.get(field) or 0 for field in QUALITY_SUMS}}
+    row = dict(quality)
+    row['first_pass_yield'] = ratio(quality['ok_rows'], quality['ok_rows'] + quality['ng_rows'])
+    row['report_pass_rate'] = ratio(quality['reports'] - quality['ng_reports'], quality['reports'])
+    if pdi is None:
+        row.update({f'pdi_{field}': None for field in PDI_SUMS}, pdi_pass_rate=None)
+        return row
+    pdi = {field: pdi.get(field) or 0 for field in PDI_SUMS}
+    row.update({f'pdi_{field}': value for field, value in pdi.items()})
+    row['pdi_pass_rate'] = ratio(pdi['reports'] - pdi['ng_reports'], pdi['reports'])
+    return row
+
+
+def querysets(params, date_from, date_to, by_machine=False):
+    """
+    Filtered (quality, reports, pdi) rollup querysets.  By machine (filtered
+    or grouped) the report counts are the quality rows' own and pdi is None.
+    """
+    quality = DailyQualityRollup.objects.filter(day__range=(date_from, date_to))
+    reports = DailyReportRollup.objects.filter(day__range=(date_from, date_to))
+    pdi = DailyPDIRollup.objects.filter(day__range=(date_from, date_to))
+    for field in FILTERS:
+        value = params.get(field)
+        if value:
+            quality = quality.filter(**{field: value})
+            if field != 'machine_no':
+                reports = reports.filter(**{field: value})
+                pdi = pdi.filter(**{field: value})
+    if by_machine or params.get('machine_no'):
+        return quality, quality, None
+    return quality, reports, pdi
+
+
+def summed(queryset, group, fields):
+    """{group value: {field: sum}} — one GROUP BY over the rollup rows"""
+    if queryset is None:
+        return None
+    rows = queryset.values(group).annotate(**{field: Sum(field) for field in fields}).order_by()
+    return {row.pop(group): row for row in rows}
+
+
+def totals(quality, reports, pdi):
+    return figures(
+        quality.aggregate(**{field: Sum(field) for field in QUALITY_SUMS}),
+        reports.aggregate(**{field: Sum(field) for field in REPORT_SUMS}),
+        None if pdi is None else pdi.aggregate(**{field: Sum(field) for field in PDI_SUMS}),
+    )
+
+
+def daily(params):
+    """Per-day series over the range, days without reports included as zeros"""
+    date_from, date_to = date_range(params)
+    quality, reports, pdi = querysets(params, date_from, date_to)
+    by_day = summed(quality, 'day', QUALITY_SUMS)
+    reports_by_day = summed(reports, 'day', REPORT_SUMS)
+    pdi_by_day = summed(pdi, 'day', PDI_SUMS)
+
+    days = []
+    for offset in range((date_to - date_from).days + 1):
+        day = date_from + timedelta(days=offset)
+        row = figures(by_day.get(day, {}), reports_by_day.get(day, {}),
+                      None if pdi_by_day is None else pdi_by_day.get(day, {}))
+        days.append({'day': day, **row})
+    return {'date_from': date_from, 'date_to': date_to, 'totals': totals(quality, reports, pdi), 'days': days}
+
+
+def breakdown(params):
+    """Figures per customer, part, operation or machine (?by=), most NG rows first"""
+    by = params.get('by') or 'part'
+    if by not in GROUPS:
+        raise DashboardError(f'by must be one of {", ".join(GROUPS)}.')
+    group = GROUPS[by]
+    date_from, date_to = date_range(params)
+    quality, reports, pdi = querysets(params, date_from, date_to, by_machine=by == 'machine')
+    by_group = summed(quality, group, QUALITY_SUMS)
+    reports_by_group = summed(reports, group, REPORT_SUMS)
+    pdi_by_group = summed(pdi, group, PDI_SUMS)
+
+    names = set(by_group) | set(pdi_by_group or ())
+    groups = [
+        {by: name, **figures(by_group.get(name, {}), reports_by_group.get(name, {}),
+                             None if pdi_by_group is None else pdi_by_group.get(name, {}))}
+        for name in names
+    ]
+    groups.sort(key=lambda row: (-row['ng_rows'], -(row['pdi_ng_reports'] or 0), row[by]))
+    return {'date_from': date_from, 'date_to': date_to, 'by': by, 'totals': totals(quality, reports, pdi), 'groups': groups}
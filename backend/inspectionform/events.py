@@ -0,0 +1,162 @@
+"""
+Live schedule-entry events for Server-Sent Events subscribers.
+
+Writers call ``publish_entries`` inside their transaction; the events go out
+on commit, so a rolled-back save never reaches a supervisor's screen.  The
+broker is chosen by settings.EVENT_BROKER (a dotted path), so the
+in-process one below can be swapped for a shared broker when the API runs
+as several processes — anything with the same publish / subscribe /
+unsubscribe methods will do.
+
+Subscribers are asyncio queues awaited by the SSE views in their own event
+loop; an idle subscriber is a parked coroutine and costs no CPU.
+"""
+import asyncio
+import itertools
+import json
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+QUEUE_SIZE = 100
+RETRY_MS = 3000
+
+
+class Subscription:
+    def __init__(self, topic, loop):
+        self.topic = topic
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, event):
+        # Runs on the subscriber's loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class InProcessBroker:
+    """Fan-out to the subscribers of this process; publish() is safe from any thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics = {}
+        self._ids = itertools.count(1)
+
+    def subscribe(self, topic):
+        subscription = Subscription(topic, asyncio.get_running_loop())
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[subscription.topic]
+
+    def publish(self, topic, event):
+        event = dict(event, event_id=next(self._ids))
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Loop already closed — the stream is gone
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+    def subscriber_count(self, topic=None):
+        with self._lock:
+            if topic is not None:
+                return len(self._topics.get(topic, ()))
+            return sum(len(subscribers) for subscribers in self._topics.values())
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'EVENT_BROKER', 'inspectionform.events.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def report_topic(report_id):
+    return f'report:{report_id}'
+
+
+def entry_event(entry, action):
+    """Compact payload: enough to patch one row of the on-screen schedule"""
+    return {
+        'type': action,
+        'report': entry.report_id,
+        'id': entry.pk,
+        'slot_index': entry.slot_index,
+        'row_order': entry.row_order,
+        'time_type': entry.time_type,
+        'values': list(entry.values or []),
+        'judgment': entry.judgment,
+        'filled_at': entry.filled_at.isoformat() if entry.filled_at else None,
+    }
+
+
+def publish_entries(entries, action):
+    """Queue one event per ScheduleEntry, sent once the surrounding transaction commits"""
+    events = [entry_event(entry, action) for entry in entries]
+    if not events:
+        return
+
+    def send():
+        broker = get_broker()
+        for event in events:
+            broker.publish(report_topic(event['report']), event)
+
+    transaction.on_commit(send)
+
+
+def format_event(event):
+    return f"id: {event['event_id']}\nevent: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def event_stream(topic):
+    """
+    SSE body for one topic: a retry hint, then events as they arrive and a
+    comment line every SSE_HEARTBEAT_SECONDS so proxies keep the socket open.
+    A subscriber that falls QUEUE_SIZE events behind gets a "resync" event
+    and the stream ends; the browser reconnects and reloads the report.
+    """
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT_SECONDS', 15)
+    broker = get_broker()
+    subscription = broker.subscribe(topic)
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        while True:
+            try:
+                event = await subscription.get(heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(event)
+            if subscription.overflowed:
+                yield 'event: resync\ndata: {}\n\n'
+                return
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,234 @@
+"""
+Flat CSV / XLSX export of reports for audits.
+
+Rows are read with ``values_list(...).iterator(chunk_size=...)`` — a
+server-side cursor on PostgreSQL — and written out one at a time, so memory
+stays flat however many months are exported.  CSV is streamed: the first
+chunk is on the wire while the database is still producing the rest.
+
+Under ASGI Django would read a sync streaming iterator into memory before
+sending any of it, so there ``asynchronous=True`` hands the server an async
+iterator that pulls STREAM_CHUNK_BYTES at a time from the sync one on
+Django's sync thread, where the database cursor lives.
+"""
+import csv
+import tempfile
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.db.models import Func, IntegerField, Max
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import InspectionItem, ScheduleEntry, PDIItem, LEGACY_VALUE_COLUMNS
+
+
+CHUNK_SIZE = 2000
+STREAM_CHUNK_BYTES = 64 * 1024
+ROW_TYPES = ('schedule', 'items')
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+REPORT_COLUMNS = [
+    ('report__id', 'Report ID'),
+    ('report__doc_no', 'Doc No'),
+    ('report__date', 'Report Date'),
+    ('report__customer_name', 'Customer'),
+    ('report__part_name', 'Part Name'),
+    ('report__part_number', 'Part No'),
+    ('report__operation_name', 'Operation'),
+]
+
+SCHEDULE_COLUMNS = REPORT_COLUMNS + [
+    ('sr', 'SR'),
+    ('slot_index', 'Slot'),
+    ('time_type', 'Time'),
+    ('row_order', 'Row'),
+    ('date', 'Date'),
+    ('operator', 'Operator'),
+    ('machine_no', 'Machine No'),
+    ('judgment', 'Judgment'),
+    ('signature', 'Signature'),
+    ('filled_at', 'Filled At'),
+    ('values', None),
+]
+
+ITEM_COLUMNS = REPORT_COLUMNS + [
+    ('sr_no', 'Sr No'),
+    ('item', 'Item'),
+    ('special_char', 'Special Char'),
+    ('spec', 'Spec'),
+    ('tolerance', 'Tolerance'),
+    ('inst', 'Instrument'),
+]
+
+PDI_COLUMNS = [
+    ('report__id', 'Report ID'),
+    ('report__inspection_date', 'Inspection Date'),
+    ('report__customer_name', 'Customer'),
+    ('report__supplier_name', 'Supplier'),
+    ('report__part_name', 'Part Name'),
+    ('report__part_no', 'Part No'),
+    ('report__operation_name', 'Operation'),
+    ('report__invoice_no', 'Invoice No'),
+    ('report__lot_qty', 'Lot Qty'),
+    ('sr_no', 'Sr No'),
+    ('item', 'Item'),
+    ('spec', 'Spec'),
+    ('tolerance', 'Tolerance'),
+    ('method', 'Method'),
+    ('vendor_obs1', 'Vendor Obs 1'),
+    ('vendor_obs2', 'Vendor Obs 2'),
+    ('vendor_judge', 'Vendor Judgment'),
+    ('cust_obs1', 'Customer Obs 1'),
+    ('cust_obs2', 'Customer Obs 2'),
+    ('cust_judge', 'Customer Judgment'),
+    ('remarks', 'Remarks'),
+    ('report__inspected_by', 'Inspected By'),
+    ('report__verified_by', 'Verified By'),
+    ('report__approved_by', 'Approved By'),
+]
+
+
+class JSONArrayLength(Func):
+    function = 'JSON_ARRAY_LENGTH'
+    output_field = IntegerField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function='JSONB_ARRAY_LENGTH', **extra_context)
+
+
+def value_width(queryset):
+    """Value N columns needed for the longest values array — never fewer than the legacy 20"""
+    longest = queryset.aggregate(longest=Max(JSONArrayLength('values')))['longest']
+    return max(LEGACY_VALUE_COLUMNS, longest or 0)
+
+
+def header(columns, width=LEGACY_VALUE_COLUMNS):
+    labels = []
+    for field, label in columns:
+        if field == 'values':
+            labels.extend(f'Value {n}' for n in range(1, width + 1))
+        else:
+            labels.append(label)
+    return labels
+
+
+def rows(queryset, columns):
+    """Header, then one flat list per row; the values array is spread over Value N columns"""
+    fields = [field for field, _ in columns]
+    spread = 'values' in fields
+    yield header(columns, value_width(queryset) if spread else LEGACY_VALUE_COLUMNS)
+    for row in queryset.values_list(*fields).iterator(chunk_size=CHUNK_SIZE):
+        row = ['' if value is None else value for value in row]
+        if spread:
+            values = row.pop()
+            row.extend(values or [])
+        yield row
+
+
+def schedule_rows(reports):
+    entries = ScheduleEntry.objects.filter(report__in=reports.values('id')).order_by(
+        '-report__date', '-report_id', 'sr', 'slot_index', 'row_order', 'id'
+    )
+    return rows(entries, SCHEDULE_COLUMNS)
+
+
+def item_rows(reports):
+    items = InspectionItem.objects.filter(report__in=reports.values('id')).order_by(
+        '-report__date', '-report_id', 'sr_no'
+    )
+    return rows(items, ITEM_COLUMNS)
+
+
+def pdi_rows(reports):
+    items = PDIItem.objects.filter(report__in=reports.values('id')).order_by(
+        '-report__inspection_date', '-report_id', 'sr_no'
+    )
+    return rows(items, PDI_COLUMNS)
+
+
+class ExportUnavailable(Exception):
+    """The file type is known but the library that writes it is not installed"""
+
+
+def pull(iterator, limit=STREAM_CHUNK_BYTES):
+    """The next ``limit`` bytes or so of a byte-string iterator; b'' once it is exhausted"""
+    parts, size = [], 0
+    for part in iterator:
+        parts.append(part)
+        size += len(part)
+        if size >= limit:
+            break
+    return b''.join(parts)
+
+
+async def async_chunks(iterator):
+    next_chunk = sync_to_async(pull)
+    while chunk := await next_chunk(iterator):
+        yield chunk
+
+
+def make_async(response):
+    response.streaming_content = async_chunks(iter(response.streaming_content))
+    return response
+
+
+class Echo:
+    """File-like object whose write() hands the line back instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+def csv_response(row_iter, filename):
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in row_iter),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_response(row_iter, filename):
+    """
+    XLSX is a zip archive and cannot be sent before it is complete, so it is
+    built with openpyxl's write-only mode (rows go straight to a temp file)
+    and then streamed from disk.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ExportUnavailable('XLSX export needs the openpyxl package (pip install openpyxl); use type=csv.')
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(filename[:31])
+    for row in row_iter:
+        # Excel has no time zones: write aware datetimes as local wall-clock time
+        sheet.append([
+            timezone.localtime(value).replace(tzinfo=None)
+            if isinstance(value, datetime) and timezone.is_aware(value) else value
+            for value in row
+        ])
+
+    spool = tempfile.TemporaryFile()
+    workbook.save(spool)
+    spool.seek(0)
+    return FileResponse(spool, as_attachment=True, filename=f'{filename}.xlsx', content_type=XLSX_CONTENT_TYPE)
+
+
+EXPORTERS = {'csv': csv_response, 'xlsx': xlsx_response}
+
+
+def export_response(row_iter, filename, file_type='csv', asynchronous=False):
+    """
+    CSV/XLSX response for ``row_iter``; None when the type is unknown.
+    Raises ExportUnavailable when the type's writer is not installed.
+    ``asynchronous=True`` (the request came in through ASGI) streams it
+    through an async iterator.
+    """
+    exporter = EXPORTERS.get(file_type or 'csv')
+    if exporter is None:
+        return None
+    response = exporter(row_iter, filename)
+    return make_async(response) if asynchronous else response
@@ -0,0 +1,342 @@
+"""
+Bulk import of historical setup / patrol inspection reports.
+
+Two input formats, both one report per record:
+
+* JSONL — one JSON object per line, shaped like a POST /api/reports/ body
+  (header fields + ``items`` + ``schedule_entries``).
+* CSV   — the layout written by /api/reports/export/ (either the schedule or
+  the ``?rows=items`` file, or both merged).  Consecutive rows with the same
+  "Report ID" form one report; a row with an Item becomes an inspection
+  item, a row with a Time becomes a schedule entry.
+
+Records are validated against the model fields a chunk at a time and
+written with bulk_create, one transaction per chunk.  The ImportJob row is
+updated in the same transaction, so after a crash the next run of the same
+file (matched by checksum) skips exactly the records already committed.
+
+The job row is locked (SELECT ... FOR UPDATE) when an import starts and
+again with each chunk, so two uploads of the same file never import the
+same records: the second is refused with ImportInProgress while the first
+is running.  A RUNNING job untouched for STALE_AFTER seconds was abandoned
+(the process was killed) and is taken over.
+"""
+import csv
+import hashlib
+import io
+import json
+from datetime import datetime, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from . import rollups
+from .export import SCHEDULE_COLUMNS, ITEM_COLUMNS
+from .models import (
+    ImportJob, InspectionReport, InspectionItem, ScheduleEntry,
+    LEGACY_VALUE_COLUMNS, compact_values,
+)
+from .specs import judge_entries
+
+
+BATCH_SIZE = 500          # reports per transaction
+MAX_VALUE_LENGTH = 50     # same limit as ScheduleValuesSerializer
+STALE_AFTER = 300         # seconds without a committed chunk before a RUNNING job counts as abandoned
+
+
+class ImportFileError(ValueError):
+    """The upload cannot be read at all (not UTF-8 text)"""
+
+
+class ImportInProgress(Exception):
+    """Another upload of the same file is importing it right now"""
+
+
+def writable_fields(model, exclude=()):
+    return {
+        field.name: field for field in model._meta.concrete_fields
+        if not field.primary_key and not field.is_relation and field.name not in exclude
+    }
+
+
+REPORT_FIELDS = writable_fields(InspectionReport, exclude=('updated_at',))
+ITEM_FIELDS = writable_fields(InspectionItem)
+ENTRY_FIELDS = writable_fields(ScheduleEntry, exclude=('values',))
+
+
+# ══════════════════════════════════════════
+#  READERS
+# ══════════════════════════════════════════
+
+def checksum(stream):
+    """sha256 of a binary stream, rewound afterwards"""
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(1 << 20), b''):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def read_jsonl(stream):
+    """(line_no, record, error) for each non-blank line"""
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f'invalid JSON: {e}'
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, 'expected a JSON object'
+            continue
+        yield line_no, record, None
+
+
+def csv_labels():
+    """Column heading → (section, field); plain field names are accepted too"""
+    labels = {}
+    for columns in (SCHEDULE_COLUMNS, ITEM_COLUMNS):
+        in_items = columns is ITEM_COLUMNS
+        for field, label in columns:
+            if field == 'values' or field == 'report__id':
+                continue
+            if field.startswith('report__'):
+                target = ('report', field[len('report__'):])
+            else:
+                target = ('item' if in_items else 'entry', field)
+            labels[label] = target
+    for name in REPORT_FIELDS:
+        labels.setdefault(name, ('report', name))
+    for name in ITEM_FIELDS:
+        labels.setdefault(name, ('item', name))
+    for name in ENTRY_FIELDS:
+        labels.setdefault(name, ('entry', name))
+    return labels
+
+
+def read_csv(stream):
+    """(line_no of the report's first row, record, error) per Report ID group"""
+    reader = csv.reader(stream)
+    try:
+        header = next(reader)
+    except StopIteration:
+        return
+    labels = csv_labels()
+    key_column = header.index('Report ID') if 'Report ID' in header else None
+    value_columns = [
+        (i, int(name.split()[-1]) - 1) for i, name in enumerate(header)
+        if name.startswith('Value ') and name.split()[-1].isdigit()
+    ]
+    columns = [(i, labels[name]) for i, name in enumerate(header) if name in labels]
+
+    record, key, first_line = None, None, None
+    for row in reader:
+        line_no = reader.line_num
+        row_key = row[key_column] if key_column is not None and key_column < len(row) else None
+        if record is None or row_key != key or key_column is None:
+            if record is not None:
+                yield first_line, record, None
+            record = {'items': [], 'schedule_entries': []}
+            key, first_line = row_key, line_no
+
+        sections = {'report': {}, 'item': {}, 'entry': {}}
+        for i, (section, field) in columns:
+            if i < len(row):
+                sections[section][field] = row[i]
+        for field, value in sections['report'].items():
+            record.setdefault(field, value)
+        if sections['item'].get('item'):
+            record['items'].append(sections['item'])
+        if sections['entry'].get('time_type'):
+            values = [''] * (max((column for _, column in value_columns), default=-1) + 1)
+            for i, column in value_columns:
+                if i < len(row):
+                    values[column] = row[i]
+            sections['entry']['values'] = values
+            record['schedule_entries'].append(sections['entry'])
+    if record is not None:
+        yield first_line, record, None
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+# ══════════════════════════════════════════
+#  VALIDATION
+# ══════════════════════════════════════════
+
+def clean_fields(fields, data, errors, label):
+    """Model field values from ``data``; unknown keys are ignored like the API serializers do"""
+    cleaned = {}
+    for name, value in data.items():
+        field = fields.get(name)
+        if field is None:
+            continue
+        if value in ('', None) and field.null:
+            cleaned[name] = None
+            continue
+        if value is None:
+            continue
+        try:
+            value = field.clean(value, None)
+        except ValidationError as e:
+            errors.append(f'{label}{name}: {" ".join(e.messages)}')
+            continue
+        if isinstance(value, datetime) and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        cleaned[name] = value
+    for name, field in fields.items():
+        if name not in cleaned and not field.has_default() and not field.blank and not field.null:
+            errors.append(f'{label}{name}: This field is required.')
+    return cleaned
+
+
+def clean_values(data, errors, label):
+    values = data.get('values')
+    if values is None:
+        values = [data.get(f'value_{n}', '') for n in range(1, LEGACY_VALUE_COLUMNS + 1)]
+    if not isinstance(values, list):
+        errors.append(f'{label}values: Expected a list of readings.')
+        return []
+    values = compact_values(values)
+    if any(len(value) > MAX_VALUE_LENGTH for value in values):
+        errors.append(f'{label}values: Readings may be at most {MAX_VALUE_LENGTH} characters.')
+    return values
+
+
+def build_report(record):
+    """(report, items, entries) as unsaved model objects, or raise ValueError with every problem found"""
+    errors = []
+    if not record.get('date'):
+        errors.append('date: This field is required.')
+    report = InspectionReport(**clean_fields(REPORT_FIELDS, record, errors, ''))
+
+    items, seen = [], set()
+    for n, item_data in enumerate(record.get('items') or []):
+        item = InspectionItem(**clean_fields(ITEM_FIELDS, item_data, errors, f'items[{n}].'))
+        if item.sr_no in seen:
+            errors.append(f'items[{n}].sr_no: duplicate sr_no {item.sr_no}.')
+        seen.add(item.sr_no)
+        items.append(item)
+
+    entries = []
+    for n, entry_data in enumerate(record.get('schedule_entries') or []):
+        label = f'schedule_entries[{n}].'
+        entry = ScheduleEntry(**clean_fields(ENTRY_FIELDS, entry_data, errors, label))
+        entry.values = clean_values(entry_data, errors, label)
+        entries.append(entry)
+
+    if errors:
+        raise ValueError(errors)
+    return report, items, entries
+
+
+# ══════════════════════════════════════════
+#  WRITER
+# ══════════════════════════════════════════
+
+def start_job(source, file_type, digest):
+    """
+    The job for this file — an unfinished one is picked up where it stopped.
+    Raises ImportInProgress while another upload of the file is running it.
+    """
+    job, created = ImportJob.objects.get_or_create(
+        checksum=digest, defaults={'source': source[:255], 'file_type': file_type},
+    )
+    if created or job.status == 'DONE':
+        return job
+    with transaction.atomic():
+        job = ImportJob.objects.select_for_update().get(pk=job.pk)
+        if job.status == 'RUNNING' and job.updated_at > timezone.now() - timedelta(seconds=STALE_AFTER):
+            raise ImportInProgress(f'{job.source} is already being imported (import {job.id}).')
+        if job.status != 'DONE':
+            job.status = 'RUNNING'
+            job.save(update_fields=['status', 'updated_at'])
+    return job
+
+
+def write_chunk(job, chunk, records_done, errors):
+    reports = [report for report, _, _ in chunk]
+    items, entries = [], []
+    with transaction.atomic():
+        locked = ImportJob.objects.select_for_update().only('records_done').get(pk=job.pk)
+        if locked.records_done != job.records_done:
+            raise ImportInProgress(f'{job.source} was taken over by another import (import {job.id}).')
+        InspectionReport.objects.bulk_create(reports)
+        for report, report_items, report_entries in chunk:
+            for item in report_items:
+                item.report = report
+            for entry in report_entries:
+                entry.report = report
+            judge_entries(report_entries, report_items)
+            items.extend(report_items)
+            entries.extend(report_entries)
+        InspectionItem.objects.bulk_create(items)
+        ScheduleEntry.objects.bulk_create(entries)
+        rollups.mark(quality={rollups.quality_key(report) for report in reports})
+
+        job.records_done = records_done
+        job.reports_created += len(reports)
+        job.items_created += len(items)
+        job.entries_created += len(entries)
+        job.error_count += len(errors)
+        room = ImportJob.MAX_STORED_ERRORS - len(job.errors)
+        job.errors = job.errors + errors[:max(room, 0)]
+        job.save()
+
+
+def import_reports(stream, job, batch_size=BATCH_SIZE, progress=None):
+    """
+    Import every record of ``stream`` (text) not yet committed by ``job``.
+    ``progress(job)`` is called after each committed chunk.
+    """
+    if job.status == 'DONE':
+        return job
+
+    position, chunk, errors = 0, [], []
+    try:
+        for record_no, record, error in READERS[job.file_type](stream):
+            position += 1
+            if position <= job.records_done:
+                continue
+            if error is None:
+                try:
+                    chunk.append(build_report(record))
+                except ValueError as e:
+                    error = e.args[0]
+            if error is not None:
+                errors.append({'record': record_no, 'errors': error if isinstance(error, list) else [error]})
+
+            if position - job.records_done >= batch_size:
+                write_chunk(job, chunk, position, errors)
+                chunk, errors = [], []
+                if progress:
+                    progress(job)
+        if position > job.records_done:
+            write_chunk(job, chunk, position, errors)
+            if progress:
+                progress(job)
+    except ImportInProgress:
+        raise    # the job belongs to the other import now
+    except Exception:
+        job.status = 'FAILED'
+        job.save(update_fields=['status', 'updated_at'])
+        raise
+
+    job.status = 'DONE'
+    job.save(update_fields=['status', 'updated_at'])
+    return job
+
+
+def import_file(binary, source, file_type, **options):
+    """Checksum a binary file object, find or start its job and run the import"""
+    job = start_job(source, file_type, checksum(binary))
+    text = io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+    try:
+        return import_reports(text, job, **options)
+    except UnicodeDecodeError:
+        raise ImportFileError('The file is not UTF-8 text; save it as UTF-8 and upload it again.') from None
+    finally:
+        text.detach()
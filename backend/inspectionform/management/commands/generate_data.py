@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from inspectionform.masterdata import master_data
+from inspectionform.synthetic import SCALES, generate
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with seeded synthetic master data, inspection reports and PDI reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='Preset sizes (default: small)')
+        parser.add_argument('--reports', type=int, help='Inspection reports (overrides --scale)')
+        parser.add_argument('--pdi-reports', type=int, help='PDI reports (overrides --scale)')
+        parser.add_argument('--customers', type=int)
+        parser.add_argument('--parts', type=int, help='Parts per customer')
+        parser.add_argument('--operations', type=int, help='Operations per part')
+        parser.add_argument('--days', type=int, default=365, help='Spread report dates over this many days')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--master-data', action='store_true',
+                            help='Also replace L1/L2/L3 rows on Postgres (always done on SQLite)')
+
+    def handle(self, *args, **options):
+        sizes = dict(SCALES[options['scale']])
+        for key in sizes:
+            if options[key] is not None:
+                sizes[key] = options[key]
+        master = options['master_data'] or connection.vendor != 'postgresql'
+
+        started = time.perf_counter()
+
+        def progress(kind, done, total):
+            if done == total or done % (options['batch_size'] * 10) == 0:
+                self.stdout.write(f'  {kind}: {done}/{total} ({time.perf_counter() - started:.1f}s)')
+
+        counts = generate(days=options['days'], seed=options['seed'], master=master,
+                          batch_size=options['batch_size'], progress=progress, **sizes)
+        master_data.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            'Generated ' + ', '.join(f'{count} {kind}' for kind, count in counts.items())
+            + f' in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,46 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inspectionform.importer import BATCH_SIZE, READERS, ImportFileError, ImportInProgress, import_file
+
+
+class Command(BaseCommand):
+    help = 'Bulk import inspection reports from a JSONL or CSV file; re-run the same file to resume'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--type', choices=sorted(READERS), help='File type (default: from the extension)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Reports per transaction')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_type = options['type'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_type not in READERS:
+            raise CommandError(f'Unknown file type "{file_type}" — use --type jsonl or --type csv')
+
+        started = time.perf_counter()
+
+        def progress(job):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'  {job.records_done} records, {job.reports_created} reports, '
+                f'{job.entries_created} schedule rows, {job.error_count} errors ({elapsed:.1f}s)'
+            )
+
+        try:
+            with open(path, 'rb') as binary:
+                job = import_file(binary, os.path.basename(path), file_type,
+                                  batch_size=options['batch_size'], progress=progress)
+        except (ImportFileError, ImportInProgress) as e:
+            raise CommandError(str(e))
+
+        for error in job.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"  record {error['record']}: {'; '.join(error['errors'])}"))
+        if job.error_count > 20:
+            self.stdout.write(self.style.WARNING(f'  … {job.error_count - 20} more errors (see ImportJob {job.id})'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Import {job.id} {job.status.lower()}: {job.reports_created} reports, {job.items_created} items, '
+            f'{job.entries_created} schedule rows, {job.error_count} rejected records'
+        ))
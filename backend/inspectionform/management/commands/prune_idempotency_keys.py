@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from inspectionform.batch import prune_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete batch-save idempotency keys older than IDEMPOTENCY_KEY_DAYS'
+
+    def handle(self, *args, **options):
+        deleted = prune_idempotency_keys()
+        days = getattr(settings, 'IDEMPOTENCY_KEY_DAYS', 30)
+        self.stdout.write(self.style.SUCCESS(f'{deleted} idempotency keys older than {days} days removed'))
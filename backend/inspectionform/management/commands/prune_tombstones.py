@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inspectionform.sync import prune_tombstones, retention
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than SYNC_TOMBSTONE_DAYS'
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} tombstones older than {retention().days} days removed'))
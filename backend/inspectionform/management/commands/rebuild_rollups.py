@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from inspectionform.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily dashboard rollups from the report tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help='First day to rebuild, YYYY-MM-DD (default: oldest report)')
+        parser.add_argument('--date-to', help='Last day to rebuild, YYYY-MM-DD (default: newest report)')
+
+    def handle(self, *args, **options):
+        bounds = {}
+        for name in ('date_from', 'date_to'):
+            value = options[name]
+            if value:
+                try:
+                    bounds[name] = parse_date(value)
+                except ValueError:
+                    raise CommandError(f'--{name.replace("_", "-")} is not a valid date')
+                if bounds[name] is None:
+                    raise CommandError(f'--{name.replace("_", "-")} must be YYYY-MM-DD')
+
+        def progress(day, quality, pdi):
+            self.stdout.write(f'  up to {day}: {quality} quality rows, {pdi} PDI rows')
+
+        started = time.perf_counter()
+        quality, pdi = rebuild(progress=progress, **bounds)
+        self.stdout.write(self.style.SUCCESS(
+            f'{quality} quality and {pdi} PDI rollup rows rebuilt in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from inspectionform.masterdata import master_data
+
+
+class Command(BaseCommand):
+    help = 'Drop cached L1/L2/L3 master data so the next request reloads it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--warm', action='store_true', help='Reload the dropdown lists, suggest index and tree right away')
+
+    def handle(self, *args, **options):
+        master_data.invalidate()
+        if options['warm']:
+            master_data.suggest_index()
+            master_data.hierarchy()
+        self.stdout.write(self.style.SUCCESS(f'Master data cache cleared (version {master_data.version})'))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inspectionform.models import InspectionReport
+from inspectionform.rollups import mark_reports
+from inspectionform.specs import rejudge_reports
+
+
+class Command(BaseCommand):
+    help = 'Recompute OK/NG judgments of schedule rows from item specs and tolerances'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports-per-batch', type=int, default=500)
+        parser.add_argument('--date-from', help='Only reports dated on/after YYYY-MM-DD')
+        parser.add_argument('--date-to', help='Only reports dated on/before YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        reports = InspectionReport.objects.order_by('id')
+        if options['date_from']:
+            reports = reports.filter(date__gte=options['date_from'])
+        if options['date_to']:
+            reports = reports.filter(date__lte=options['date_to'])
+
+        started = time.perf_counter()
+        rows = changed = 0
+        batch = []
+        for report_id in reports.values_list('id', flat=True).iterator(chunk_size=options['reports_per_batch']):
+            batch.append(report_id)
+            if len(batch) >= options['reports_per_batch']:
+                seen, updated = rejudge_reports(batch)
+                rows, changed = rows + seen, changed + updated
+                if updated:
+                    mark_reports(batch)
+                batch = []
+                self.stdout.write(f'  {rows} rows checked, {changed} changed')
+        if batch:
+            seen, updated = rejudge_reports(batch)
+            rows, changed = rows + seen, changed + updated
+            if updated:
+                mark_reports(batch)
+
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{rows} schedule rows re-judged, {changed} changed in {elapsed:.1f}s ({rate:,.0f} rows/s)'
+        ))
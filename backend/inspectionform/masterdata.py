@@ -0,0 +1,430 @@
+"""
+Read-through cache for the L1/L2/L3 master tables.
+
+The master tables are maintained outside this app and change a few times a
+year, yet every page load used to run four DISTINCT scans over them.  Entries
+live in process memory for MASTER_DATA_CACHE_TTL seconds (default 300), at
+most MASTER_DATA_CACHE_MAX_ENTRIES of them (default 256): one per operation
+asked for, so expired ones are dropped and the least recently used go first.  If
+MASTER_DATA_CACHE_ALIAS names a Django cache, a shared version number is kept
+there so ``invalidate()`` in one worker reaches all the others, and loaded
+values are shared between workers too.
+
+SuggestIndex serves /api/dropdown-options/suggest/: sorted prefix arrays
+built from the cached dropdown lists, replaced whole whenever those lists
+change, so a lookup is a binary search and never sees a half-built index.
+
+The customer → part → part number → operation tree (/api/dropdown-options/
+tree/) is cached the same way, so its fingerprint doubles as the tree
+version clients compare.
+
+After editing master data run ``python manage.py refresh_master_data``.
+"""
+import bisect
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+
+L1_TABLE = 'L1_part_info_master'
+L2_TABLE = 'L2_process_report_master'
+L3_TABLE = 'L3_parameter_detail_master'
+
+VERSION_KEY = 'masterdata:version'
+
+logger = logging.getLogger(__name__)
+
+
+def table(name):
+    # The live tables sit in Postgres' public schema; SQLite has no schemas
+    if connection.vendor == 'postgresql':
+        return f'public."{name}"'
+    return f'"{name}"'
+
+
+def load_dropdown_options():
+    queries = {
+        'customers':    (L1_TABLE, 'customer_name'),
+        'part_names':   (L1_TABLE, 'part_name'),
+        'part_numbers': (L1_TABLE, 'part_no'),
+        'operations':   (L2_TABLE, 'report_name'),
+    }
+    options = {}
+    with connection.cursor() as cursor:
+        for key, (name, column) in queries.items():
+            cursor.execute(
+                f"SELECT DISTINCT {column} FROM {table(name)} "
+                f"WHERE {column} IS NOT NULL AND {column} != '' ORDER BY {column}"
+            )
+            options[key] = [row[0] for row in cursor.fetchall()]
+    return options
+
+
+def part_link_column():
+    """
+    The L2 column holding the L1 row id of each operation's part, or None if
+    the live L2 table has no such column.  The baseline never joined L1 to L2,
+    so the column is a setting checked against the table, not an assumption.
+    """
+    column = getattr(settings, 'MASTER_DATA_L2_PART_COLUMN', 'part_id')
+    with connection.cursor() as cursor:
+        names = {info.name.lower() for info in connection.introspection.get_table_description(cursor, L2_TABLE)}
+    if not column or column.lower() not in names:
+        logger.warning('%s has no column %r linking it to %s: the tree will not narrow operations',
+                       L2_TABLE, column, L1_TABLE)
+        return None
+    return column
+
+
+def load_hierarchy():
+    """
+    customer → part name → part number → operations.  Each distinct set of
+    operations is stored once in ``operation_sets`` (indexes into one sorted
+    ``operations`` list) and a leaf is the index of its set:
+
+        {"operations": ["GRINDING", "TURNING"], "operation_sets": [[0, 1]],
+         "customers": {"ACME": {"SHAFT": {"SH-01": 0}}}}
+
+    Without a known L2 → L1 link every leaf is the empty set, and clients
+    offer the whole operation list.
+    """
+    column = part_link_column()
+    operation = 'l2.report_name' if column else 'NULL'
+    join = f'LEFT JOIN {table(L2_TABLE)} l2 ON l2."{column}" = l1.id' if column else ''
+    with connection.cursor() as cursor:
+        cursor.execute(f'''
+            SELECT l1.customer_name, l1.part_name, l1.part_no, {operation}
+            FROM {table(L1_TABLE)} l1
+            {join}
+            WHERE l1.customer_name IS NOT NULL AND l1.customer_name != ''
+              AND l1.part_name IS NOT NULL AND l1.part_name != ''
+            ORDER BY l1.customer_name, l1.part_name, l1.part_no
+        ''')
+        rows = cursor.fetchall()
+
+    operations = sorted({operation for *_, operation in rows if operation})
+    position = {operation: index for index, operation in enumerate(operations)}
+    leaves = {}
+    for customer, part_name, part_no, operation in rows:
+        leaf = leaves.setdefault((customer, part_name, part_no or ''), set())
+        if operation:
+            leaf.add(position[operation])
+
+    sets, customers = {}, {}
+    for (customer, part_name, part_no), leaf in leaves.items():
+        key = tuple(sorted(leaf))
+        customers.setdefault(customer, {}).setdefault(part_name, {})[part_no] = sets.setdefault(key, len(sets))
+    return {'operations': operations, 'operation_sets': [list(key) for key in sets], 'customers': customers}
+
+
+def hierarchy_node(tree, customer, part_name=None, part_number=None):
+    """
+    The subtree under one customer / part / part number with operation names
+    spelled out, or None if there is no such node.
+    """
+    node = tree['customers'].get(customer)
+    for key in (part_name, part_number):
+        if node is None or key is None:
+            break
+        node = node.get(key)
+    if node is None:
+        return None
+
+    operations, sets = tree['operations'], tree['operation_sets']
+
+    def spell(subtree):
+        if isinstance(subtree, int):
+            return [operations[index] for index in sets[subtree]]
+        return {name: spell(child) for name, child in subtree.items()}
+
+    return spell(node)
+
+
+def load_operation_parameters(operation):
+    with connection.cursor() as cursor:
+        cursor.execute(f'''
+            SELECT l3.category, l3.parameter_name, l3.specification, l3.instrument
+            FROM {table(L3_TABLE)} l3
+            JOIN {table(L2_TABLE)} l2 ON l3.process_report_id = l2.id
+            WHERE l2.report_name = %s
+            ORDER BY l3.category, l3.id
+        ''', [operation])
+        rows = cursor.fetchall()
+
+    product_items = []
+    process_items = []
+
+    for category, parameter_name, specification, instrument in rows:
+        item = {
+            'name': parameter_name or '',
+            'spec': specification or '',
+            'instrument': instrument or '',
+        }
+        if category == 'PRODUCT':
+            product_items.append(item)
+        elif category == 'PROCESS':
+            process_items.append(item)
+
+    return {'product': product_items, 'process': process_items}
+
+
+# suggest ?field= → key of the dropdown_options list it searches
+SUGGEST_FIELDS = {
+    'customer_name':  'customers',
+    'part_name':      'part_names',
+    'part_number':    'part_numbers',
+    'operation_name': 'operations',
+}
+
+
+class SuggestIndex:
+    """
+    Immutable prefix index over the dropdown lists.  Per field, two sorted
+    arrays of lowercased keys: whole values, and the later words of values
+    ("a1" of "HOUSING A1").  Values starting with the typed text rank first,
+    then values with a later word starting with it, each alphabetically.
+    """
+
+    def __init__(self, options, fingerprint):
+        self.fingerprint = fingerprint
+        self._fields = {}
+        for field, key in SUGGEST_FIELDS.items():
+            values = options.get(key, [])
+            starts = sorted((value.lower(), value) for value in values)
+            words = sorted(
+                (value.lower()[position:], value)
+                for value in values
+                for position in range(1, len(value))
+                if value[position - 1] in ' -/' and value[position] not in ' -/'
+            )
+            self._fields[field] = tuple(
+                ([k for k, _ in pairs], [v for _, v in pairs]) for pairs in (starts, words)
+            )
+
+    def suggest(self, field, prefix, limit=10):
+        prefix = prefix.strip().lower()
+        found = []
+        for keys, values in self._fields[field]:
+            index = bisect.bisect_left(keys, prefix)
+            while index < len(keys) and len(found) < limit and keys[index].startswith(prefix):
+                if values[index] not in found:
+                    found.append(values[index])
+                index += 1
+            if len(found) >= limit:
+                break
+        return found
+
+
+class MasterDataCache:
+    def __init__(self, ttl=None, alias=None, max_entries=None):
+        self._ttl = ttl
+        self._alias = alias
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = 1
+        self._suggest_index = None
+        self._hierarchy_body = None
+        self._node_bodies = (None, {})
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'MASTER_DATA_CACHE_TTL', 300)
+
+    @property
+    def max_entries(self):
+        if self._max_entries is not None:
+            return self._max_entries
+        return getattr(settings, 'MASTER_DATA_CACHE_MAX_ENTRIES', 256)
+
+    @property
+    def shared(self):
+        alias = self._alias or getattr(settings, 'MASTER_DATA_CACHE_ALIAS', None)
+        return caches[alias] if alias else None
+
+    @property
+    def version(self):
+        shared = self.shared
+        if shared is None:
+            return self._version
+        version = shared.get(VERSION_KEY)
+        if version is None:
+            shared.add(VERSION_KEY, 1)
+            version = shared.get(VERSION_KEY, 1)
+        return version
+
+    def get(self, key, loader):
+        return self.get_with_fingerprint(key, loader)[0]
+
+    def get_with_fingerprint(self, key, loader):
+        """
+        (value, fingerprint) — the fingerprint is hashed once when the value is
+        loaded and doubles as the HTTP ETag for master-data endpoints.
+        """
+        version = self.version
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+
+        shared = self.shared
+        shared_key = f'masterdata:{version}:{hashlib.md5(key.encode()).hexdigest()}'
+        loaded = shared.get(shared_key) if shared is not None else None
+        with self._lock:
+            if loaded is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if loaded is None:
+            value = loader()
+            fingerprint = hashlib.md5(json.dumps(value, sort_keys=True).encode()).hexdigest()[:16]
+            loaded = (value, fingerprint)
+            if shared is not None:
+                shared.set(shared_key, loaded, self.ttl)
+
+        max_entries = self.max_entries
+        with self._lock:
+            self._entries[key] = (version, now + self.ttl, loaded)
+            self._entries.move_to_end(key)
+            if len(self._entries) > max_entries:
+                for stale in [k for k, (v, expires, _) in self._entries.items() if v != version or expires <= now]:
+                    del self._entries[stale]
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+        return loaded
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._version += 1
+            self.invalidations += 1
+        shared = self.shared
+        if shared is not None:
+            try:
+                shared.incr(VERSION_KEY)
+            except ValueError:
+                shared.set(VERSION_KEY, 2, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+            }
+
+    # ── master data accessors ──
+
+    def dropdown_options(self, with_fingerprint=False):
+        loaded = self.get_with_fingerprint('dropdown_options', load_dropdown_options)
+        return loaded if with_fingerprint else loaded[0]
+
+    def suggest_index(self):
+        """
+        The SuggestIndex of the current dropdown lists.  A new one is built
+        aside and swapped in by a single assignment when their fingerprint
+        changes; requests already holding the old one finish on it.
+        """
+        options, fingerprint = self.dropdown_options(with_fingerprint=True)
+        index = self._suggest_index
+        if index is None or index.fingerprint != fingerprint:
+            index = self._suggest_index = SuggestIndex(options, fingerprint)
+        return index
+
+    def hierarchy(self, with_fingerprint=False):
+        loaded = self.get_with_fingerprint('hierarchy', load_hierarchy)
+        return loaded if with_fingerprint else loaded[0]
+
+    def hierarchy_body(self):
+        """(JSON bytes of the whole tree plus its version, fingerprint) — encoded once per version"""
+        tree, fingerprint = self.hierarchy(with_fingerprint=True)
+        cached = self._hierarchy_body
+        if cached is None or cached[1] != fingerprint:
+            body = json.dumps({'version': fingerprint, **tree}, separators=(',', ':')).encode()
+            cached = self._hierarchy_body = (body, fingerprint)
+        return cached
+
+    def hierarchy_node_body(self, customer, part_name=None, part_number=None):
+        """
+        (JSON bytes of one node's subtree plus the tree version, fingerprint), or
+        (None, fingerprint) for an unknown node.  Encoded once per node and version.
+        """
+        tree, fingerprint = self.hierarchy(with_fingerprint=True)
+        bodies_fingerprint, bodies = self._node_bodies
+        if bodies_fingerprint != fingerprint:
+            bodies = {}
+            self._node_bodies = (fingerprint, bodies)
+        key = (customer, part_name, part_number)
+        body = bodies.get(key)
+        if body is None:
+            children = hierarchy_node(tree, customer, part_name, part_number)
+            if children is None:
+                return None, fingerprint
+            body = bodies[key] = json.dumps({'version': fingerprint, 'children': children},
+                                            separators=(',', ':')).encode()
+        return body, fingerprint
+
+    def operation_parameters(self, operation, with_fingerprint=False):
+        loaded = self.get_with_fingerprint(
+            f'operation:{operation}', lambda: load_operation_parameters(operation)
+        )
+        return loaded if with_fingerprint else loaded[0]
+
+
+master_data = MasterDataCache()
+
+
+def create_stand_in_tables(force=False):
+    """
+    Create empty L1/L2/L3 tables with the columns this app reads.
+
+    Only for SQLite (tests, benchmarks, offline dev) — on Postgres the real
+    master tables are owned by another system and are left alone unless
+    ``force`` is given (throwaway benchmark databases).
+    """
+    if connection.vendor == 'postgresql' and not force:
+        return
+    serial = 'SERIAL PRIMARY KEY' if connection.vendor == 'postgresql' else 'INTEGER PRIMARY KEY AUTOINCREMENT'
+    with connection.cursor() as cursor:
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table(L1_TABLE)} (
+                id {serial},
+                customer_name VARCHAR(200),
+                part_name VARCHAR(200),
+                part_no VARCHAR(100)
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table(L2_TABLE)} (
+                id {serial},
+                part_id INTEGER,
+                report_name VARCHAR(200)
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table(L3_TABLE)} (
+                id {serial},
+                process_report_id INTEGER,
+                category VARCHAR(20),
+                parameter_name VARCHAR(300),
+                specification VARCHAR(200),
+                instrument VARCHAR(100)
+            )
+        ''')
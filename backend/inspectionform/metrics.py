@@ -0,0 +1,227 @@
+"""
+Per-view request metrics, kept in process and exposed as Prometheus text at
+/api/metrics/.
+
+MetricsMiddleware times every request and labels it with the view class
+(or function) and DRF action that served it.  Four histograms per label set:
+
+    inspection_request_seconds     wall time through the middleware
+    inspection_sql_queries         queries run by the request
+    inspection_sql_seconds         time spent inside those queries
+    inspection_serialize_seconds   rendering the response body (DRF renderer)
+
+SQL is counted by one execute wrapper installed on every connection; it
+finds the current request through a context variable, which also follows
+sync views that ASGI runs in a worker thread.  That is one extra function
+call per query, cheap enough to leave on.  Requests
+slower than SLOW_REQUEST_MS are logged to "inspectionform.slow" with the
+SQL they ran.  Each process keeps its own numbers; scrape every worker.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+slow_log = logging.getLogger('inspectionform.slow')
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233)
+MAX_CAPTURED_SQL = 200
+
+current = ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}   # labels -> [bucket counts..., +Inf count], sum
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def series(self):
+        with self._lock:
+            return {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+
+    def render(self, label_names):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total) in sorted(self.series().items()):
+            pairs = ','.join(f'{name}="{escape(value)}"' for name, value in zip(label_names, labels))
+            running = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                running += count
+                lines.append(f'{self.name}_bucket{{{pairs},le="{bound}"}} {running}')
+            lines.append(f'{self.name}_sum{{{pairs}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{pairs}}} {running}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + 1
+
+    def render(self, label_names):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            pairs = ','.join(f'{name}="{escape(label)}"' for name, label in zip(label_names, labels))
+            lines.append(f'{self.name}{{{pairs}}} {value}')
+        return lines
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+LABELS = ('view', 'action')
+REQUEST_SECONDS = Histogram('inspection_request_seconds', 'Request latency in seconds.', SECONDS_BUCKETS)
+SQL_QUERIES = Histogram('inspection_sql_queries', 'SQL queries per request.', QUERY_BUCKETS)
+SQL_SECONDS = Histogram('inspection_sql_seconds', 'Time spent in SQL per request, in seconds.', SECONDS_BUCKETS)
+SERIALIZE_SECONDS = Histogram('inspection_serialize_seconds', 'Response rendering time per request, in seconds.',
+                              SECONDS_BUCKETS)
+RESPONSES = Counter('inspection_responses_total', 'Responses by view, action and status code.')
+
+
+def render():
+    """The whole registry in Prometheus text exposition format 0.0.4"""
+    lines = []
+    for histogram in (REQUEST_SECONDS, SQL_QUERIES, SQL_SECONDS, SERIALIZE_SECONDS):
+        lines += histogram.render(LABELS)
+    lines += RESPONSES.render(LABELS + ('status',))
+    return '\n'.join(lines) + '\n'
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.query_count += 1
+        metrics.sql_seconds += elapsed
+        if len(metrics.statements) < MAX_CAPTURED_SQL:
+            metrics.statements.append((elapsed, sql))
+
+
+def install(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install, dispatch_uid='inspectionform-metrics')
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.render_start = None
+        self.render_seconds = 0.0
+        self.query_count = 0
+        self.sql_seconds = 0.0
+        self.statements = []
+
+
+def view_labels(view_func, method):
+    # ViewSets carry their method -> action map; @api_view classes are named after the function
+    cls = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None) or {}
+    name = cls.__name__ if cls is not None else view_func.__name__
+    return name, actions.get(method.lower(), method.lower())
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            # A sync hook would cost every ASGI request a thread hop
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        # Connections opened before this module loaded (e.g. by the test runner)
+        for connection in connections.all(initialized_only=True):
+            install(connection)
+        request._metrics = metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        self.record(request, metrics, response)
+        return response
+
+    async def __acall__(self, request):
+        request._metrics = metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        self.record(request, metrics, response)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time just that step
+        metrics = request._metrics
+        metrics.render_start = time.perf_counter()
+
+        def rendered(response):
+            metrics.render_seconds = time.perf_counter() - metrics.render_start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return self.process_template_response(request, response)
+
+    def record(self, request, metrics, response):
+        elapsed = time.perf_counter() - metrics.start
+        match = request.resolver_match
+        labels = view_labels(match.func, request.method) if match is not None else ('unresolved', '')
+        REQUEST_SECONDS.observe(labels, elapsed)
+        SQL_QUERIES.observe(labels, metrics.query_count)
+        SQL_SECONDS.observe(labels, metrics.sql_seconds)
+        SERIALIZE_SECONDS.observe(labels, metrics.render_seconds)
+        RESPONSES.inc(labels + (response.status_code,))
+
+        if elapsed * 1000 >= getattr(settings, 'SLOW_REQUEST_MS', 500):
+            statements = '\n'.join(f'  {seconds * 1000:8.2f} ms  {sql}' for seconds, sql in metrics.statements)
+            slow_log.warning(
+                '%s %s -> %s in %.0f ms (%s.%s): %d queries, %.0f ms SQL, %.0f ms rendering\n%s',
+                request.method, request.get_full_path(), response.status_code, elapsed * 1000,
+                labels[0], labels[1], metrics.query_count, metrics.sql_seconds * 1000,
+                metrics.render_seconds * 1000, statements,
+            )
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspectionform', '0007_report_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inspectionreport',
+            index=models.Index(fields=['-date', '-id'], name='insp_report_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspectionreport',
+            index=models.Index(fields=['part_name', '-date', '-id'], name='insp_report_part_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspectionreport',
+            index=models.Index(fields=['operation_name', '-date', '-id'], name='insp_report_operation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspectionreport',
+            index=models.Index(fields=['customer_name', '-date', '-id'], name='insp_report_customer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pdireport',
+            index=models.Index(fields=['-inspection_date', '-id'], name='pdi_report_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pdireport',
+            index=models.Index(fields=['part_name', '-inspection_date', '-id'], name='pdi_report_part_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pdireport',
+            index=models.Index(fields=['customer_name', '-inspection_date', '-id'], name='pdi_report_customer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pdireport',
+            index=models.Index(fields=['part_no', '-inspection_date', '-id'], name='pdi_report_part_no_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations, models
+
+
+LEGACY_COLUMNS = [f'value_{n}' for n in range(1, 21)]
+BATCH = 2000
+
+
+def compact(values):
+    values = ['' if value is None else value for value in values]
+    while values and values[-1] == '':
+        values.pop()
+    return values
+
+
+def columns_to_values(apps, schema_editor):
+    ScheduleEntry = apps.get_model('inspectionform', 'ScheduleEntry')
+    batch = []
+    for entry in ScheduleEntry.objects.only('id', *LEGACY_COLUMNS).iterator(chunk_size=BATCH):
+        entry.values = compact([getattr(entry, column) for column in LEGACY_COLUMNS])
+        batch.append(entry)
+        if len(batch) >= BATCH:
+            ScheduleEntry.objects.bulk_update(batch, ['values'])
+            batch = []
+    if batch:
+        ScheduleEntry.objects.bulk_update(batch, ['values'])
+
+
+def values_to_columns(apps, schema_editor):
+    ScheduleEntry = apps.get_model('inspectionform', 'ScheduleEntry')
+    batch = []
+    for entry in ScheduleEntry.objects.only('id', 'values').iterator(chunk_size=BATCH):
+        values = list(entry.values or [])[:len(LEGACY_COLUMNS)]
+        values += [''] * (len(LEGACY_COLUMNS) - len(values))
+        for column, value in zip(LEGACY_COLUMNS, values):
+            setattr(entry, column, value)
+        batch.append(entry)
+        if len(batch) >= BATCH:
+            ScheduleEntry.objects.bulk_update(batch, LEGACY_COLUMNS)
+            batch = []
+    if batch:
+        ScheduleEntry.objects.bulk_update(batch, LEGACY_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspectionform', '0008_report_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduleentry',
+            name='values',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(columns_to_values, values_to_columns),
+    ] + [
+        migrations.RemoveField(model_name='scheduleentry', name=column)
+        for column in LEGACY_COLUMNS
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspectionform', '0009_scheduleentry_values_array'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255)),
+                ('checksum', models.CharField(max_length=64, unique=True)),
+                ('file_type', models.CharField(max_length=10)),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('FAILED', 'Failed'), ('DONE', 'Done')], default='RUNNING', max_length=10)),
+                ('records_done', models.IntegerField(default=0)),
+                ('reports_created', models.IntegerField(default=0)),
+                ('items_created', models.IntegerField(default=0)),
+                ('entries_created', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'import_jobs',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
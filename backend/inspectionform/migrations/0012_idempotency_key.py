@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspectionform', '0011_sync_updated_at_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('op', models.CharField(max_length=10)),
+                ('report_id', models.IntegerField(blank=True, null=True)),
+                ('result', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'idempotency_keys',
+                'ordering': ['id'],
+            },
+        ),
+    ]
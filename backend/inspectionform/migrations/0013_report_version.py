@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspectionform', '0012_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inspectionreport',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspectionform', '0013_report_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPDIRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('customer_name', models.CharField(blank=True, max_length=200)),
+                ('part_name', models.CharField(blank=True, max_length=200)),
+                ('operation_name', models.CharField(blank=True, max_length=200)),
+                ('reports', models.IntegerField(default=0)),
+                ('ng_reports', models.IntegerField(default=0)),
+                ('items', models.IntegerField(default=0)),
+                ('ng_items', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'rollup_daily_pdi',
+                'ordering': ['day', 'customer_name', 'part_name', 'operation_name'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'customer_name', 'part_name', 'operation_name'), name='rollup_pdi_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyQualityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('customer_name', models.CharField(blank=True, max_length=200)),
+                ('part_name', models.CharField(blank=True, max_length=200)),
+                ('operation_name', models.CharField(blank=True, max_length=200)),
+                ('machine_no', models.CharField(blank=True, max_length=50)),
+                ('reports', models.IntegerField(default=0)),
+                ('ng_reports', models.IntegerField(default=0)),
+                ('rows', models.IntegerField(default=0)),
+                ('ok_rows', models.IntegerField(default=0)),
+                ('ng_rows', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'rollup_daily_quality',
+                'ordering': ['day', 'customer_name', 'part_name', 'operation_name', 'machine_no'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'customer_name', 'part_name', 'operation_name', 'machine_no'), name='rollup_quality_key')],
+            },
+        ),
+    ]
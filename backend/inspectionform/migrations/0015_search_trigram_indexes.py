@@ -0,0 +1,51 @@
+from django.db import migrations
+
+
+# Columns searched by /api/search/ (inspectionform/search.py SOURCES)
+SEARCH_COLUMNS = {
+    'inspection_reports': ['part_name', 'part_number', 'operation_name', 'customer_name', 'prepared_by', 'approved_by'],
+    'inspection_items': ['item'],
+    'schedule_entries': ['operator', 'machine_no'],
+    'pdi_reports': ['part_name', 'part_no', 'operation_name', 'customer_name', 'invoice_no', 'inspected_by'],
+    'pdi_items': ['item'],
+}
+
+
+def index_name(table, column):
+    return f'{table}_{column}_trgm'
+
+
+def create_indexes(apps, schema_editor):
+    # SQLite and the rest use the in-process index instead
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            # GiST rather than GIN: it can return the nearest values (ORDER BY <<->) straight off the index
+            schema_editor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index_name(table, column)}" '
+                f'ON "{table}" USING gist (lower("{column}") gist_trgm_ops)'
+            )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name(table, column)}"')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; the report
+    # tables stay writable while the indexes build.
+    atomic = False
+
+    dependencies = [
+        ('inspectionform', '0014_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
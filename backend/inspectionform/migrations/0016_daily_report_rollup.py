@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:15
+
+from django.db import migrations, models
+from django.db.models import Count, F, Q
+
+
+def backfill(apps, schema_editor):
+    # Same aggregate as rollups.report_rows, over all history
+    InspectionReport = apps.get_model('inspectionform', 'InspectionReport')
+    DailyReportRollup = apps.get_model('inspectionform', 'DailyReportRollup')
+    rows = (
+        InspectionReport.objects
+        .values('customer_name', 'part_name', 'operation_name', day=F('date'))
+        .annotate(
+            reports=Count('id', distinct=True),
+            ng_reports=Count('id', filter=Q(schedule_entries__judgment='NG'), distinct=True),
+        )
+        .order_by()
+    )
+    DailyReportRollup.objects.bulk_create((DailyReportRollup(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspectionform', '0015_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyReportRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('customer_name', models.CharField(blank=True, max_length=200)),
+                ('part_name', models.CharField(blank=True, max_length=200)),
+                ('operation_name', models.CharField(blank=True, max_length=200)),
+                ('reports', models.IntegerField(default=0)),
+                ('ng_reports', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'rollup_daily_report',
+                'ordering': ['day', 'customer_name', 'part_name', 'operation_name'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'customer_name', 'part_name', 'operation_name'), name='rollup_report_key')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
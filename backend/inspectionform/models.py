@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete
 from django.utils import timezone
 
 
@@ -12,16 +13,51 @@ class InspectionReport(models.Model):
     customer_name = models.CharField(max_length=200, blank=True)
     prepared_by = models.CharField(max_length=100, blank=True)
     approved_by = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Bumped by every edit with UPDATE ... WHERE version = N (optimistic concurrency)
+    version = models.PositiveIntegerField(default=1)
 
     class Meta:
         db_table = 'inspection_reports'
         ordering = ['-date', '-id']
+        # Shaped to InspectionReportViewSet.get_queryset: equality filter, then date/id sort
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='insp_report_date_idx'),
+            models.Index(fields=['part_name', '-date', '-id'], name='insp_report_part_idx'),
+            models.Index(fields=['operation_name', '-date', '-id'], name='insp_report_operation_idx'),
+            models.Index(fields=['customer_name', '-date', '-id'], name='insp_report_customer_idx'),
+        ]
 
     def __str__(self):
         return f"{self.doc_no} - {self.part_name}"
 
 
-class InspectionItem(models.Model):
+class ReportChildQuerySet(models.QuerySet):
+    def delete(self):
+        with transaction.atomic():
+            tombstone_rows(self.model, self.values_list('pk', 'report_id'))
+            return super().delete()
+
+
+class ReportChild(models.Model):
+    """
+    A row of a report that /api/sync/ ships on its own.  Deleting it directly
+    (not with its report) leaves a Tombstone.  This is done here instead of
+    in a post_delete receiver, because a receiver would stop Django
+    fast-deleting these rows with their report: one signal per row.
+    """
+    objects = ReportChildQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            tombstone_rows(type(self), [(self.pk, self.report_id)])
+            return super().delete(*args, **kwargs)
+
+
+class InspectionItem(ReportChild):
     report = models.ForeignKey(
         InspectionReport,
         on_delete=models.CASCADE,
@@ -33,6 +69,7 @@ class InspectionItem(models.Model):
     spec = models.CharField(max_length=100, blank=True)
     tolerance = models.CharField(max_length=50, blank=True)
     inst = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         db_table = 'inspection_items'
@@ -43,7 +80,7 @@ class InspectionItem(models.Model):
         return f"{self.sr_no}. {self.item}"
 
 
-class ScheduleEntry(models.Model):
+class ScheduleEntry(ReportChild):
     TIME_CHOICES = [
         ('SETUP', 'Setup'),
         ('2HRS', '2 Hours'),
@@ -64,30 +101,14 @@ class ScheduleEntry(models.Model):
     machine_no = models.CharField(max_length=50, blank=True)
     time_type = models.CharField(max_length=10, choices=TIME_CHOICES)
 
-    value_1  = models.CharField(max_length=50, blank=True)
-    value_2  = models.CharField(max_length=50, blank=True)
-    value_3  = models.CharField(max_length=50, blank=True)
-    value_4  = models.CharField(max_length=50, blank=True)
-    value_5  = models.CharField(max_length=50, blank=True)
-    value_6  = models.CharField(max_length=50, blank=True)
-    value_7  = models.CharField(max_length=50, blank=True)
-    value_8  = models.CharField(max_length=50, blank=True)
-    value_9  = models.CharField(max_length=50, blank=True)
-    value_10 = models.CharField(max_length=50, blank=True)
-    value_11 = models.CharField(max_length=50, blank=True)
-    value_12 = models.CharField(max_length=50, blank=True)
-    value_13 = models.CharField(max_length=50, blank=True)
-    value_14 = models.CharField(max_length=50, blank=True)
-    value_15 = models.CharField(max_length=50, blank=True)
-    value_16 = models.CharField(max_length=50, blank=True)
-    value_17 = models.CharField(max_length=50, blank=True)
-    value_18 = models.CharField(max_length=50, blank=True)
-    value_19 = models.CharField(max_length=50, blank=True)
-    value_20 = models.CharField(max_length=50, blank=True)
+    # One measured reading per column of the report, trailing blanks trimmed.
+    # Replaces the old value_1 .. value_20 columns (see migration 0009).
+    values = models.JSONField(default=list, blank=True)
 
     judgment  = models.CharField(max_length=50, blank=True)
     signature = models.CharField(max_length=100, blank=True)
     filled_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         db_table = 'schedule_entries'
@@ -97,6 +118,17 @@ class ScheduleEntry(models.Model):
         return f"SR {self.sr} - {self.time_type} - {{'UP' if self.row_order == 0 else 'DOWN'}}"
 
 
+LEGACY_VALUE_COLUMNS = 20
+
+
+def compact_values(values):
+    """Blank out None and drop trailing empty readings"""
+    values = ['' if value is None else str(value) for value in values]
+    while values and values[-1] == '':
+        values.pop()
+    return values
+
+
 # ══════════════════════════════════════════
 #  
 # ══════════════════════════════════════════
@@ -117,16 +149,24 @@ class PDIReport(models.Model):
     verified_by      = models.CharField(max_length=100, blank=True)
     approved_by      = models.CharField(max_length=100, blank=True)
     created_at       = models.DateTimeField(auto_now_add=True)
+    updated_at       = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         db_table = 'pdi_reports'
         ordering = ['-inspection_date', '-id']
+        # Shaped to PDIReportViewSet.get_queryset
+        indexes = [
+            models.Index(fields=['-inspection_date', '-id'], name='pdi_report_date_idx'),
+            models.Index(fields=['part_name', '-inspection_date', '-id'], name='pdi_report_part_idx'),
+            models.Index(fields=['customer_name', '-inspection_date', '-id'], name='pdi_report_customer_idx'),
+            models.Index(fields=['part_no', '-inspection_date', '-id'], name='pdi_report_part_no_idx'),
+        ]
 
     def __str__(self):
         return f"PDI - {self.part_name} - {self.inspection_date}"
 
 
-class PDIItem(models.Model):
+class PDIItem(ReportChild):
     """Individual inspection row in PDI Report"""
     report       = models.ForeignKey(PDIReport, on_delete=models.CASCADE, related_name='items')
     sr_no        = models.IntegerField()
@@ -141,6 +181,7 @@ class PDIItem(models.Model):
     cust_obs2    = models.CharField(max_length=100, blank=True)
     cust_judge   = models.CharField(max_length=50, blank=True)
     remarks      = models.CharField(max_length=200, blank=True)
+    updated_at   = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         db_table = 'pdi_items'
@@ -149,3 +190,183 @@ class PDIItem(models.Model):
 
     def __str__(self):
         return f"{self.sr_no}. {self.item}"
+
+
+# ══════════════════════════════════════════
+#  DELTA SYNC
+# ══════════════════════════════════════════
+
+class Tombstone(models.Model):
+    """A deleted row, kept so /api/sync/ can tell polling clients to drop their copy"""
+    model      = models.CharField(max_length=30)
+    object_id  = models.IntegerField()
+    report_id  = models.IntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = 'sync_tombstones'
+        ordering = ['deleted_at', 'id']
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted {self.deleted_at}"
+
+
+SYNC_MODELS = {
+    InspectionReport: 'report',
+    InspectionItem: 'item',
+    ScheduleEntry: 'schedule_entry',
+    PDIReport: 'pdi_report',
+    PDIItem: 'pdi_item',
+}
+REPORT_MODELS = (InspectionReport, PDIReport)
+
+
+def tombstone_rows(model, rows):
+    """Tombstones for the (pk, report_id) pairs of deleted ``model`` rows, in one INSERT"""
+    Tombstone.objects.bulk_create([
+        Tombstone(model=SYNC_MODELS[model], object_id=pk, report_id=report_id) for pk, report_id in rows
+    ])
+
+
+def record_tombstone(sender, instance, **kwargs):
+    # Rows cascading away with a report are covered by the report's own tombstone
+    Tombstone.objects.create(model=SYNC_MODELS[sender], object_id=instance.pk, report_id=instance.pk)
+
+
+for _model in REPORT_MODELS:
+    post_delete.connect(record_tombstone, sender=_model, dispatch_uid=f'tombstone-{_model.__name__}')
+
+
+# ══════════════════════════════════════════
+#  BULK IMPORT
+# ══════════════════════════════════════════
+
+class ImportJob(models.Model):
+    """Progress of one bulk-import file, committed with each chunk so a failed import resumes"""
+    STATUS_CHOICES = [
+        ('RUNNING', 'Running'),
+        ('FAILED', 'Failed'),
+        ('DONE', 'Done'),
+    ]
+    MAX_STORED_ERRORS = 1000
+
+    source          = models.CharField(max_length=255)
+    checksum        = models.CharField(max_length=64, unique=True)   # sha256 of the file
+    file_type       = models.CharField(max_length=10)
+    status          = models.CharField(max_length=10, choices=STATUS_CHOICES, default='RUNNING')
+    records_done    = models.IntegerField(default=0)
+    reports_created = models.IntegerField(default=0)
+    items_created   = models.IntegerField(default=0)
+    entries_created = models.IntegerField(default=0)
+    error_count     = models.IntegerField(default=0)
+    errors          = models.JSONField(default=list, blank=True)     # first MAX_STORED_ERRORS only
+    created_at      = models.DateTimeField(auto_now_add=True)
+    updated_at      = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'import_jobs'
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"{self.source} ({self.status})"
+
+
+# ══════════════════════════════════════════
+#  OFFLINE BATCH SAVE
+# ══════════════════════════════════════════
+
+class IdempotencyKey(models.Model):
+    """
+    A client-generated key of one applied /api/reports/batch/ mutation and
+    its result, so a retried upload replays the result instead of saving twice.
+    """
+    key        = models.CharField(max_length=100, unique=True)
+    op         = models.CharField(max_length=10)
+    report_id  = models.IntegerField(null=True, blank=True)
+    result     = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.key} ({self.op} {self.report_id})"
+
+
+# ══════════════════════════════════════════
+#  DAILY ROLLUPS (dashboard)
+# ══════════════════════════════════════════
+
+class DailyQualityRollup(models.Model):
+    """Schedule-row judgments of one day × customer × part × operation × machine (see rollups.py)"""
+    day            = models.DateField()
+    customer_name  = models.CharField(max_length=200, blank=True)
+    part_name      = models.CharField(max_length=200, blank=True)
+    operation_name = models.CharField(max_length=200, blank=True)
+    machine_no     = models.CharField(max_length=50, blank=True)
+    # Per machine: a report run on two machines counts on both (DailyReportRollup counts it once)
+    reports        = models.IntegerField(default=0)
+    ng_reports     = models.IntegerField(default=0)   # reports with at least one NG row
+    rows           = models.IntegerField(default=0)
+    ok_rows        = models.IntegerField(default=0)
+    ng_rows        = models.IntegerField(default=0)
+    updated_at     = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_daily_quality'
+        ordering = ['day', 'customer_name', 'part_name', 'operation_name', 'machine_no']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'customer_name', 'part_name', 'operation_name', 'machine_no'],
+                name='rollup_quality_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.part_name} / {self.operation_name} / {self.machine_no}"
+
+
+class DailyReportRollup(models.Model):
+    """Inspection reports of one day × customer × part × operation, each counted once"""
+    day            = models.DateField()
+    customer_name  = models.CharField(max_length=200, blank=True)
+    part_name      = models.CharField(max_length=200, blank=True)
+    operation_name = models.CharField(max_length=200, blank=True)
+    reports        = models.IntegerField(default=0)
+    ng_reports     = models.IntegerField(default=0)   # reports with at least one NG row
+    updated_at     = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_daily_report'
+        ordering = ['day', 'customer_name', 'part_name', 'operation_name']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'customer_name', 'part_name', 'operation_name'],
+                                    name='rollup_report_key'),
+        ]
+
+    def __str__(self):
+        return f"Reports {self.day} {self.part_name} / {self.operation_name}"
+
+
+class DailyPDIRollup(models.Model):
+    """PDI results of one day × customer × part × operation (PDI reports carry no machine)"""
+    day            = models.DateField()
+    customer_name  = models.CharField(max_length=200, blank=True)
+    part_name      = models.CharField(max_length=200, blank=True)
+    operation_name = models.CharField(max_length=200, blank=True)
+    reports        = models.IntegerField(default=0)
+    ng_reports     = models.IntegerField(default=0)   # reports with at least one NG item
+    items          = models.IntegerField(default=0)
+    ng_items       = models.IntegerField(default=0)
+    updated_at     = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_daily_pdi'
+        ordering = ['day', 'customer_name', 'part_name', 'operation_name']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'customer_name', 'part_name', 'operation_name'], name='rollup_pdi_key'),
+        ]
+
+    def __str__(self):
+        return f"PDI {self.day} {self.part_name} / {self.operation_name}"
@@ -0,0 +1,158 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset (seek) pagination.
+
+    Only kicks in when the request carries ?page_size= or ?cursor=, so the
+    plain list response the React client uses stays a bare array.  Pages are
+    fetched with  WHERE (date, id) < (last_date, last_id)  instead of OFFSET,
+    so page 10,000 costs the same as page 1.
+
+    The view sets ``cursor_ordering`` to a tuple of fields that is unique
+    per row (always end with 'id' / '-id').
+    """
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(getattr(view, 'cursor_ordering', self.ordering))
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self._flip(field) for field in ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        page = rows[:self.page_size]
+        if reverse:
+            page.reverse()
+
+        self.next_position = self.previous_position = None
+        if page:
+            first, last = self._position(page[0]), self._position(page[-1])
+            if reverse:
+                self.next_position = last
+                self.previous_position = first if has_more else None
+            else:
+                self.next_position = last if has_more else None
+                self.previous_position = first if position is not None else None
+        return page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    # ── cursor encoding ──
+
+    def encode_cursor(self, position, reverse):
+        token = {'p': position}
+        if reverse:
+            token['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(token, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model):
+        """(position, reverse) with each position value converted by its ordering field"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            token = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            position = token['p']
+            reverse = bool(token.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    # ── keyset helpers ──
+
+    def _position(self, obj):
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return values
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _after(ordering, position):
+        """Row-value comparison (a, b, c) > (x, y, z) spelled out as OR-of-ANDs."""
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': position[i]})
+            for prev_field, prev_value in zip(ordering[:i], position[:i]):
+                term &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= term
+        return condition
@@ -0,0 +1,331 @@
+"""
+Printable PDF layouts, drawn with ReportLab.
+
+Mirrors the browser print views — Inspection.js (A4 landscape) and
+PDIReport.js (A4 portrait) — from the serialized report dicts the API
+already returns.  Nothing here touches Django or the database, so the
+functions can run in a separate worker process (see printing.py).
+"""
+import io
+import os
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import Image, PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
+
+
+MARGIN = 8 * mm
+GRID = [('GRID', (0, 0), (-1, -1), 0.6, colors.black), ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')]
+TIGHT = [('TOPPADDING', (0, 0), (-1, -1), 1.5), ('BOTTOMPADDING', (0, 0), (-1, -1), 1.5),
+         ('LEFTPADDING', (0, 0), (-1, -1), 2), ('RIGHTPADDING', (0, 0), (-1, -1), 2)]
+OK_COLOR = colors.HexColor('#1a7c1a')
+NG_COLOR = colors.HexColor('#c0392b')
+
+TITLE = ParagraphStyle('title', fontName='Helvetica-Bold', fontSize=13, leading=16, alignment=TA_CENTER)
+CELL = ParagraphStyle('cell', fontName='Helvetica', fontSize=8, leading=9.5, alignment=TA_CENTER)
+CELL_BOLD = ParagraphStyle('cell_bold', parent=CELL, fontName='Helvetica-Bold')
+HEAD_SMALL = ParagraphStyle('head_small', parent=CELL_BOLD, fontSize=7, leading=8)
+
+TIME_ORDER = {'SETUP': 0, '4HRS': 1, '2HRS': 1, 'LAST': 2}
+
+
+def text(value):
+    return '' if value is None else str(value)
+
+
+def display_date(value):
+    parts = text(value)[:10].split('-')
+    return '/'.join(reversed(parts)) if len(parts) == 3 else text(value)
+
+
+def escape(value):
+    """ReportLab paragraphs take markup"""
+    return text(value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def para(value, style=CELL):
+    """Cell text that wraps inside its column"""
+    return Paragraph(escape(value), style)
+
+
+def logo(path, width, height):
+    if path and os.path.exists(path):
+        return Image(path, width=width, height=height, kind='proportional')
+    return ''
+
+
+def widths(total, percents):
+    return [total * p / 100 for p in percents]
+
+
+# ══════════════════════════════════════════
+#  SETUP & PATROL INSPECTION REPORT
+# ══════════════════════════════════════════
+
+def schedule_groups(entries):
+    """
+    Same grouping as Inspection.js buildScheduleRows: one SR block per
+    operator + machine + date, a row per slot (UP, plus DOWN when it has
+    readings), slots ordered SETUP → 4HRS → LAST.
+    """
+    groups = {}
+    for entry in entries:
+        key = (entry.get('operator') or '', entry.get('machine_no') or '', entry.get('date') or '')
+        groups.setdefault(key, []).append(entry)
+
+    blocks = []
+    for sr, ((operator, machine_no, date), group) in enumerate(groups.items(), 1):
+        slots = {}
+        for entry in sorted(group, key=lambda e: (e.get('slot_index') or 0, e.get('row_order') or 0)):
+            slot = slots.setdefault(entry.get('slot_index') or 0, {'time': entry.get('time_type') or 'SETUP', 'rows': {}})
+            slot['rows'][entry.get('row_order') or 0] = entry
+        rows = []
+        ordered = sorted(slots.items(), key=lambda kv: (TIME_ORDER.get(kv[1]['time'], 9), kv[0]))
+        for slot_index, slot in ordered:
+            for row_order in sorted(set(slot['rows']) | {0}):
+                entry = slot['rows'].get(row_order, {})
+                if row_order != 0 and not any(entry.get('values') or []):
+                    continue
+                rows.append({'slot': slot_index, 'time': slot['time'], 'entry': entry})
+        judgments = {row['entry'].get('judgment') for row in rows}
+        verdict = 'NG' if 'NG' in judgments else 'OK' if 'OK' in judgments else ''
+        blocks.append({
+            'sr': sr, 'date': display_date(date), 'operator': operator, 'machine_no': machine_no,
+            'rows': rows, 'verdict': verdict,
+        })
+    return blocks
+
+
+def inspection_story(report, width, logo_path):
+    items = report.get('items') or []
+    product = sorted((x for x in items if 1 <= x['sr_no'] <= 10), key=lambda x: x['sr_no'])
+    process = sorted((x for x in items if 11 <= x['sr_no'] <= 20), key=lambda x: x['sr_no'])
+    product_count = sum(1 for x in product if text(x.get('item')).strip())
+    process_count = sum(1 for x in process if text(x.get('item')).strip())
+    columns = max(min(product_count + process_count, 20), 1)
+
+    doc_info = Table(
+        [['DOC NO:', text(report.get('doc_no')) or 'KGTL-QCL-01'],
+         ['REVISION NO:', text(report.get('revision_no')) or '01'],
+         ['DATE:', display_date(report.get('date'))]],
+        colWidths=[28 * mm, 32 * mm], rowHeights=7 * mm,
+    )
+    doc_info.setStyle(TableStyle([
+        ('LINEBELOW', (0, 0), (-1, -2), 0.6, colors.black),
+        ('LINEAFTER', (0, 0), (0, -1), 0.6, colors.black),
+        ('FONT', (0, 0), (0, -1), 'Helvetica-Bold', 8),
+        ('FONT', (1, 0), (1, -1), 'Helvetica-Bold', 9),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    header = Table(
+        [[logo(logo_path, 36 * mm, 18 * mm), Paragraph('SETUP &amp; PATROL INSPECTION REPORT', TITLE), doc_info]],
+        colWidths=[42 * mm, width - 102 * mm, 60 * mm], rowHeights=21 * mm,
+    )
+    header.setStyle(TableStyle(GRID + [('ALIGN', (0, 0), (0, 0), 'CENTER'), ('LEFTPADDING', (2, 0), (2, 0), 0),
+                                       ('RIGHTPADDING', (2, 0), (2, 0), 0), ('TOPPADDING', (2, 0), (2, 0), 0),
+                                       ('BOTTOMPADDING', (2, 0), (2, 0), 0)]))
+
+    info = Table(
+        [['CUSTOMER NAME', text(report.get('customer_name')), 'PART NAME', text(report.get('part_name'))],
+         ['OPERATION NAME', text(report.get('operation_name')), 'PART NUMBER', text(report.get('part_number'))]],
+        colWidths=widths(width, [15, 35, 15, 35]), rowHeights=7 * mm,
+    )
+    info.setStyle(TableStyle(GRID + [
+        ('FONT', (0, 0), (-1, -1), 'Helvetica', 9),
+        ('FONT', (0, 0), (0, -1), 'Helvetica-Bold', 9),
+        ('FONT', (2, 0), (2, -1), 'Helvetica-Bold', 9),
+    ]))
+
+    item_rows = [['SR. NO.', 'INSP. ITEM (PRODUCT)', 'SPEC.', 'TOLERANCE', 'INST.',
+                  'SR. NO.', 'INSP. ITEM (PROCESS)', 'SPEC.', 'TOLERANCE', 'INST.']]
+    for i in range(10):
+        p = product[i] if i < len(product) else {}
+        r = process[i] if i < len(process) else {}
+        item_rows.append([
+            i + 1 if text(p.get('item')).strip() else '', para(p.get('item'), CELL_BOLD),
+            para(p.get('spec')), para(p.get('tolerance')), para(p.get('inst')),
+            product_count + i + 1 if text(r.get('item')).strip() else '', para(r.get('item'), CELL_BOLD),
+            para(r.get('spec')), para(r.get('tolerance')), para(r.get('inst')),
+        ])
+    inspection = Table(item_rows, colWidths=widths(width, [4, 22, 9, 9, 6, 4, 22, 9, 9, 6]), repeatRows=1)
+    inspection.setStyle(TableStyle(GRID + TIGHT + [
+        ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 8),
+        ('FONT', (0, 1), (-1, -1), 'Helvetica', 8),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f2f2f2')),
+    ]))
+
+    fixed = [2, 7, 8, 4, 3.5]
+    tail = [2.5, 7.5, 7.5]
+    reading = (100 - sum(fixed) - sum(tail)) / columns
+    schedule_rows = [['SR', 'DATE', 'OPERATOR', 'M/C NO', 'TIME'] + [str(n) for n in range(1, columns + 1)]
+                     + ['JDG', para('SIGN (INSPECTED BY)', HEAD_SMALL), para('SIGN (VERIFIED BY)', HEAD_SMALL)]]
+    spans = []
+    verdict_colors = []
+    judgment_column = 5 + columns
+    for block in schedule_groups(report.get('schedule_entries') or []):
+        first = len(schedule_rows)
+        for n, row in enumerate(block['rows']):
+            values = list(row['entry'].get('values') or [])[:columns]
+            values += [''] * (columns - len(values))
+            head = [block['sr'], para(block['date']), para(block['operator']), block['machine_no']] if n == 0 else ['', '', '', '']
+            schedule_rows.append(head + [row['time']] + values + ([block['verdict'], '', ''] if n == 0 else ['', '', '']))
+        last = len(schedule_rows) - 1
+        for column in list(range(4)) + [judgment_column, judgment_column + 1, judgment_column + 2]:
+            spans.append(('SPAN', (column, first), (column, last)))
+        # TIME spans the UP/DOWN rows of one slot
+        start = first
+        for n in range(1, len(block['rows']) + 1):
+            if n == len(block['rows']) or block['rows'][n]['slot'] != block['rows'][n - 1]['slot']:
+                spans.append(('SPAN', (4, start), (4, first + n - 1)))
+                start = first + n
+        if block['verdict']:
+            verdict_colors.append(('TEXTCOLOR', (judgment_column, first), (judgment_column, first),
+                                   NG_COLOR if block['verdict'] == 'NG' else OK_COLOR))
+
+    schedule = Table(schedule_rows, colWidths=widths(width, fixed + [reading] * columns + tail), repeatRows=1)
+    schedule.setStyle(TableStyle(GRID + TIGHT + spans + verdict_colors + [
+        ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 7.5),
+        ('FONT', (0, 1), (-1, -1), 'Helvetica', 8),
+        ('FONT', (4, 1), (4, -1), 'Helvetica-Bold', 7.5),
+        ('FONT', (judgment_column, 1), (judgment_column, -1), 'Helvetica-Bold', 8),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f2f2f2')),
+    ]))
+
+    footer = Table(
+        [['PREPARED BY:', text(report.get('prepared_by')), 'APPROVED BY:', text(report.get('approved_by'))]],
+        colWidths=widths(width, [12, 38, 12, 38]), rowHeights=9 * mm,
+    )
+    footer.setStyle(TableStyle([
+        ('FONT', (0, 0), (-1, -1), 'Helvetica', 9),
+        ('FONT', (0, 0), (0, 0), 'Helvetica-Bold', 9),
+        ('FONT', (2, 0), (2, 0), 'Helvetica-Bold', 9),
+        ('LINEBELOW', (1, 0), (1, 0), 0.6, colors.black),
+        ('LINEBELOW', (3, 0), (3, 0), 0.6, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'BOTTOM'),
+    ]))
+
+    return [header, info, inspection, schedule, footer]
+
+
+# ══════════════════════════════════════════
+#  PDI REPORT
+# ══════════════════════════════════════════
+
+PDI_MIN_ROWS = 15
+PDI_COLUMNS = [4, 18, 10, 8, 9, 6, 6, 9, 6, 6, 9, 9]
+
+
+INFO = ParagraphStyle('info', fontName='Helvetica', fontSize=8.5, leading=10)
+
+
+def labelled(label, value):
+    return Paragraph(f'<b>{label} : </b>{escape(value)}', INFO)
+
+
+def pdi_story(report, width, logo_path):
+    page = Table(
+        [[para('PAGE NO.', CELL_BOLD)], [para(text(report.get('page_no')) or '01 OF 01', CELL_BOLD)]],
+        colWidths=[36 * mm], rowHeights=[9 * mm, 10 * mm],
+    )
+    page.setStyle(TableStyle([('LINEBELOW', (0, 0), (0, 0), 0.6, colors.black), ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')]))
+    header = Table(
+        [[logo(logo_path, 32 * mm, 16 * mm), Paragraph('PRE DISPATCH INSPECTION REPORT', TITLE), page]],
+        colWidths=[38 * mm, width - 74 * mm, 36 * mm], rowHeights=19 * mm,
+    )
+    header.setStyle(TableStyle(GRID + [('ALIGN', (0, 0), (0, 0), 'CENTER')] + [
+        (name, (2, 0), (2, 0), 0) for name in ('LEFTPADDING', 'RIGHTPADDING', 'TOPPADDING', 'BOTTOMPADDING')
+    ]))
+
+    column_widths = widths(width, PDI_COLUMNS)
+    info = Table([
+        [labelled('SUPPLIER NAME', report.get('supplier_name')), '', '',
+         labelled('PART NO', report.get('part_no')), '', '',
+         labelled('INSPECTION DATE', display_date(report.get('inspection_date'))), '', '',
+         labelled('CUSTOMER NAME', report.get('customer_name')), '', ''],
+        [labelled('PART NAME', report.get('part_name')), '', '', '', '',
+         labelled('INVOICE NO', report.get('invoice_no')), '', '',
+         labelled('LOT QTY', report.get('lot_qty')), '', '', ''],
+    ], colWidths=column_widths)
+    info.setStyle(TableStyle(GRID + [
+        ('SPAN', (0, 0), (2, 0)), ('SPAN', (3, 0), (5, 0)), ('SPAN', (6, 0), (8, 0)), ('SPAN', (9, 0), (11, 0)),
+        ('SPAN', (0, 1), (4, 1)), ('SPAN', (5, 1), (7, 1)), ('SPAN', (8, 1), (11, 1)),
+    ]))
+
+    items = sorted((x for x in report.get('items') or [] if x['sr_no'] >= 1), key=lambda x: x['sr_no'])
+    rows = [
+        [para('SR. No.', HEAD_SMALL), para('INSPECTION ITEMS', HEAD_SMALL), para('DIMENSIONS/ SPEC', HEAD_SMALL),
+         para('TOLERANCE', HEAD_SMALL), para('INSPECTION METHOD', HEAD_SMALL),
+         para('VENDOR OBSERVATIONS', HEAD_SMALL), '', '', para('CUSTOMER OBSERVATION', HEAD_SMALL), '', '',
+         para('REMARKS', HEAD_SMALL)],
+        ['', '', '', '', '', '1', '2', 'Judgement', '1', '2', 'Judgement', ''],
+    ]
+    judge_colors = []
+    for i in range(max(PDI_MIN_ROWS, len(items))):
+        row = items[i] if i < len(items) else {}
+        rows.append([
+            i + 1 if text(row.get('item')).strip() else '', para(row.get('item'), CELL_BOLD),
+            para(row.get('spec')), para(row.get('tolerance')), para(row.get('method')),
+            para(row.get('vendor_obs1')), para(row.get('vendor_obs2')), text(row.get('vendor_judge')),
+            para(row.get('cust_obs1')), para(row.get('cust_obs2')), text(row.get('cust_judge')),
+            para(row.get('remarks')),
+        ])
+        for column, key in ((7, 'vendor_judge'), (10, 'cust_judge')):
+            judgment = row.get(key)
+            if judgment in ('OK', 'NG'):
+                judge_colors.append(('TEXTCOLOR', (column, len(rows) - 1), (column, len(rows) - 1),
+                                     OK_COLOR if judgment == 'OK' else NG_COLOR))
+    inspection = Table(rows, colWidths=column_widths, repeatRows=2)
+    inspection.setStyle(TableStyle(GRID + TIGHT + judge_colors + [
+        ('SPAN', (5, 0), (7, 0)), ('SPAN', (8, 0), (10, 0)),
+        *[('SPAN', (column, 0), (column, 1)) for column in (0, 1, 2, 3, 4, 11)],
+        ('FONT', (0, 0), (-1, 1), 'Helvetica-Bold', 8),
+        ('FONT', (0, 2), (-1, -1), 'Helvetica', 8),
+        ('FONT', (7, 2), (7, -1), 'Helvetica-Bold', 8),
+        ('FONT', (10, 2), (10, -1), 'Helvetica-Bold', 8),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('BACKGROUND', (0, 0), (-1, 1), colors.HexColor('#f2f2f2')),
+    ]))
+
+    signatures = Table([
+        [labelled('Supplier Remarks', report.get('supplier_remarks')), ''],
+        [labelled('Inspected By', report.get('inspected_by')), labelled('Verified By', report.get('verified_by'))],
+        [labelled('Approved By', report.get('approved_by')), ''],
+    ], colWidths=[width / 2, width / 2], rowHeights=12 * mm)
+    signatures.setStyle(TableStyle(GRID + [('SPAN', (0, 0), (1, 0)), ('SPAN', (0, 2), (1, 2))]))
+
+    return [header, info, inspection, signatures]
+
+
+# ══════════════════════════════════════════
+#  DOCUMENTS
+# ══════════════════════════════════════════
+
+LAYOUTS = {
+    'inspection': (landscape(A4), inspection_story),
+    'pdi': (A4, pdi_story),
+}
+
+
+def render(kind, reports, logo_path=None):
+    """PDF bytes with one report per page (or run of pages) for a list of serialized reports"""
+    pagesize, story_for = LAYOUTS[kind]
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=pagesize,
+        leftMargin=MARGIN, rightMargin=MARGIN, topMargin=MARGIN, bottomMargin=MARGIN,
+        title='Setup & Patrol Inspection Report' if kind == 'inspection' else 'Pre Dispatch Inspection Report',
+    )
+    story = []
+    for report in reports:
+        if story:
+            story.append(PageBreak())
+        story.extend(story_for(report, doc.width, logo_path))
+    if not story:
+        story.append(Paragraph('No reports.', TITLE))
+    doc.build(story)
+    return buffer.getvalue()
@@ -0,0 +1,99 @@
+"""
+Server-side PDF printouts: a disk cache and a worker pool around pdf.py.
+
+A rendered file is stored in PDF_CACHE_DIR as ``<name>-<version>.pdf``.  The
+version comes from the report's updated_at (for a day batch, from the count
+and newest updated_at of its reports), so an edit makes the next request
+render afresh and the stale file is removed.  Rendering is CPU-bound
+ReportLab work; it runs in a process pool of PDF_WORKERS processes so it
+neither holds the GIL nor ties up more request threads than necessary, and
+concurrent requests for the same file wait on a single render.
+"""
+import glob
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from django.conf import settings
+
+from . import pdf
+
+
+def cache_dir():
+    path = str(getattr(settings, 'PDF_CACHE_DIR', None) or os.path.join(settings.BASE_DIR, 'pdf_cache'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class PDFPrinter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._rendering = {}
+        self.hits = 0
+        self.renders = 0
+
+    def pool(self):
+        workers = getattr(settings, 'PDF_WORKERS', 2)
+        if not workers:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: the children only need ReportLab, not a copy of our DB connections
+                self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def render(self, kind, reports):
+        logo = getattr(settings, 'PDF_LOGO', None)
+        logo = str(logo) if logo else None
+        pool = self.pool()
+        if pool is None:
+            return pdf.render(kind, reports, logo)
+        return pool.submit(pdf.render, kind, reports, logo).result(timeout=getattr(settings, 'PDF_RENDER_TIMEOUT', 60))
+
+    def get(self, name, version, kind, load):
+        """
+        Path of the cached PDF ``name`` at ``version``.  On a miss ``load()``
+        supplies the serialized reports and the file is rendered and stored.
+        """
+        path = os.path.join(cache_dir(), f'{name}-{version}.pdf')
+        if os.path.exists(path):
+            self.hits += 1
+            return path
+
+        with self._lock:
+            pending = self._rendering.get(path)
+            if pending is None:
+                pending = self._rendering[path] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return pending.result()
+
+        try:
+            data = self.render(kind, load())
+            self.renders += 1
+            fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(data)
+            os.replace(temp, path)
+            for stale in glob.glob(os.path.join(glob.escape(os.path.dirname(path)), f'{glob.escape(name)}-*.pdf')):
+                if stale != path:
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+            pending.set_result(path)
+            return path
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._rendering.pop(path, None)
+
+
+printer = PDFPrinter()
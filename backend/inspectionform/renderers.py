@@ -0,0 +1,55 @@
+"""
+Response renderers, listed in REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].
+
+FastJSONRenderer is DRF's JSONRenderer with orjson doing the encoding when
+it is installed.  A full report (20 items, a ``values`` array per schedule
+row) encodes several times faster.  The output is the same JSON: dates,
+Decimals, lazy strings and numpy scalars go through DRF's own encoder.  Two
+things differ: NaN / Infinity come out as null instead of raising, and
+U+2028 / U+2029 are not escaped.  Indented output (the browsable API,
+``Accept: application/json; indent=4``) is left to DRF.
+
+MessagePackRenderer answers ``Accept: application/msgpack`` (or
+``?format=msgpack``).  settings.py lists it only when the ``msgpack``
+package is installed.
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_encoder = JSONEncoder()
+
+
+def default(obj):
+    """Types the fast encoders leave to us, converted the way DRF's JSONEncoder does"""
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    if orjson is not None:
+        # Datetimes through default() keep DRF's format (milliseconds, "Z")
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=default, option=self.options)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import msgpack
+
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=default, use_bin_type=True, datetime=False)
@@ -0,0 +1,243 @@
+"""
+Pre-aggregated daily quality figures for the dashboard.
+
+Three tables, one row per key:
+
+    DailyQualityRollup   day × customer × part × operation × machine
+                         reports, reports with an NG row, schedule rows,
+                         OK rows, NG rows
+    DailyReportRollup    day × customer × part × operation
+                         reports, reports with an NG row
+    DailyPDIRollup       day × customer × part × operation
+                         PDI reports, reports with an NG item, items, NG items
+
+A report whose rows ran on two machines is one report in DailyReportRollup
+but appears in two DailyQualityRollup rows, so report counts summed across
+machines would count it twice.  The dashboard takes report counts from
+DailyReportRollup unless it filters or groups by machine.
+
+The /api/dashboard/ views read only these tables, so a query costs the same
+with one month of history or ten years.
+
+A rollup row is never adjusted by a delta: when a report is saved or
+deleted, every key it touched (its old key too, if the header moved) is
+recomputed from the source rows and replaced.  Writers call ``mark`` /
+``mark_reports`` inside their transaction; the refresh runs once the
+transaction commits, one aggregate query per table for all keys marked in
+it.  A refresh that fails is logged and leaves its keys stale until the
+next save or ``manage.py rebuild_rollups``.
+"""
+import threading
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, Max, Q
+
+from .models import DailyPDIRollup, DailyQualityRollup, DailyReportRollup, InspectionReport, PDIReport, ScheduleEntry
+from .specs import NG, OK
+
+
+KEY_FIELDS = ('day', 'customer_name', 'part_name', 'operation_name')
+REPORT_KEY = ('date', 'customer_name', 'part_name', 'operation_name')
+PDI_KEY = ('inspection_date', 'customer_name', 'part_name', 'operation_name')
+
+KEYS_PER_QUERY = 100
+REBUILD_WINDOW_DAYS = 31
+
+
+def quality_key(report):
+    return tuple(getattr(report, field) for field in REPORT_KEY)
+
+
+def pdi_key(report):
+    return tuple(getattr(report, field) for field in PDI_KEY)
+
+
+# ══════════════════════════════════════════
+#  AGGREGATION
+# ══════════════════════════════════════════
+
+def key_filter(keys, fields):
+    match = Q()
+    for key in keys:
+        match |= Q(**dict(zip(fields, key)))
+    return match
+
+
+def quality_rows(match):
+    """DailyQualityRollup objects for the schedule rows matching ``match``"""
+    ng = Q(judgment=NG)
+    rows = (
+        ScheduleEntry.objects.filter(match)
+        .values('machine_no', day=F('report__date'), customer_name=F('report__customer_name'),
+                part_name=F('report__part_name'), operation_name=F('report__operation_name'))
+        .annotate(
+            reports=Count('report_id', distinct=True),
+            ng_reports=Count('report_id', filter=ng, distinct=True),
+            rows=Count('id'),
+            ok_rows=Count('id', filter=Q(judgment=OK)),
+            ng_rows=Count('id', filter=ng),
+        )
+        .order_by()
+    )
+    return [DailyQualityRollup(**row) for row in rows]
+
+
+def report_rows(match):
+    """
+    DailyReportRollup objects for the inspection reports matching ``match``,
+    counted from the reports themselves so one without schedule rows counts too
+    """
+    rows = (
+        InspectionReport.objects.filter(match)
+        .values('customer_name', 'part_name', 'operation_name', day=F('date'))
+        .annotate(
+            reports=Count('id', distinct=True),
+            ng_reports=Count('id', filter=Q(schedule_entries__judgment=NG), distinct=True),
+        )
+        .order_by()
+    )
+    return [DailyReportRollup(**row) for row in rows]
+
+
+def pdi_rows(match):
+    """DailyPDIRollup objects for the PDI reports matching ``match``"""
+    ng = Q(items__cust_judge__iexact=NG) | Q(items__vendor_judge__iexact=NG)
+    rows = (
+        PDIReport.objects.filter(match)
+        .values('customer_name', 'part_name', 'operation_name', day=F('inspection_date'))
+        .annotate(
+            reports=Count('id', distinct=True),
+            ng_reports=Count('id', filter=ng, distinct=True),
+            # "items" itself would shadow the relation the filter joins through
+            item_count=Count('items'),
+            ng_item_count=Count('items', filter=ng),
+        )
+        .order_by()
+    )
+    return [
+        DailyPDIRollup(items=row.pop('item_count'), ng_items=row.pop('ng_item_count'), **row)
+        for row in rows
+    ]
+
+
+def replace(model, stale, rows):
+    """Swap the rollup rows matching ``stale`` for ``rows``; returns how many were written"""
+    for attempt in (1, 2):
+        try:
+            with transaction.atomic():
+                model.objects.filter(stale).delete()
+                model.objects.bulk_create(rows)
+            return len(rows)
+        except IntegrityError:
+            # Another refresh of the same key committed between our DELETE
+            # and INSERT; its rows are as fresh as ours, so replace them.
+            if attempt == 2:
+                raise
+    return 0
+
+
+def refresh_quality(keys):
+    written = 0
+    keys = sorted(set(keys), key=str)
+    for start in range(0, len(keys), KEYS_PER_QUERY):
+        chunk = keys[start:start + KEYS_PER_QUERY]
+        source = key_filter(chunk, ['report__' + field for field in REPORT_KEY])
+        stale = key_filter(chunk, KEY_FIELDS)
+        written += replace(DailyQualityRollup, stale, quality_rows(source))
+        replace(DailyReportRollup, stale, report_rows(key_filter(chunk, REPORT_KEY)))
+    return written
+
+
+def refresh_pdi(keys):
+    written = 0
+    keys = sorted(set(keys), key=str)
+    for start in range(0, len(keys), KEYS_PER_QUERY):
+        chunk = keys[start:start + KEYS_PER_QUERY]
+        written += replace(DailyPDIRollup, key_filter(chunk, KEY_FIELDS), pdi_rows(key_filter(chunk, PDI_KEY)))
+    return written
+
+
+# ══════════════════════════════════════════
+#  REFRESH ON SAVE
+# ══════════════════════════════════════════
+
+_pending = threading.local()
+
+
+def pending():
+    if not hasattr(_pending, 'quality'):
+        _pending.quality, _pending.pdi = set(), set()
+    return _pending
+
+
+def flush():
+    """Refresh every key marked so far on this thread"""
+    marked = pending()
+    quality, pdi = marked.quality, marked.pdi
+    marked.quality, marked.pdi = set(), set()
+    if quality:
+        refresh_quality(quality)
+    if pdi:
+        refresh_pdi(pdi)
+
+
+def mark(quality=(), pdi=()):
+    """
+    Queue rollup keys for a refresh when the current transaction commits.
+    Keys left behind by a rolled-back transaction are refreshed with the next
+    commit — recomputing a key that did not change is harmless.  Every call
+    registers its own callback: a rollback discards the callbacks registered
+    in it but not the pending keys, so "nothing new marked" is no proof that
+    a flush is still queued.  Extra callbacks find the set empty.
+    """
+    marked = pending()
+    marked.quality.update(quality)
+    marked.pdi.update(pdi)
+    if marked.quality or marked.pdi:
+        transaction.on_commit(flush, robust=True)
+
+
+def mark_reports(report_ids):
+    """mark() the keys of these inspection reports, as they stand now"""
+    if report_ids:
+        mark(quality=InspectionReport.objects.filter(pk__in=report_ids).values_list(*REPORT_KEY))
+
+
+# ══════════════════════════════════════════
+#  FULL REBUILD
+# ══════════════════════════════════════════
+
+def date_bounds():
+    reports = InspectionReport.objects.aggregate(first=Min('date'), last=Max('date'))
+    pdi = PDIReport.objects.aggregate(first=Min('inspection_date'), last=Max('inspection_date'))
+    firsts = [day for day in (reports['first'], pdi['first']) if day is not None]
+    lasts = [day for day in (reports['last'], pdi['last']) if day is not None]
+    return (min(firsts), max(lasts)) if firsts else (None, None)
+
+
+def rebuild(date_from=None, date_to=None, progress=None):
+    """
+    Recompute the tables for every day in [date_from, date_to] (default:
+    all history), REBUILD_WINDOW_DAYS at a time.  Returns (quality rows,
+    PDI rows) written.
+    ``progress(window_end, quality, pdi)`` is called after every window.
+    """
+    first, last = date_bounds()
+    date_from = date_from or first
+    date_to = date_to or last
+    quality = pdi = 0
+    if date_from is None or date_to is None:
+        return quality, pdi
+
+    start = date_from
+    while start <= date_to:
+        end = min(start + timedelta(days=REBUILD_WINDOW_DAYS - 1), date_to)
+        source = Q(report__date__range=(start, end))
+        quality += replace(DailyQualityRollup, Q(day__range=(start, end)), quality_rows(source))
+        replace(DailyReportRollup, Q(day__range=(start, end)), report_rows(Q(date__range=(start, end))))
+        pdi += replace(DailyPDIRollup, Q(day__range=(start, end)), pdi_rows(Q(inspection_date__range=(start, end))))
+        if progress is not None:
+            progress(end, quality, pdi)
+        start = end + timedelta(days=1)
+    return quality, pdi
@@ -0,0 +1,453 @@
+"""
+/api/search/?q= — prefix and typo-tolerant lookup of inspection and PDI
+reports by part name / number, operation, customer, invoice number,
+operator, machine number and item name.
+
+A query is split into words; a report matches when every word matches one of
+its values, either
+
+    exactly          "shaft"    → SHAFT
+    as a prefix      "hou"      → HOUSING A1
+    with typos       "hosuing"  → HOUSING A1   (1 edit from 4 letters, 2 from 8;
+                                                 none in words with digits)
+
+and hits are ranked by how closely their words match, newest first on ties.
+Part numbers are also indexed with their punctuation squeezed out, so
+"kg01001" finds KG-01001.
+
+Two backends share that ranking (settings.SEARCH_BACKEND, a dotted path;
+default picked by database vendor):
+
+PostgresSearch
+    One query per kind finds the documents matching every word: per word,
+    the ids of all rows whose lower(column) passes pg_trgm's "word
+    similarity" test (GiST indexes of migration 0015), joined on the document
+    and ordered by summed similarity, newest first.  A common item name can
+    match thousands of reports; intersecting in SQL keeps every one of them
+    in play.  The best CANDIDATES_PER_HIT × limit are then re-scored in
+    Python with the shared ranking.
+
+MemoryIndex
+    For SQLite and other databases: an inverted index (word → reports) with a
+    sorted word list for prefixes and a trigram → word map for typos, kept in
+    process.  It is built on first use and then follows the tables the way
+    /api/sync/ does — rows whose updated_at moved, plus tombstones — at most
+    every SEARCH_REFRESH_SECONDS.
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import InspectionItem, InspectionReport, PDIItem, PDIReport, ScheduleEntry, Tombstone
+from .sync import overlap, retention
+
+
+SOURCES = [
+    # kind, model, document id column, searchable fields
+    ('report', InspectionReport, 'id',
+     ('part_name', 'part_number', 'operation_name', 'customer_name', 'prepared_by', 'approved_by')),
+    ('report', InspectionItem, 'report_id', ('item',)),
+    ('report', ScheduleEntry, 'report_id', ('operator', 'machine_no')),
+    ('pdi_report', PDIReport, 'id',
+     ('part_name', 'part_no', 'operation_name', 'customer_name', 'invoice_no', 'inspected_by')),
+    ('pdi_report', PDIItem, 'report_id', ('item',)),
+]
+KINDS = ('report', 'pdi_report')
+TOMBSTONE_KINDS = {
+    'report': 'report', 'item': 'report', 'schedule_entry': 'report',
+    'pdi_report': 'pdi_report', 'pdi_item': 'pdi_report',
+}
+
+MAX_QUERY_WORDS = 6
+MAX_EXPANSIONS = 200      # words one prefix or typo may expand to
+MAX_MATCHES = 5           # matched values shown per hit
+CANDIDATES_PER_HIT = 5    # Postgres: documents re-scored in Python per hit asked for
+WORD = re.compile(r'[0-9a-z]+')
+
+
+# ══════════════════════════════════════════
+#  WORDS AND SCORES
+# ══════════════════════════════════════════
+
+def words(value):
+    """Index words of one value: its alphanumeric runs, plus the runs joined when only punctuation separates them"""
+    value = (value or '').lower()
+    found = WORD.findall(value)
+    if len(found) > 1 and not any(ch.isspace() for ch in value):
+        found.append(''.join(found))
+    return found
+
+
+def allowed_typos(word):
+    # Numbers (part, invoice, machine) are codes: "0200" must not find 0100
+    if len(word) < 4 or any(ch.isdigit() for ch in word):
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def trigrams(word):
+    # Leading padding only, so a word's trigrams are a subset of those of any longer word it prefixes
+    padded = '  ' + word
+    return {padded[i:i + 3] for i in range(len(word))}
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, or limit + 1 once it is certainly larger"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def word_score(query, word):
+    """How well one indexed word matches one query word, 0 for no match"""
+    if word == query:
+        return 1.0
+    if word.startswith(query):
+        return 0.5 + 0.4 * len(query) / len(word)
+    typos = allowed_typos(query)
+    if not typos:
+        return 0.0
+    distance = edit_distance(query, word, typos)
+    if distance <= typos:
+        return 0.6 - 0.15 * distance
+    # A typo in what has been typed so far of a longer word
+    distance = edit_distance(query, word[:len(query)], typos)
+    if distance <= typos:
+        return 0.4 - 0.1 * distance
+    return 0.0
+
+
+def value_score(query, value):
+    return max((word_score(query, word) for word in words(value)), default=0.0)
+
+
+def combine(per_word, limit, describe):
+    """
+    per_word: one {doc: (score, what matched)} per query word.  Docs matching
+    every word, best first: [{kind, id, score, matches}], where
+    ``describe(doc, [what matched, ...])`` names the (field, value) pairs —
+    called for the returned hits only.
+    """
+    if not per_word:
+        return []
+    docs = set(per_word[0])
+    for found in per_word[1:]:
+        docs &= found.keys()
+    # Best score first; on ties inspection reports before PDI, newest first
+    ranked = heapq.nsmallest(limit, (
+        (-sum(found[doc][0] for found in per_word) / len(per_word), KINDS.index(doc[0]), -doc[1])
+        for doc in docs
+    ))
+    hits = []
+    for score, kind_order, doc_id in ranked:
+        doc = (KINDS[kind_order], -doc_id)
+        matches = sorted(describe(doc, [found[doc][1] for found in per_word]))[:MAX_MATCHES]
+        hits.append({'kind': doc[0], 'id': doc[1], 'score': round(-score, 3),
+                     'matches': [{'field': field, 'value': value} for field, value in matches]})
+    return hits
+
+
+def query_words(query):
+    return list(dict.fromkeys(WORD.findall(query.lower())))[:MAX_QUERY_WORDS]
+
+
+# ══════════════════════════════════════════
+#  IN-PROCESS INVERTED INDEX
+# ══════════════════════════════════════════
+
+class MemoryIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._docs = {}          # (kind, id) -> {(field, value)}
+            self._postings = {}      # word -> {(kind, id)}
+            self._words = []         # sorted keys of _postings
+            self._trigrams = {}      # trigram -> {word}
+            self._built_at = None
+            self._checked_at = None
+            self._checked = 0.0
+
+    # ── maintenance ──
+
+    def add_word(self, word):
+        bisect.insort(self._words, word)
+        for trigram in trigrams(word):
+            self._trigrams.setdefault(trigram, set()).add(word)
+
+    def drop_word(self, word):
+        index = bisect.bisect_left(self._words, word)
+        del self._words[index]
+        for trigram in trigrams(word):
+            bucket = self._trigrams[trigram]
+            bucket.discard(word)
+            if not bucket:
+                del self._trigrams[trigram]
+
+    def load(self, kind, model, doc_column, fields, ids=None):
+        rows = model.objects.order_by()
+        if ids is not None:
+            rows = rows.filter(**{f'{doc_column}__in': ids})
+        for doc_id, *values in rows.values_list(doc_column, *fields).iterator(chunk_size=5000):
+            entries = self._docs.setdefault((kind, doc_id), set())
+            for field, value in zip(fields, values):
+                if value:
+                    entries.add((field, value))
+
+    def post(self, docs):
+        new_words = set()
+        for doc in docs:
+            for field, value in self._docs.get(doc, ()):
+                for word in words(value):
+                    posting = self._postings.get(word)
+                    if posting is None:
+                        posting = self._postings[word] = set()
+                        new_words.add(word)
+                    posting.add(doc)
+        return new_words
+
+    def build(self):
+        self.invalidate()
+        started = timezone.now()
+        for source in SOURCES:
+            self.load(*source)
+        self.post(list(self._docs))
+        self._words = sorted(self._postings)
+        for word in self._words:
+            for trigram in trigrams(word):
+                self._trigrams.setdefault(trigram, set()).add(word)
+        self._built_at = self._checked_at = started
+
+    def reindex(self, touched):
+        """Re-read the given {kind: ids} documents from the database"""
+        for kind, ids in touched.items():
+            for doc_id in ids:
+                doc = (kind, doc_id)
+                for field, value in self._docs.pop(doc, ()):
+                    for word in words(value):
+                        posting = self._postings.get(word)
+                        if posting is None:
+                            continue
+                        posting.discard(doc)
+                        if not posting:
+                            del self._postings[word]
+                            self.drop_word(word)
+        for kind, model, doc_column, fields in SOURCES:
+            ids = list(touched.get(kind, ()))
+            for start in range(0, len(ids), 500):
+                self.load(kind, model, doc_column, fields, ids[start:start + 500])
+        docs = [(kind, doc_id) for kind, ids in touched.items() for doc_id in ids]
+        for word in self.post(docs):
+            self.add_word(word)
+
+    def refresh(self):
+        with self._lock:
+            now = timezone.now()
+            if self._built_at is None or now - self._checked_at > retention():
+                self.build()
+                self._checked = time.monotonic()
+                return
+            if time.monotonic() - self._checked < getattr(settings, 'SEARCH_REFRESH_SECONDS', 2):
+                return
+            start = self._checked_at - overlap()
+            touched = {kind: set() for kind in KINDS}
+            for kind, model, doc_column, fields in SOURCES:
+                touched[kind].update(model.objects.filter(updated_at__gte=start).values_list(doc_column, flat=True))
+            for name, report_id in Tombstone.objects.filter(deleted_at__gte=start).values_list('model', 'report_id'):
+                if name in TOMBSTONE_KINDS and report_id is not None:
+                    touched[TOMBSTONE_KINDS[name]].add(report_id)
+            self.reindex(touched)
+            self._checked_at = now
+            self._checked = time.monotonic()
+
+    # ── lookup ──
+
+    def expand(self, query):
+        """{indexed word: score} for one query word"""
+        found = {}
+        start = bisect.bisect_left(self._words, query)
+        end = bisect.bisect_left(self._words, query + '\uffff')
+        prefixed = self._words[start:end]
+        if len(prefixed) > MAX_EXPANSIONS:
+            prefixed = sorted(prefixed, key=len)[:MAX_EXPANSIONS]
+        for word in prefixed:
+            found[word] = word_score(query, word)
+
+        typos = allowed_typos(query)
+        if typos:
+            wanted = trigrams(query)
+            shared = Counter()
+            for trigram in wanted:
+                shared.update(self._trigrams.get(trigram, ()))
+            # One edit breaks at most three of the query's trigrams, a transposition four
+            needed = max(1, len(wanted) - 4 * typos)
+            candidates = [word for word, count in shared.items() if count >= needed and word not in found]
+            candidates.sort(key=lambda word: -shared[word])
+            for word in candidates[:MAX_EXPANSIONS * 5]:
+                score = word_score(query, word)
+                if score:
+                    found[word] = score
+        return found
+
+    def search(self, query, limit):
+        self.refresh()
+        per_word = []
+        with self._lock:
+            for query_word in query_words(query):
+                docs = {}
+                for word, score in self.expand(query_word).items():
+                    for doc in self._postings[word]:
+                        best = docs.get(doc)
+                        if best is None or score > best[0]:
+                            docs[doc] = (score, word)
+                per_word.append(docs)
+            return combine(per_word, limit, self.describe)
+
+    def describe(self, doc, matched_words):
+        return {(field, value) for field, value in self._docs[doc] if set(matched_words) & set(words(value))}
+
+    def stats(self):
+        with self._lock:
+            return {'documents': len(self._docs), 'words': len(self._words), 'built_at': self._built_at}
+
+
+# ══════════════════════════════════════════
+#  POSTGRES (pg_trgm)
+# ══════════════════════════════════════════
+
+class PostgresSearch:
+    """Needs the pg_trgm extension and the GiST indexes of migration 0015"""
+
+    similarity_threshold = 0.3    # pg_trgm's default of 0.6 misses most typos
+    headers = {'report': (InspectionReport, 'date'), 'pdi_report': (PDIReport, 'inspection_date')}
+
+    def invalidate(self):
+        pass
+
+    def matching(self, kind, query_word):
+        """SQL for (doc, similarity) of every row of this kind whose column passes word similarity"""
+        parts, params = [], []
+        for source_kind, model, doc_column, fields in SOURCES:
+            if source_kind != kind:
+                continue
+            for field in fields:
+                column = model._meta.get_field(field).column
+                # <% is word similarity: the query against the best-matching stretch of the value
+                parts.append(
+                    f'SELECT "{doc_column}" AS doc, word_similarity(%s, lower("{column}")) AS similarity '
+                    f'FROM "{model._meta.db_table}" WHERE %s <%% lower("{column}")'
+                )
+                params += [query_word, query_word]
+        sql = f'SELECT doc, max(similarity) AS similarity FROM ({" UNION ALL ".join(parts)}) found GROUP BY doc'
+        return sql, params
+
+    def candidates(self, cursor, kind, wanted, limit):
+        """Ids of the documents matching every word, best summed similarity first, then newest"""
+        model, date_field = self.headers[kind]
+        ctes, joins, params = [], [], []
+        for index, query_word in enumerate(wanted):
+            sql, word_params = self.matching(kind, query_word)
+            ctes.append(f'w{index} AS ({sql})')
+            joins.append(f'JOIN w{index} ON w{index}.doc = h."id"')
+            params += word_params
+        score = ' + '.join(f'w{index}.similarity' for index in range(len(wanted)))
+        date_column = model._meta.get_field(date_field).column
+        cursor.execute(
+            f'WITH {", ".join(ctes)} SELECT h."id" FROM "{model._meta.db_table}" h {" ".join(joins)} '
+            f'ORDER BY {score} DESC, h."{date_column}" DESC NULLS LAST, h."id" DESC LIMIT %s',
+            params + [limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def values(self, kind, ids):
+        """{(kind, id): {(field, value)}} — every searchable value of these documents"""
+        docs = {(kind, doc_id): set() for doc_id in ids}
+        for source_kind, model, doc_column, fields in SOURCES:
+            if source_kind != kind or not ids:
+                continue
+            rows = model.objects.filter(**{f'{doc_column}__in': ids}).order_by()
+            for doc_id, *values in rows.values_list(doc_column, *fields):
+                docs[(kind, doc_id)].update((field, value) for field, value in zip(fields, values) if value)
+        return docs
+
+    def search(self, query, limit):
+        wanted = query_words(query)
+        if not wanted:
+            return []
+        docs = {}
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)",
+                           [str(self.similarity_threshold)])
+            for kind in KINDS:
+                docs.update(self.values(kind, self.candidates(cursor, kind, wanted, limit * CANDIDATES_PER_HIT)))
+
+        per_word = []
+        for query_word in wanted:
+            found = {}
+            for doc, values in docs.items():
+                for field, value in values:
+                    score = value_score(query_word, value)
+                    if not score:
+                        continue
+                    best = found.get(doc)
+                    if best is None or score > best[0]:
+                        found[doc] = (score, {(field, value)})
+                    elif score == best[0]:
+                        best[1].add((field, value))
+            per_word.append(found)
+        return combine(per_word, limit, lambda doc, matched: set().union(*matched))
+
+    def stats(self):
+        return {}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, 'SEARCH_BACKEND', None)
+                if not path:
+                    path = ('inspectionform.search.PostgresSearch' if connection.vendor == 'postgresql'
+                            else 'inspectionform.search.MemoryIndex')
+                _backend = import_string(path)()
+    return _backend
+
+
+def search(query, limit=20):
+    """Ranked hits with the header of each report: [{kind, id, score, matches, report}]"""
+    hits = get_backend().search(query, limit)
+    headers = {
+        'report': InspectionReport.objects.filter(pk__in=[h['id'] for h in hits if h['kind'] == 'report']).values(
+            'id', 'date', 'part_name', 'part_number', 'operation_name', 'customer_name'),
+        'pdi_report': PDIReport.objects.filter(pk__in=[h['id'] for h in hits if h['kind'] == 'pdi_report']).values(
+            'id', 'inspection_date', 'part_name', 'part_no', 'operation_name', 'customer_name', 'invoice_no'),
+    }
+    found = {(kind, row['id']): row for kind, rows in headers.items() if any(h['kind'] == kind for h in hits) for row in rows}
+    # A report deleted since the index last looked is dropped here
+    return [dict(hit, report=found[(hit['kind'], hit['id'])]) for hit in hits if (hit['kind'], hit['id']) in found]
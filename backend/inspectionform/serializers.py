@@ -1,5 +1,75 @@
+import pytz
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import serializers
-from .models import InspectionReport, InspectionItem, ScheduleEntry, PDIReport, PDIItem
+from .models import (
+    InspectionReport, InspectionItem, ScheduleEntry, PDIReport, PDIItem, ImportJob,
+    LEGACY_VALUE_COLUMNS, compact_values,
+)
+from .events import publish_entries
+from . import rollups
+from .specs import judge_entries, rejudge_reports
+
+
+IST = pytz.timezone('Asia/Kolkata')
+
+
+def now_ist():
+    return timezone.now().astimezone(IST)
+
+
+def clean_item(item_data):
+    item_data = dict(item_data)
+    item_data.pop('id', None)
+    return item_data
+
+
+def clean_entry(entry_data):
+    entry_data = dict(entry_data)
+    for key in ('id', '_isNew'):
+        entry_data.pop(key, None)
+    return entry_data
+
+
+def sync_items(model, report, items_data):
+    """
+    Bring report.items in line with items_data, matched on sr_no.
+
+    Unchanged rows are left alone, edited rows are bulk-updated on just the
+    changed columns, new sr_nos are inserted and missing ones deleted.
+    Returns the number of rows created / updated / deleted.
+    """
+    existing = {item.sr_no: item for item in report.items.all()}
+    incoming = {}
+    for item_data in items_data:
+        item_data = clean_item(item_data)
+        incoming[item_data['sr_no']] = item_data
+
+    to_create, to_update, changed_fields = [], [], set()
+    for sr_no, item_data in incoming.items():
+        item = existing.pop(sr_no, None)
+        if item is None:
+            to_create.append(model(report=report, **item_data))
+            continue
+        changed = [field for field, value in item_data.items() if getattr(item, field) != value]
+        if changed:
+            for field in changed:
+                setattr(item, field, item_data[field])
+            changed_fields.update(changed)
+            to_update.append(item)
+
+    if existing:
+        model.objects.filter(pk__in=[item.pk for item in existing.values()]).delete()
+    if to_update:
+        # bulk_update skips auto_now, so stamp updated_at for /api/sync/ by hand
+        now = timezone.now()
+        for item in to_update:
+            item.updated_at = now
+        model.objects.bulk_update(to_update, sorted(changed_fields) + ['updated_at'])
+    model.objects.bulk_create(to_create)
+
+    return {'created': len(to_create), 'updated': len(to_update), 'deleted': len(existing)}
 
 
 class InspectionItemSerializer(serializers.ModelSerializer):
@@ -8,30 +78,71 @@ class InspectionItemSerializer(serializers.ModelSerializer):
         fields = ['sr_no', 'item', 'special_char', 'spec', 'tolerance', 'inst']
 
 
-class ScheduleEntrySerializer(serializers.ModelSerializer):
-    values = serializers.SerializerMethodField(read_only=True)
-
+class ScheduleValuesSerializer(serializers.ModelSerializer):
+    """
+    Measurements travel as one `values` array.
+
+    value_1 .. value_20 are still accepted on write for clients built before
+    the array existed, and are added to the output only when the request asks
+    for ?legacy_values=1.
+    """
+    values = serializers.ListField(
+        child=serializers.CharField(allow_blank=True, max_length=50),
+        required=False,
+    )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for n in range(1, LEGACY_VALUE_COLUMNS + 1):
+            fields[f'value_{n}'] = serializers.CharField(
+                write_only=True, required=False, allow_blank=True, max_length=50
+            )
+        return fields
+
+    def legacy_values_requested(self):
+        request = self.context.get('request')
+        return request is not None and request.query_params.get('legacy_values') in ('1', 'true')
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        legacy = {}
+        for n in range(1, LEGACY_VALUE_COLUMNS + 1):
+            if f'value_{n}' in attrs:
+                legacy[n] = attrs.pop(f'value_{n}')
+
+        if legacy:
+            if 'values' in attrs:
+                values = list(attrs['values'])
+            elif isinstance(self.instance, ScheduleEntry):
+                values = list(self.instance.values)
+            else:
+                values = []
+            values += [''] * (max(legacy) - len(values))
+            for n, value in legacy.items():
+                values[n - 1] = value
+            attrs['values'] = values
+
+        if 'values' in attrs:
+            attrs['values'] = compact_values(attrs['values'])
+        return attrs
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.legacy_values_requested():
+            values = data.get('values') or []
+            for n in range(1, max(LEGACY_VALUE_COLUMNS, len(values)) + 1):
+                data[f'value_{n}'] = values[n - 1] if n <= len(values) else ''
+        return data
+
+
+class ScheduleEntrySerializer(ScheduleValuesSerializer):
     class Meta:
         model = ScheduleEntry
         fields = [
             'id', 'sr', 'row_order', 'slot_index', 'date', 'operator', 'machine_no', 'time_type',
-            'value_1',  'value_2',  'value_3',  'value_4',
-            'value_5',  'value_6',  'value_7',  'value_8',
-            'value_9',  'value_10', 'value_11', 'value_12',
-            'value_13', 'value_14',
-            'value_15', 'value_16', 'value_17', 'value_18', 'value_19', 'value_20',
             'values', 'judgment', 'signature', 'filled_at'
         ]
 
-    def get_values(self, obj):
-        return [
-            obj.value_1,  obj.value_2,  obj.value_3,  obj.value_4,
-            obj.value_5,  obj.value_6,  obj.value_7,  obj.value_8,
-            obj.value_9,  obj.value_10, obj.value_11, obj.value_12,
-            obj.value_13, obj.value_14, obj.value_15, obj.value_16,
-            obj.value_17, obj.value_18, obj.value_19, obj.value_20,
-        ]
-
 
 class InspectionReportSerializer(serializers.ModelSerializer):
     items = InspectionItemSerializer(many=True, read_only=True)
@@ -43,28 +154,52 @@ class InspectionReportSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'doc_no', 'revision_no', 'date',
             'part_name', 'part_number', 'operation_name', 'customer_name',
-            'prepared_by', 'approved_by',
+            'prepared_by', 'approved_by', 'version',
             'items', 'schedule_entries', 'item_count',
         ]
 
     def get_item_count(self, obj):
-        return obj.items.count()
+        # Annotated by InspectionReportViewSet; freshly saved reports fall back to a COUNT
+        item_count = getattr(obj, 'item_count', None)
+        if item_count is None:
+            item_count = obj.items.count()
+        return item_count
+
+
+class InspectionReportSummarySerializer(serializers.ModelSerializer):
+    """Header-only list representation — no nested items or schedule entries"""
+    item_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = InspectionReport
+        fields = [
+            'id', 'doc_no', 'revision_no', 'date',
+            'part_name', 'part_number', 'operation_name', 'customer_name',
+            'prepared_by', 'approved_by', 'version', 'item_count',
+        ]
 
 
-class ScheduleEntryWriteSerializer(serializers.ModelSerializer):
+class ScheduleEntryWriteSerializer(ScheduleValuesSerializer):
     class Meta:
         model = ScheduleEntry
         fields = [
             'sr', 'row_order', 'slot_index', 'date', 'operator', 'machine_no', 'time_type',
-            'value_1',  'value_2',  'value_3',  'value_4',
-            'value_5',  'value_6',  'value_7',  'value_8',
-            'value_9',  'value_10', 'value_11', 'value_12',
-            'value_13', 'value_14',
-            'value_15', 'value_16', 'value_17', 'value_18', 'value_19', 'value_20',
-            'judgment', 'signature', 'filled_at',
+            'values', 'judgment', 'signature', 'filled_at',
         ]
 
 
+SCHEDULE_WRITE_FIELDS = list(ScheduleEntryWriteSerializer.Meta.fields)
+
+
+class VersionConflict(Exception):
+    """The report changed since the client read it (optimistic concurrency)"""
+
+    def __init__(self, report_id, expected):
+        super().__init__(f'Report {report_id} is no longer at version {expected}.')
+        self.report_id = report_id
+        self.expected = expected
+
+
 class InspectionReportCreateSerializer(serializers.ModelSerializer):
     items = InspectionItemSerializer(many=True, required=False)
     schedule_entries = ScheduleEntryWriteSerializer(many=True, required=False)
@@ -78,77 +213,110 @@ class InspectionReportCreateSerializer(serializers.ModelSerializer):
             'items', 'schedule_entries',
         ]
 
+    @transaction.atomic
     def create(self, validated_data):
         items_data    = validated_data.pop('items', [])
         schedule_data = validated_data.pop('schedule_entries', [])
         report = InspectionReport.objects.create(**validated_data)
 
-        for item_data in items_data:
-            item_data.pop('id', None)
-            InspectionItem.objects.create(report=report, **item_data)
-
-        from django.utils import timezone
-        import pytz
-        ist = pytz.timezone('Asia/Kolkata')
+        items = InspectionItem.objects.bulk_create([
+            InspectionItem(report=report, **clean_item(item_data)) for item_data in items_data
+        ])
 
+        filled_at = now_ist()
+        entries = []
         for entry_data in schedule_data:
-            entry_data.pop('id', None)
-            entry_data.pop('values', None)
-            entry_data.pop('_isNew', None)
+            entry_data = clean_entry(entry_data)
             if not entry_data.get('filled_at'):
-                entry_data['filled_at'] = timezone.now().astimezone(ist)
-            ScheduleEntry.objects.create(report=report, **entry_data)
+                entry_data['filled_at'] = filled_at
+            entries.append(ScheduleEntry(report=report, **entry_data))
+        judge_entries(entries, items)
+        ScheduleEntry.objects.bulk_create(entries)
+        publish_entries(entries, 'created')
+        rollups.mark(quality=[rollups.quality_key(report)])
 
         return report
 
+    @transaction.atomic
     def update(self, instance, validated_data):
+        """
+        Saves only if the report is still at the version the client edited
+        (context "expected_version", else the version just loaded): one
+        conditional UPDATE, no row lock taken up front.  A lost race raises
+        VersionConflict and the whole save rolls back.
+        """
         items_data    = validated_data.pop('items', None)
         schedule_data = validated_data.pop('schedule_entries', None)
+        expected = self.context.get('expected_version', instance.version)
+        old_key = rollups.quality_key(instance)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
-
+        instance.updated_at = timezone.now()
+        claimed = InspectionReport.objects.filter(pk=instance.pk, version=expected).update(
+            version=F('version') + 1, updated_at=instance.updated_at, **validated_data,
+        )
+        if not claimed:
+            raise VersionConflict(instance.pk, expected)
+        instance.version = expected + 1
+
+        item_changes = None
         if items_data is not None:
-            instance.items.all().delete()
-            for item_data in items_data:
-                item_data.pop('id', None)
-                InspectionItem.objects.create(report=instance, **item_data)
+            item_changes = sync_items(InspectionItem, instance, items_data)
 
         if schedule_data is not None:
-            for entry_data in schedule_data:
-                entry_data.pop('id', None)
-                entry_data.pop('values', None)
-                entry_data.pop('_isNew', None)
-
-                slot_index = entry_data.get('slot_index', 0)
-                row_order  = entry_data.get('row_order', 0)
-
-                existing = instance.schedule_entries.filter(
-                    slot_index=slot_index,
-                    row_order=row_order
-                ).first()
-
-                if existing:
-                    for field, value in entry_data.items():
-                        if field == 'date' and not value:
-                            continue
-                        if field == 'filled_at' and not value:
-                            continue
-                        setattr(existing, field, value)
-                    if entry_data.get('filled_at'):
-                        existing.filled_at = entry_data['filled_at']
-                    existing.save()
-                else:
-                    if not entry_data.get('filled_at'):
-                        from django.utils import timezone
-                        import pytz
-                        ist = pytz.timezone('Asia/Kolkata')
-                        entry_data['filled_at'] = timezone.now().astimezone(ist)
-                    ScheduleEntry.objects.create(report=instance, **entry_data)
+            self.save_schedule_entries(instance, schedule_data)
+        elif item_changes and any(item_changes.values()):
+            rejudge_reports([instance.pk], bump_version=False)   # the UPDATE above bumped it already
+        rollups.mark(quality=[old_key, rollups.quality_key(instance)])
 
         return instance
 
+    def save_schedule_entries(self, instance, schedule_data):
+        # One SELECT for every existing row, keyed the same way the form addresses them
+        existing = {}
+        for entry in instance.schedule_entries.all():
+            existing.setdefault((entry.slot_index, entry.row_order), entry)
+
+        to_update, to_create = {}, []
+        filled_at = now_ist()
+        for entry_data in schedule_data:
+            entry_data = clean_entry(entry_data)
+            key = (entry_data.get('slot_index', 0), entry_data.get('row_order', 0))
+            entry = existing.get(key)
+
+            if entry is not None:
+                changed = False
+                for field, value in entry_data.items():
+                    if field in ('date', 'filled_at') and not value:
+                        continue
+                    if getattr(entry, field) != value:
+                        setattr(entry, field, value)
+                        changed = True
+                # Untouched rows keep their updated_at, so /api/sync/ only ships real edits
+                if changed and entry.pk is not None:
+                    to_update[entry.pk] = entry
+            else:
+                if not entry_data.get('filled_at'):
+                    entry_data['filled_at'] = filled_at
+                entry = ScheduleEntry(report=instance, **entry_data)
+                existing[key] = entry
+                to_create.append(entry)
+
+        # Re-judge every row, not just the posted ones — the specs may have changed too
+        for entry in judge_entries(list(existing.values()), instance.items.all()):
+            if entry.pk is not None:
+                to_update[entry.pk] = entry
+
+        if to_update:
+            now = timezone.now()
+            for entry in to_update.values():
+                entry.updated_at = now
+            ScheduleEntry.objects.bulk_update(to_update.values(), SCHEDULE_WRITE_FIELDS + ['updated_at'])
+        ScheduleEntry.objects.bulk_create(to_create)
+        publish_entries(to_update.values(), 'updated')
+        publish_entries(to_create, 'created')
+
 
 # ══════════════════════════════════════════
 #  PDI REPORT SERIALIZERS
@@ -181,6 +349,21 @@ class PDIReportSerializer(serializers.ModelSerializer):
         ]
 
 
+class PDIReportSummarySerializer(serializers.ModelSerializer):
+    """Header-only list representation — no nested items"""
+
+    class Meta:
+        model = PDIReport
+        fields = [
+            'id', 'page_no',
+            'supplier_name', 'part_no', 'inspection_date', 'customer_name',
+            'part_name', 'invoice_no', 'lot_qty',
+            'operation_name',
+            'supplier_remarks', 'inspected_by', 'verified_by', 'approved_by',
+            'created_at',
+        ]
+
+
 class PDIReportCreateSerializer(serializers.ModelSerializer):
     """Write serializer — create/update with items"""
     items = PDIItemSerializer(many=True, required=False)
@@ -196,25 +379,40 @@ class PDIReportCreateSerializer(serializers.ModelSerializer):
             'items',
         ]
 
+    @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop('items', [])
         report = PDIReport.objects.create(**validated_data)
-        for item_data in items_data:
-            item_data.pop('id', None)
-            PDIItem.objects.create(report=report, **item_data)
+        PDIItem.objects.bulk_create([
+            PDIItem(report=report, **clean_item(item_data)) for item_data in items_data
+        ])
+        rollups.mark(pdi=[rollups.pdi_key(report)])
         return report
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         items_data = validated_data.pop('items', None)
+        old_key = rollups.pdi_key(instance)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
 
         if items_data is not None:
-            instance.items.all().delete()
-            for item_data in items_data:
-                item_data.pop('id', None)
-                PDIItem.objects.create(report=instance, **item_data)
+            sync_items(PDIItem, instance, items_data)
+        rollups.mark(pdi=[old_key, rollups.pdi_key(instance)])
+
+        return instance
+
+# ══════════════════════════════════════════
+#  BULK IMPORT
+# ══════════════════════════════════════════
 
-        return instance
\ No newline at end of file
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'source', 'file_type', 'status', 'records_done',
+            'reports_created', 'items_created', 'entries_created',
+            'error_count', 'errors', 'created_at', 'updated_at',
+        ]
@@ -0,0 +1,224 @@
+"""
+Statistical process control over patrol measurements.
+
+A characteristic is one inspection item (sr_no + item name + spec +
+tolerance) of a part/operation.  Column i of ScheduleEntry.values holds the
+reading for item sr_no i+1, and the UP/DOWN rows of one time slot form an
+X-bar/R subgroup.
+
+Rows are streamed from the database as plain tuples in chunks, readings are
+converted to float arrays in bulk, and every statistic is computed with
+NumPy — no model instances are built.
+"""
+from itertools import islice
+
+import numpy as np
+
+from .models import InspectionItem, ScheduleEntry
+from .specs import compile_spec, to_floats
+
+
+CHUNK_SIZE = 2000
+
+# X-bar/R chart constants by subgroup size (AIAG SPC manual)
+CONSTANTS = {
+    2:  {'A2': 1.880, 'D3': 0.0,   'D4': 3.267, 'd2': 1.128},
+    3:  {'A2': 1.023, 'D3': 0.0,   'D4': 2.574, 'd2': 1.693},
+    4:  {'A2': 0.729, 'D3': 0.0,   'D4': 2.282, 'd2': 2.059},
+    5:  {'A2': 0.577, 'D3': 0.0,   'D4': 2.114, 'd2': 2.326},
+    6:  {'A2': 0.483, 'D3': 0.0,   'D4': 2.004, 'd2': 2.534},
+    7:  {'A2': 0.419, 'D3': 0.076, 'D4': 1.924, 'd2': 2.704},
+    8:  {'A2': 0.373, 'D3': 0.136, 'D4': 1.864, 'd2': 2.847},
+    9:  {'A2': 0.337, 'D3': 0.184, 'D4': 1.816, 'd2': 2.970},
+    10: {'A2': 0.308, 'D3': 0.223, 'D4': 1.777, 'd2': 3.078},
+}
+
+
+def filter_entries(params):
+    entries = ScheduleEntry.objects.all()
+    if params.get('part_name'):
+        entries = entries.filter(report__part_name=params['part_name'])
+    if params.get('operation_name'):
+        entries = entries.filter(report__operation_name=params['operation_name'])
+    if params.get('customer_name'):
+        entries = entries.filter(report__customer_name=params['customer_name'])
+    if params.get('machine_no'):
+        entries = entries.filter(machine_no=params['machine_no'])
+    if params.get('date_from'):
+        entries = entries.filter(report__date__gte=params['date_from'])
+    if params.get('date_to'):
+        entries = entries.filter(report__date__lte=params['date_to'])
+    return entries
+
+
+def collect(entries):
+    """
+    Stream (report, slot, values) rows and return flat NumPy arrays:
+    characteristic index, subgroup index and reading for every numeric value.
+    Each chunk of rows is parsed as one rows × columns matrix, the way
+    specs.judge_rows does it.
+    """
+    report_ids = entries.values('report_id')
+    items = (
+        InspectionItem.objects.filter(report_id__in=report_ids)
+        .values_list('report_id', 'sr_no', 'item', 'spec', 'tolerance')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    characteristics, char_index, item_to_char = [], {}, {}
+    for report_id, sr_no, item, spec, tolerance in items:
+        key = (sr_no, item, spec, tolerance)
+        if key not in char_index:
+            char_index[key] = len(characteristics)
+            characteristics.append(key)
+        item_to_char[(report_id, sr_no)] = char_index[key]
+
+    # Characteristic of (report, column) as a lookup matrix; the last row (-1s)
+    # stands for reports without items
+    report_position = {}
+    for report_id, _ in item_to_char:
+        report_position.setdefault(report_id, len(report_position))
+    columns = max((sr_no for _, sr_no in item_to_char), default=0)
+    char_lookup = np.full((len(report_position) + 1, columns), -1, dtype=np.int64)
+    for (report_id, sr_no), char in item_to_char.items():
+        if sr_no >= 1:
+            char_lookup[report_position[report_id], sr_no - 1] = char
+    no_items = len(report_position)
+
+    subgroup_index = {}
+    chars, groups, readings = [], [], []
+    rows = entries.values_list('report_id', 'slot_index', 'values').iterator(chunk_size=CHUNK_SIZE)
+    while chunk := list(islice(rows, CHUNK_SIZE)):
+        width = min(max(len(values or []) for _, _, values in chunk), columns)
+        if width == 0:
+            continue
+        flat = []
+        for _, _, values in chunk:
+            values = (values or [])[:width]
+            flat.extend(values)
+            flat.extend([''] * (width - len(values)))
+        matrix = to_floats(flat).reshape(len(chunk), width)
+        row_reports = np.fromiter((report_position.get(report_id, no_items) for report_id, _, _ in chunk),
+                                  dtype=np.int64, count=len(chunk))
+        row_groups = np.fromiter(
+            (subgroup_index.setdefault((report_id, slot), len(subgroup_index)) for report_id, slot, _ in chunk),
+            dtype=np.int64, count=len(chunk),
+        )
+        row_chars = char_lookup[row_reports, :width]
+        keep = ~np.isnan(matrix) & (row_chars >= 0)
+        chars.append(row_chars[keep])
+        groups.append(np.broadcast_to(row_groups[:, None], matrix.shape)[keep])
+        readings.append(matrix[keep])
+
+    if not chars:
+        empty = np.empty(0, dtype=np.int64)
+        return characteristics, empty, empty, np.empty(0)
+    return characteristics, np.concatenate(chars), np.concatenate(groups), np.concatenate(readings)
+
+
+def subgroup_stats(groups, readings):
+    """Per-subgroup size, mean and range via a single sort + reduceat."""
+    order = np.argsort(groups, kind='stable')
+    groups, readings = groups[order], readings[order]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    sizes = np.diff(np.r_[starts, len(groups)])
+    means = np.add.reduceat(readings, starts) / sizes
+    ranges = np.maximum.reduceat(readings, starts) - np.minimum.reduceat(readings, starts)
+    return sizes, means, ranges
+
+
+def rounded(value, digits=4):
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value), digits)
+
+
+def characteristic_stats(key, groups, readings):
+    sr_no, item, spec, tolerance = key
+    lower, upper = compile_spec(spec, tolerance) or (None, None)
+
+    n = len(readings)
+    mean = readings.mean()
+    sigma = readings.std(ddof=1) if n > 1 else np.nan
+
+    sizes, means, ranges = subgroup_stats(groups, readings)
+    multi = sizes >= 2
+    subgroup_n = int(np.bincount(sizes[multi]).argmax()) if multi.any() else 1
+    constants = CONSTANTS.get(min(subgroup_n, 10))
+    r_bar = ranges[multi].mean() if multi.any() else np.nan
+    x_bar_bar = means.mean()
+    sigma_within = r_bar / constants['d2'] if constants and np.isfinite(r_bar) and r_bar > 0 else sigma
+
+    def capability(s):
+        if not np.isfinite(s) or s <= 0:
+            return None, None
+        cp = (upper - lower) / (6 * s) if lower is not None and upper is not None else None
+        sides = []
+        if upper is not None:
+            sides.append((upper - mean) / (3 * s))
+        if lower is not None:
+            sides.append((mean - lower) / (3 * s))
+        return cp, (min(sides) if sides else None)
+
+    cp, cpk = capability(sigma_within)
+    pp, ppk = capability(sigma)
+
+    out_of_tolerance = 0
+    if lower is not None:
+        out_of_tolerance += int(np.count_nonzero(readings < lower))
+    if upper is not None:
+        out_of_tolerance += int(np.count_nonzero(readings > upper))
+
+    control = None
+    if constants and np.isfinite(r_bar):
+        control = {
+            'subgroup_size': subgroup_n,
+            'x_bar': rounded(x_bar_bar),
+            'x_ucl': rounded(x_bar_bar + constants['A2'] * r_bar),
+            'x_lcl': rounded(x_bar_bar - constants['A2'] * r_bar),
+            'r_bar': rounded(r_bar),
+            'r_ucl': rounded(constants['D4'] * r_bar),
+            'r_lcl': rounded(constants['D3'] * r_bar),
+        }
+
+    return {
+        'sr_no': sr_no,
+        'item': item,
+        'spec': spec,
+        'tolerance': tolerance,
+        'lsl': rounded(lower),
+        'usl': rounded(upper),
+        'count': n,
+        'subgroups': len(sizes),
+        'mean': rounded(mean),
+        'sigma': rounded(sigma),
+        'sigma_within': rounded(sigma_within),
+        'min': rounded(readings.min()),
+        'max': rounded(readings.max()),
+        'cp': rounded(cp),
+        'cpk': rounded(cpk),
+        'pp': rounded(pp),
+        'ppk': rounded(ppk),
+        'out_of_tolerance': out_of_tolerance,
+        'control_limits': control,
+    }
+
+
+def compute_spc(params):
+    characteristics, chars, groups, readings = collect(filter_entries(params))
+
+    results = []
+    if len(chars):
+        order = np.argsort(chars, kind='stable')
+        chars, groups, readings = chars[order], groups[order], readings[order]
+        starts = np.flatnonzero(np.r_[True, chars[1:] != chars[:-1]])
+        ends = np.r_[starts[1:], len(chars)]
+        for start, end in zip(starts, ends):
+            key = characteristics[chars[start]]
+            results.append(characteristic_stats(key, groups[start:end], readings[start:end]))
+    results.sort(key=lambda row: (row['sr_no'], row['item']))
+
+    return {
+        'filters': {key: value for key, value in params.items() if value},
+        'readings': int(len(readings)),
+        'characteristics': results,
+    }
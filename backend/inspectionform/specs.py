@@ -0,0 +1,225 @@
+"""
+Spec / tolerance parsing and automatic OK/NG judgment.
+
+InspectionItem.spec and .tolerance are free text ("25.0", "±0.05",
+"+0.1/-0.05 MM", "MAX").  ``compile_spec`` turns a pair into numeric limits
+once and keeps the result in an LRU cache — a plant has a few hundred
+distinct pairs, so after warm-up parsing costs a dict lookup.
+
+``judge_rows`` lays the readings of many schedule rows out as one
+rows × columns float matrix, with per-row limit matrices built from each
+report's items, and decides OK/NG for all of them in a single NumPy pass.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import InspectionItem, InspectionReport, ScheduleEntry
+
+
+SpecLimits = namedtuple('SpecLimits', ['lower', 'upper'])
+
+UNSIGNED = r'\d*\.?\d+'
+NUMBER = rf'[-+]?{UNSIGNED}'
+# A dash is a range only right after the first number or with spaces on both
+# sides: '10.0 -0.1' is a nominal with a minus tolerance, not -0.1 to 10.0
+RANGE_RE = re.compile(rf'^\s*({NUMBER})(?:\s*(?:~|TO)\s*|-\s*|\s+-\s+)({NUMBER})', re.I)
+SYMMETRIC_RE = re.compile(rf'(?:±|\+/-|\+-)\s*({UNSIGNED})')
+PLUS_RE = re.compile(rf'\+\s*({UNSIGNED})')
+MINUS_RE = re.compile(rf'-\s*({UNSIGNED})')
+BARE_RE = re.compile(rf'^\s*({UNSIGNED})\s*(?:MM)?\s*$', re.I)
+FIRST_NUMBER_RE = re.compile(NUMBER)
+
+OK = 'OK'
+NG = 'NG'
+
+
+@lru_cache(maxsize=4096)
+def compile_spec(spec, tolerance):
+    """
+    SpecLimits(lower, upper) from the free-text spec/tolerance pair, either
+    side None when one-sided.  None when nothing numeric.
+
+        '25.0', '±0.05'        → (24.95, 25.05)
+        '25.0', '0.05'         → (24.95, 25.05)
+        '25.0', '+0.1/-0.05'   → (24.95, 25.1)
+        '0.8',  'MAX'          → (None, 0.8)
+        '24.9-25.1', ''        → (24.9, 25.1)
+        '10.0 -0.1', ''        → (9.9, 10.0)
+    """
+    spec = (spec or '').strip()
+    tolerance = (tolerance or '').strip()
+    text = f'{spec} {tolerance}'.upper()
+
+    if not tolerance:
+        match = RANGE_RE.match(spec)
+        if match:
+            low, high = sorted((float(match.group(1)), float(match.group(2))))
+            return SpecLimits(low, high)
+
+    match = FIRST_NUMBER_RE.search(spec)
+    if not match:
+        return None
+    nominal = float(match.group())
+    rest = text[text.find(match.group()) + len(match.group()):]
+
+    if 'MAX' in text:
+        return SpecLimits(None, nominal)
+    if 'MIN' in text:
+        return SpecLimits(nominal, None)
+
+    symmetric = SYMMETRIC_RE.search(rest)
+    if symmetric:
+        delta = float(symmetric.group(1))
+        return SpecLimits(nominal - delta, nominal + delta)
+
+    plus, minus = PLUS_RE.search(rest), MINUS_RE.search(rest)
+    if plus or minus:
+        upper = nominal + float(plus.group(1)) if plus else nominal
+        lower = nominal - float(minus.group(1)) if minus else nominal
+        return SpecLimits(lower, upper)
+
+    bare = BARE_RE.match(tolerance)
+    if bare:
+        delta = float(bare.group(1))
+        return SpecLimits(nominal - delta, nominal + delta)
+    return None
+
+
+def to_floats(raw):
+    """Readings that are not numbers (blank, 'OK', 'NG') become NaN."""
+    raw = [value if value != '' else 'nan' for value in raw]
+    try:
+        return np.asarray(raw, dtype=float)
+    except ValueError:
+        out = np.empty(len(raw))
+        for i, value in enumerate(raw):
+            try:
+                out[i] = float(value)
+            except ValueError:
+                out[i] = np.nan
+        return out
+
+
+def limits_by_sr(items):
+    """{sr_no: SpecLimits} for a report's InspectionItems"""
+    limits = {}
+    for item in items:
+        compiled = compile_spec(item.spec, item.tolerance)
+        if compiled is not None:
+            limits[item.sr_no] = compiled
+    return limits
+
+
+def judge_rows(rows, limits_by_report):
+    """
+    OK / NG / None for each (report_id, values) row.
+
+    Column i of values is judged against item sr_no i+1 of that row's report.
+    A row is NG when any reading is outside its limits or reads "NG", OK when
+    at least one reading could be judged, and None (leave the hand-typed
+    judgment alone) when nothing in it is judgeable.
+    """
+    if not rows:
+        return []
+    width = max(len(values or []) for _, values in rows)
+    if width == 0:
+        return [None] * len(rows)
+
+    report_index = {}
+    for report_id, _ in rows:
+        report_index.setdefault(report_id, len(report_index))
+    report_lower = np.full((len(report_index), width), np.nan)
+    report_upper = np.full((len(report_index), width), np.nan)
+    for report_id, i in report_index.items():
+        for sr_no, limits in limits_by_report.get(report_id, {}).items():
+            if 1 <= sr_no <= width:
+                report_lower[i, sr_no - 1] = -np.inf if limits.lower is None else limits.lower
+                report_upper[i, sr_no - 1] = np.inf if limits.upper is None else limits.upper
+
+    flat = []
+    for _, values in rows:
+        values = values or []
+        flat.extend(values)
+        flat.extend([''] * (width - len(values)))
+    readings = to_floats(flat).reshape(len(rows), width)
+    text = np.char.upper(np.char.strip(np.asarray(flat, dtype=str))).reshape(len(rows), width)
+
+    row_reports = np.fromiter((report_index[report_id] for report_id, _ in rows), dtype=np.int64, count=len(rows))
+    lower, upper = report_lower[row_reports], report_upper[row_reports]
+
+    measured = ~np.isnan(readings) & ~np.isnan(lower)
+    with np.errstate(invalid='ignore'):
+        outside = measured & ((readings < lower) | (readings > upper))
+    marked_ng = text == NG
+    judged = measured | marked_ng | (text == OK)
+
+    verdict = np.where((outside | marked_ng).any(axis=1), NG, np.where(judged.any(axis=1), OK, ''))
+    return [value or None for value in verdict.tolist()]
+
+
+def set_verdicts(entries, verdicts):
+    changed = []
+    for entry, verdict in zip(entries, verdicts):
+        if verdict is not None and entry.judgment != verdict:
+            entry.judgment = verdict
+            changed.append(entry)
+    return changed
+
+
+def judge_entries(entries, items):
+    """
+    Set .judgment on ScheduleEntry objects of one report from its items.
+    Returns the entries whose judgment changed.
+    """
+    verdicts = judge_rows([(None, entry.values) for entry in entries], {None: limits_by_sr(items)})
+    return set_verdicts(entries, verdicts)
+
+
+def rejudge_reports(report_ids, batch_size=2000, bump_version=True):
+    """
+    Recompute judgments for every schedule row of the given reports. Returns (rows, changed).
+    ``bump_version=False`` when the caller is saving the reports and bumps their version itself.
+    """
+    limits = {}
+    items = InspectionItem.objects.filter(report_id__in=report_ids).values_list('report_id', 'sr_no', 'spec', 'tolerance')
+    for report_id, sr_no, spec, tolerance in items.iterator(chunk_size=batch_size):
+        compiled = compile_spec(spec, tolerance)
+        if compiled is not None:
+            limits.setdefault(report_id, {})[sr_no] = compiled
+
+    seen = changed = 0
+    entries = ScheduleEntry.objects.filter(report_id__in=report_ids).only('id', 'report_id', 'values', 'judgment')
+    batch = []
+    for entry in entries.iterator(chunk_size=batch_size):
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            changed += save_verdicts(batch, limits, bump_version)
+            seen += len(batch)
+            batch = []
+    if batch:
+        changed += save_verdicts(batch, limits, bump_version)
+        seen += len(batch)
+    return seen, changed
+
+
+def save_verdicts(entries, limits, bump_version=True):
+    verdicts = judge_rows([(entry.report_id, entry.values) for entry in entries], limits)
+    changed = set_verdicts(entries, verdicts)
+    if changed:
+        now = timezone.now()
+        for entry in changed:
+            entry.updated_at = now
+        # New verdicts are a new report state: its ETag and cached PDFs key on version
+        with transaction.atomic():
+            ScheduleEntry.objects.bulk_update(changed, ['judgment', 'updated_at'])
+            if bump_version:
+                InspectionReport.objects.filter(pk__in={entry.report_id for entry in changed}).update(
+                    updated_at=now, version=F('version') + 1,
+                )
+    return len(changed)
@@ -0,0 +1,91 @@
+"""
+Delta sync for polling clients (shop-floor tablets).
+
+Every synced model carries an indexed ``updated_at`` and deletes leave a
+Tombstone, so "what changed since T" is a handful of index range scans and
+costs O(changes) rather than O(database).  Rows come back flat, as plain
+values() dicts — clients upsert them by id and drop anything tombstoned.
+
+Rows are selected from ``since - SYNC_OVERLAP_SECONDS`` on: a transaction
+that stamped updated_at just before the previous poll but committed just
+after it is picked up by the next one.  Upserts are idempotent, so the
+occasional repeat is harmless.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import InspectionReport, InspectionItem, ScheduleEntry, PDIReport, PDIItem, Tombstone
+
+
+REPORT_FIELDS = [
+    'id', 'doc_no', 'revision_no', 'date', 'part_name', 'part_number',
+    'operation_name', 'customer_name', 'prepared_by', 'approved_by', 'version', 'updated_at',
+]
+ITEM_FIELDS = ['id', 'report', 'sr_no', 'item', 'special_char', 'spec', 'tolerance', 'inst', 'updated_at']
+ENTRY_FIELDS = [
+    'id', 'report', 'sr', 'row_order', 'slot_index', 'date', 'operator', 'machine_no', 'time_type',
+    'values', 'judgment', 'signature', 'filled_at', 'updated_at',
+]
+PDI_REPORT_FIELDS = [
+    'id', 'page_no', 'supplier_name', 'part_no', 'inspection_date', 'customer_name', 'part_name',
+    'invoice_no', 'lot_qty', 'operation_name', 'supplier_remarks', 'inspected_by', 'verified_by',
+    'approved_by', 'created_at', 'updated_at',
+]
+PDI_ITEM_FIELDS = [
+    'id', 'report', 'sr_no', 'item', 'spec', 'tolerance', 'method', 'vendor_obs1', 'vendor_obs2',
+    'vendor_judge', 'cust_obs1', 'cust_obs2', 'cust_judge', 'remarks', 'updated_at',
+]
+
+COLLECTIONS = [
+    # key, model, fields, report date lookup
+    ('reports', InspectionReport, REPORT_FIELDS, 'date'),
+    ('items', InspectionItem, ITEM_FIELDS, 'report__date'),
+    ('schedule_entries', ScheduleEntry, ENTRY_FIELDS, 'report__date'),
+    ('pdi_reports', PDIReport, PDI_REPORT_FIELDS, 'inspection_date'),
+    ('pdi_items', PDIItem, PDI_ITEM_FIELDS, 'report__inspection_date'),
+]
+
+
+def overlap():
+    return timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', 5))
+
+
+def retention():
+    return timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30))
+
+
+def changes(since=None, date=None):
+    """
+    Everything created, changed or deleted since ``since`` (all rows when
+    None), optionally limited to reports of one ``date``.  ``next`` is the
+    value to send as ?since= on the following poll.
+    """
+    now = timezone.now()
+    result = {'since': since, 'next': now}
+    start = since - overlap() if since is not None else None
+
+    for key, model, fields, date_lookup in COLLECTIONS:
+        queryset = model.objects.order_by('updated_at', 'id')
+        if start is not None:
+            queryset = queryset.filter(updated_at__gte=start)
+        if date:
+            queryset = queryset.filter(**{date_lookup: date})
+        result[key] = list(queryset.values(*fields))
+
+    deleted = []
+    if start is not None:
+        tombstones = Tombstone.objects.filter(deleted_at__gte=start).order_by('deleted_at', 'id')
+        deleted = [
+            {'model': model, 'id': object_id, 'report': report_id}
+            for model, object_id, report_id in tombstones.values_list('model', 'object_id', 'report_id')
+        ]
+    result['deleted'] = deleted
+    return result
+
+
+def prune_tombstones():
+    """Drop tombstones past SYNC_TOMBSTONE_DAYS; returns how many were deleted"""
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - retention()).delete()
+    return deleted
@@ -0,0 +1,210 @@
+"""
+Synthetic shop-floor data for benchmarks and load tests.
+
+``generate()`` builds a deterministic (seeded) catalogue of customers, parts
+and operations, writes it to the L1/L2/L3 master tables, then fills the app
+tables with inspection reports — 20 items and a full SETUP / 2HRS / 4HRS /
+LAST schedule each, readings scattered around the spec with a few out of
+tolerance — and PDI reports for the same parts.  Everything is bulk-inserted
+in batches, so a hundred thousand reports take minutes, not hours.  The
+dashboard rollups are rebuilt for the generated date range at the end.
+
+Run it through ``python manage.py generate_data`` or from a benchmark.
+"""
+import random
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .masterdata import L1_TABLE, L2_TABLE, L3_TABLE, create_stand_in_tables, table
+from . import rollups
+from .models import InspectionItem, InspectionReport, PDIItem, PDIReport, ScheduleEntry
+from .specs import judge_entries
+
+
+SCALES = {
+    # reports, pdi_reports, customers, parts per customer, operations per part
+    'small':  dict(reports=500, pdi_reports=100, customers=5, parts=6, operations=3),
+    'medium': dict(reports=10000, pdi_reports=2000, customers=12, parts=10, operations=4),
+    'large':  dict(reports=100000, pdi_reports=20000, customers=25, parts=16, operations=5),
+}
+
+CUSTOMERS = ['ACME AUTO', 'ZENITH MOTORS', 'ORBIT GEARS', 'VECTOR AXLES', 'NOVA TRACTORS', 'APEX PUMPS',
+             'SUMMIT VALVES', 'DELTA DRIVES', 'PRIME ENGINES', 'HORIZON RAIL']
+PARTS = ['SHAFT', 'GEAR', 'FLANGE', 'HOUSING', 'BUSH', 'PIN', 'SPINDLE', 'HUB', 'SLEEVE', 'PULLEY',
+         'COUPLING', 'BRACKET', 'ROLLER', 'YOKE', 'CAM', 'AXLE']
+OPERATIONS = ['TURNING', 'FACING', 'GRINDING', 'HOBBING', 'DRILLING', 'MILLING', 'BROACHING', 'REAMING',
+              'THREADING', 'CHAMFERING']
+PRODUCT_PARAMETERS = ['OD', 'ID', 'Length', 'Face runout', 'Chamfer', 'Groove width', 'Groove dia',
+                      'Step length', 'Concentricity', 'Surface finish']
+PROCESS_PARAMETERS = ['Spindle speed', 'Feed', 'Coolant concentration', 'Tool offset']
+INSTRUMENTS = ['VC', 'MICROMETER', 'BORE GAUGE', 'HEIGHT GAUGE', 'SRT', 'DIAL GAUGE']
+OPERATORS = ['RAM', 'SURESH', 'ANIL', 'PRIYA', 'KAVITA', 'VIJAY', 'ARJUN', 'MEENA']
+
+ITEMS = 20
+SLOT_TYPES = ('SETUP', '2HRS', '4HRS', '2HRS', '4HRS', '2HRS', '4HRS', 'LAST')
+ROWS_PER_SLOT = 2
+
+
+def catalogue(rng, customers, parts, operations, items=ITEMS):
+    """
+    [(customer, part_name, part_no, [(operation, [parameter, ...])])] — each
+    parameter a dict(category, name, spec, tolerance, instrument).
+    """
+    result = []
+    for c in range(customers):
+        customer = CUSTOMERS[c % len(CUSTOMERS)] + ('' if c < len(CUSTOMERS) else f' {c // len(CUSTOMERS) + 1}')
+        for p in range(parts):
+            part_name = PARTS[(c + p) % len(PARTS)] + f' {chr(65 + p % 26)}{c + 1}'
+            part_no = f'KG-{c + 1:02d}{p + 1:03d}'
+            ops = []
+            for o in rng.sample(range(len(OPERATIONS)), min(operations, len(OPERATIONS))):
+                parameters = []
+                for n in range(items):
+                    nominal = round(rng.uniform(5, 120), 2)
+                    parameters.append({
+                        'category': 'PRODUCT',
+                        'name': f'{PRODUCT_PARAMETERS[n % len(PRODUCT_PARAMETERS)]} {n // len(PRODUCT_PARAMETERS) + 1}',
+                        'spec': f'{nominal:.2f}',
+                        'tolerance': f'±{rng.choice((0.01, 0.02, 0.05, 0.1)):.2f}',
+                        'instrument': rng.choice(INSTRUMENTS),
+                    })
+                for name in PROCESS_PARAMETERS:
+                    parameters.append({
+                        'category': 'PROCESS', 'name': name, 'spec': str(rng.randint(1, 2000)),
+                        'tolerance': '', 'instrument': 'NA',
+                    })
+                ops.append((OPERATIONS[o], parameters))
+            result.append((customer, part_name, part_no, ops))
+    return result
+
+
+def write_master_data(parts):
+    """Replace the rows of the L1/L2/L3 tables with the catalogue"""
+    with connection.cursor() as cursor:
+        for name in (L3_TABLE, L2_TABLE, L1_TABLE):
+            cursor.execute(f'DELETE FROM {table(name)}')
+        l1, l2, l3 = [], [], []
+        for part_id, (customer, part_name, part_no, ops) in enumerate(parts, 1):
+            l1.append((part_id, customer, part_name, part_no))
+            for operation, parameters in ops:
+                report_id = len(l2) + 1
+                l2.append((report_id, part_id, operation))
+                l3 += [(report_id, p['category'], p['name'], f"{p['spec']} {p['tolerance']}".strip(), p['instrument'])
+                       for p in parameters]
+        cursor.executemany(f'INSERT INTO {table(L1_TABLE)} (id, customer_name, part_name, part_no) VALUES (%s, %s, %s, %s)', l1)
+        cursor.executemany(f'INSERT INTO {table(L2_TABLE)} (id, part_id, report_name) VALUES (%s, %s, %s)', l2)
+        cursor.executemany(
+            f'INSERT INTO {table(L3_TABLE)} (process_report_id, category, parameter_name, specification, instrument) '
+            'VALUES (%s, %s, %s, %s, %s)', l3,
+        )
+    return len(l1), len(l2), len(l3)
+
+
+def reading(rng, parameter):
+    nominal = float(parameter['spec'])
+    tolerance = float(parameter['tolerance'].lstrip('±'))
+    # ~2% of readings land outside the tolerance band
+    spread = tolerance * (1.6 if rng.random() < 0.02 else 0.4)
+    return f'{nominal + rng.gauss(0, spread):.3f}'
+
+
+def build_report(rng, day, customer, part_name, part_no, operation, parameters):
+    product = [p for p in parameters if p['category'] == 'PRODUCT']
+    report = InspectionReport(
+        date=day, part_name=part_name, part_number=part_no, operation_name=operation,
+        customer_name=customer, prepared_by=rng.choice(OPERATORS), approved_by='QA',
+    )
+    items = [
+        InspectionItem(report=report, sr_no=n, item=p['name'], spec=p['spec'], tolerance=p['tolerance'],
+                       inst=p['instrument'])
+        for n, p in enumerate(product, 1)
+    ]
+    machine = f'M{rng.randint(1, 12):02d}'
+    operator = rng.choice(OPERATORS)
+    shift_start = timezone.make_aware(datetime.combine(day, time(7)))
+    entries = []
+    for slot_index, time_type in enumerate(SLOT_TYPES):
+        filled_at = shift_start + timedelta(hours=slot_index * 1.5)
+        for row_order in range(ROWS_PER_SLOT):
+            entries.append(ScheduleEntry(
+                report=report, sr=1, slot_index=slot_index, row_order=row_order, date=day,
+                operator=operator, machine_no=machine, time_type=time_type,
+                values=[reading(rng, p) for p in product], signature=operator, filled_at=filled_at,
+            ))
+    judge_entries(entries, items)
+    return report, items, entries
+
+
+def build_pdi_report(rng, day, customer, part_name, part_no, operation, parameters):
+    report = PDIReport(
+        supplier_name='KG TECH', part_no=part_no, inspection_date=day, customer_name=customer,
+        part_name=part_name, invoice_no=f'INV-{rng.randint(10000, 99999)}', lot_qty=str(rng.choice((50, 100, 250, 500))),
+        operation_name=operation, inspected_by=rng.choice(OPERATORS), verified_by='QA', approved_by='QA HEAD',
+    )
+    items = []
+    for n, p in enumerate([p for p in parameters if p['category'] == 'PRODUCT'][:12], 1):
+        vendor = [reading(rng, p), reading(rng, p)]
+        items.append(PDIItem(
+            report=report, sr_no=n, item=p['name'], spec=p['spec'], tolerance=p['tolerance'], method=p['instrument'],
+            vendor_obs1=vendor[0], vendor_obs2=vendor[1], vendor_judge='OK',
+            cust_obs1=reading(rng, p), cust_obs2=reading(rng, p), cust_judge='OK',
+        ))
+    return report, items
+
+
+def save_reports(built):
+    InspectionReport.objects.bulk_create([report for report, _, _ in built])
+    for report, items, entries in built:
+        for row in items + entries:
+            row.report_id = report.pk
+    InspectionItem.objects.bulk_create([item for _, items, _ in built for item in items])
+    ScheduleEntry.objects.bulk_create([entry for _, _, entries in built for entry in entries])
+
+
+def save_pdi_reports(built):
+    PDIReport.objects.bulk_create([report for report, _ in built])
+    for report, items in built:
+        for item in items:
+            item.report_id = report.pk
+    PDIItem.objects.bulk_create([item for _, items in built for item in items])
+
+
+def generate(reports=500, pdi_reports=100, customers=5, parts=6, operations=3, days=365, seed=1,
+             master=True, batch_size=500, progress=None):
+    """
+    Fill the database; returns the row counts written.  With ``master`` the
+    L1/L2/L3 tables are created if missing and their rows REPLACED — pass
+    False to leave real master tables on a shared Postgres alone.
+    ``progress(kind, done, total)`` is called after every batch.
+    """
+    rng = random.Random(seed)
+    parts_list = catalogue(rng, customers, parts, operations)
+    combos = [(customer, part_name, part_no, operation, parameters)
+              for customer, part_name, part_no, ops in parts_list for operation, parameters in ops]
+    today = timezone.localdate()
+    counts = {'reports': reports, 'pdi_reports': pdi_reports}
+
+    if master:
+        create_stand_in_tables(force=True)
+        counts['l1'], counts['l2'], counts['l3'] = write_master_data(parts_list)
+
+    for kind, total, build, save in (
+        ('reports', reports, build_report, save_reports),
+        ('pdi_reports', pdi_reports, build_pdi_report, save_pdi_reports),
+    ):
+        for offset in range(0, total, batch_size):
+            built = [
+                build(rng, today - timedelta(days=rng.randrange(days)), *rng.choice(combos))
+                for _ in range(min(batch_size, total - offset))
+            ]
+            with transaction.atomic():
+                save(built)
+            if progress is not None:
+                progress(kind, offset + len(built), total)
+
+    counts['items'] = reports * ITEMS
+    counts['schedule_entries'] = reports * len(SLOT_TYPES) * ROWS_PER_SLOT
+    counts['quality_rollups'], counts['pdi_rollups'] = rollups.rebuild(today - timedelta(days=days), today)
+    return counts
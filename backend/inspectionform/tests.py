@@ -1,3 +1,1486 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import unittest
+from datetime import timedelta
+from importlib.util import find_spec
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from inspectionform.events import InProcessBroker, get_broker, report_topic
+from inspectionform.masterdata import (
+    master_data, create_stand_in_tables, table, L1_TABLE, L2_TABLE, L3_TABLE,
+)
+from inspectionform.models import (
+    InspectionReport, InspectionItem, ScheduleEntry, PDIReport, PDIItem, IdempotencyKey, ImportJob,
+    DailyQualityRollup, DailyPDIRollup,
+)
+
+
+def make_report(items=3, entries=4, **fields):
+    fields.setdefault('part_name', 'SHAFT')
+    fields.setdefault('operation_name', 'TURNING')
+    fields.setdefault('customer_name', 'ACME')
+    report = InspectionReport.objects.create(**fields)
+    for sr_no in range(1, items + 1):
+        InspectionItem.objects.create(report=report, sr_no=sr_no, item=f'Item {sr_no}', spec='25.0', tolerance='±0.05')
+    for slot_index in range(entries):
+        ScheduleEntry.objects.create(
+            report=report, slot_index=slot_index // 2, row_order=slot_index % 2,
+            time_type='SETUP', values=['25.01'],
+        )
+    return report
+
+
+def make_pdi_report(items=3, **fields):
+    fields.setdefault('part_name', 'SHAFT')
+    fields.setdefault('customer_name', 'ACME')
+    report = PDIReport.objects.create(**fields)
+    for sr_no in range(1, items + 1):
+        PDIItem.objects.create(report=report, sr_no=sr_no, item=f'Item {sr_no}')
+    return report
+
+
+class ReportListQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_report_list_query_count_is_constant(self):
+        make_report()
+        small, _ = self.count_queries('/api/reports/')
+        for _ in range(5):
+            make_report()
+        large, response = self.count_queries('/api/reports/')
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(response.data[0]['item_count'], 3)
+        self.assertEqual(len(response.data[0]['schedule_entries']), 4)
+
+    def test_report_retrieve_query_count(self):
+        report = make_report(items=20, entries=40)
+        queries, response = self.count_queries(f'/api/reports/{report.id}/')
+        self.assertLessEqual(queries, 4)  # ETag lookup + report + items + schedule entries
+        self.assertEqual(response.data['item_count'], 20)
+
+    def test_pdi_list_query_count_is_constant(self):
+        make_pdi_report()
+        small, _ = self.count_queries('/api/pdi-reports/')
+        for _ in range(5):
+            make_pdi_report()
+        large, response = self.count_queries('/api/pdi-reports/')
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data[0]['items']), 3)
+
+
+class SummaryAndLatestTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_summary_list_has_no_nested_children(self):
+        make_report(items=2)
+        response = self.client.get('/api/reports/?view=summary')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('items', response.data[0])
+        self.assertNotIn('schedule_entries', response.data[0])
+        self.assertEqual(response.data[0]['item_count'], 2)
+
+        make_pdi_report()
+        response = self.client.get('/api/pdi-reports/?view=summary')
+        self.assertNotIn('items', response.data[0])
+
+    def test_latest_returns_highest_id_matching_filters(self):
+        make_report(part_name='SHAFT')
+        newest = make_report(part_name='SHAFT')
+        make_report(part_name='GEAR')
+        response = self.client.get('/api/reports/latest/?part_name=SHAFT')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], newest.id)
+        self.assertEqual(len(response.data['items']), 3)
+
+        response = self.client.get('/api/reports/latest/?part_name=NONE')
+        self.assertEqual(response.status_code, 404)
+
+    def test_pdi_latest(self):
+        make_pdi_report(customer_name='ACME')
+        newest = make_pdi_report(customer_name='ACME')
+        response = self.client.get('/api/pdi-reports/latest/?customer_name=ACME')
+        self.assertEqual(response.data['id'], newest.id)
+        self.assertEqual(len(response.data['items']), 3)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_unpaginated_list_is_still_a_plain_array(self):
+        make_report()
+        response = self.client.get('/api/reports/')
+        self.assertIsInstance(response.data, list)
+
+    def test_walks_every_report_once_in_date_id_order(self):
+        for day in (1, 1, 2, 3, 3, 3, 4):
+            make_report(items=1, entries=0, date=f'2026-01-0{day}')
+        expected = list(InspectionReport.objects.order_by('-date', '-id').values_list('id', flat=True))
+
+        seen, url = [], '/api/reports/?view=summary&page_size=3'
+        while url:
+            response = self.client.get(url)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+
+        # and back again through the previous links
+        response = self.client.get('/api/reports/?page_size=3')
+        response = self.client.get(response.data['next'])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], expected[:3])
+
+    def test_schedule_entries_and_pdi_paginate(self):
+        make_report(entries=5)
+        response = self.client.get('/api/schedule/?page_size=2')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        make_pdi_report()
+        make_pdi_report()
+        response = self.client.get('/api/pdi-reports/?page_size=1')
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_bad_cursor_is_404(self):
+        response = self.client.get('/api/reports/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+        import base64
+        for position in (['2026-02-30', 5], ['2026-01-05', 'five'], [{'a': 1}, 5]):
+            token = base64.urlsafe_b64encode(json.dumps({'p': position}).encode()).decode()
+            self.assertEqual(self.client.get('/api/reports/', {'cursor': token}).status_code, 404, position)
+
+
+def report_payload(items=20, slots=40, **fields):
+    payload = {
+        'date': '2026-01-05', 'part_name': 'SHAFT', 'operation_name': 'TURNING', 'customer_name': 'ACME',
+        'items': [
+            {'sr_no': sr_no, 'item': f'Item {sr_no}', 'spec': '25.0', 'tolerance': '±0.05', 'inst': 'VC'}
+            for sr_no in range(1, items + 1)
+        ],
+        'schedule_entries': [
+            {'sr': 1, 'slot_index': i // 2, 'row_order': i % 2, 'time_type': 'SETUP', 'values': ['25.01']}
+            for i in range(slots)
+        ],
+    }
+    payload.update(fields)
+    return payload
+
+
+class BulkWriteTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_patrol_save_uses_a_handful_of_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/reports/', report_payload(), format='json')
+        self.assertEqual(response.status_code, 201)
+        write_queries = [q for q in ctx.captured_queries if not q['sql'].startswith('SELECT')]
+        self.assertLess(len(write_queries), 10)
+
+        report_id = response.data['id']
+        payload = report_payload()
+        payload['schedule_entries'][0]['values'] = ['24.99']
+        payload['schedule_entries'].append(
+            {'sr': 1, 'slot_index': 20, 'row_order': 0, 'time_type': 'LAST', 'values': ['25.00']}
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put(f'/api/reports/{report_id}/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(ctx.captured_queries), 15)
+
+        entries = ScheduleEntry.objects.filter(report_id=report_id)
+        self.assertEqual(entries.count(), 41)
+        self.assertEqual(entries.get(slot_index=0, row_order=0).values, ['24.99'])
+
+    def test_failed_save_leaves_nothing_behind(self):
+        with mock.patch.object(ScheduleEntry.objects, 'bulk_create', side_effect=RuntimeError('boom')):
+            response = self.client.post('/api/reports/', report_payload(), format='json')
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(InspectionReport.objects.exists())
+        self.assertFalse(InspectionItem.objects.exists())
+
+    def test_pdi_save_is_bulk(self):
+        payload = {'part_name': 'SHAFT', 'inspection_date': '2026-01-05', 'items': [{'sr_no': n, 'item': f'Item {n}'} for n in range(1, 21)]}
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/pdi-reports/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertLess(len(ctx.captured_queries), 10)
+        self.assertEqual(PDIItem.objects.count(), 20)
+
+
+class ItemDiffTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_unchanged_items_keep_their_rows(self):
+        report_id = self.client.post('/api/reports/', report_payload(items=5, slots=0), format='json').data['id']
+        before = dict(InspectionItem.objects.filter(report_id=report_id).values_list('sr_no', 'id'))
+
+        payload = report_payload(items=5, slots=0)
+        payload['items'][1]['spec'] = '26.0'   # sr 2 edited
+        del payload['items'][4]                # sr 5 removed
+        payload['items'].append({'sr_no': 6, 'item': 'Item 6'})
+        response = self.client.put(f'/api/reports/{report_id}/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        after = dict(InspectionItem.objects.filter(report_id=report_id).values_list('sr_no', 'id'))
+        self.assertEqual(sorted(after), [1, 2, 3, 4, 6])
+        for sr_no in (1, 2, 3, 4):
+            self.assertEqual(after[sr_no], before[sr_no])
+        self.assertEqual(InspectionItem.objects.get(report_id=report_id, sr_no=2).spec, '26.0')
+
+    def test_resave_without_changes_writes_no_item_rows(self):
+        report_id = self.client.post('/api/reports/', report_payload(slots=0), format='json').data['id']
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.put(f'/api/reports/{report_id}/', report_payload(slots=0), format='json')
+        item_writes = [
+            q for q in ctx.captured_queries
+            if 'inspection_items' in q['sql'] and not q['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(item_writes, [])
+
+
+def seed_master_data():
+    create_stand_in_tables()
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table(L1_TABLE)} (id, customer_name, part_name, part_no) VALUES (%s, %s, %s, %s)',
+            [(1, 'ACME', 'SHAFT', 'SH-01'), (2, 'ACME', 'GEAR', 'GR-01'), (3, 'ZENITH', 'SHAFT', 'SH-02')],
+        )
+        cursor.executemany(
+            f'INSERT INTO {table(L2_TABLE)} (id, part_id, report_name) VALUES (%s, %s, %s)',
+            [(1, 1, 'TURNING'), (2, 1, 'GRINDING'), (3, 2, 'HOBBING')],
+        )
+        cursor.executemany(
+            f'INSERT INTO {table(L3_TABLE)} (process_report_id, category, parameter_name, specification, instrument) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            [(1, 'PRODUCT', 'OD', '25.0', 'VC'), (1, 'PROCESS', 'Feed', '0.2', 'NA'), (2, 'PRODUCT', 'Ra', '0.8', 'SRT')],
+        )
+
+
+class MasterDataCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        seed_master_data()
+        master_data.invalidate()
+
+    def test_dropdown_options_are_cached(self):
+        before = master_data.stats()
+        response = self.client.get('/api/dropdown-options/')
+        self.assertEqual(response.data['customers'], ['ACME', 'ZENITH'])
+        self.assertEqual(response.data['operations'], ['GRINDING', 'HOBBING', 'TURNING'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/dropdown-options/')
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        after = master_data.stats()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+    def test_operation_parameters_and_invalidation(self):
+        response = self.client.get('/api/inspection-items/?operation=TURNING')
+        self.assertEqual(response.data['product'], [{'name': 'OD', 'spec': '25.0', 'instrument': 'VC'}])
+        self.assertEqual(len(response.data['process']), 1)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table(L3_TABLE)} (process_report_id, category, parameter_name) VALUES (1, 'PRODUCT', 'Length')"
+            )
+        self.assertEqual(len(self.client.get('/api/inspection-items/?operation=TURNING').data['product']), 1)
+
+        call_command('refresh_master_data', stdout=StringIO())
+        self.assertEqual(len(self.client.get('/api/inspection-items/?operation=TURNING').data['product']), 2)
+
+    def test_entries_are_bounded(self):
+        with override_settings(MASTER_DATA_CACHE_MAX_ENTRIES=3):
+            for n in range(10):
+                self.client.get(f'/api/inspection-items/?operation=OP{n}')
+            self.client.get('/api/inspection-items/?operation=OP7')
+            self.client.get('/api/inspection-items/?operation=OP10')
+            self.assertEqual(master_data.stats()['entries'], 3)
+            # OP7 was used most recently before OP10, so OP8 went first
+            self.assertEqual(list(master_data._entries), ['operation:OP9', 'operation:OP7', 'operation:OP10'])
+
+    def test_suggest(self):
+        from inspectionform.masterdata import SuggestIndex
+        index = SuggestIndex({'part_names': ['HOUSING A1', 'HUB A2', 'SHAFT A1', 'GEAR-BOX']}, 'f')
+        self.assertEqual(index.suggest('part_name', 'h'), ['HOUSING A1', 'HUB A2'])
+        self.assertEqual(index.suggest('part_name', 'a1'), ['HOUSING A1', 'SHAFT A1'])
+        self.assertEqual(index.suggest('part_name', 'box'), ['GEAR-BOX'])
+        self.assertEqual(index.suggest('part_name', '', limit=2), ['GEAR-BOX', 'HOUSING A1'])
+        self.assertEqual(index.suggest('customer_name', 'x'), [])
+
+        response = self.client.get('/api/dropdown-options/suggest/?field=part_name&q=sh')
+        self.assertEqual(response.data['results'], ['SHAFT'])
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.client.get('/api/dropdown-options/suggest/?field=part_name&q=sh',
+                                    HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(self.client.get('/api/dropdown-options/suggest/?field=operation_name&q=g').data['results'],
+                         ['GRINDING'])
+        self.assertEqual(self.client.get('/api/dropdown-options/suggest/?field=colour').status_code, 400)
+
+        # New master rows show up once the cache is refreshed, in a new index
+        old_index = master_data.suggest_index()
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {table(L1_TABLE)} (id, customer_name, part_name, part_no) "
+                           "VALUES (4, 'ACME', 'SHIM', 'SM-01')")
+        call_command('refresh_master_data', '--warm', stdout=StringIO())
+        self.assertIsNot(master_data.suggest_index(), old_index)
+        self.assertEqual(self.client.get('/api/dropdown-options/suggest/?field=part_name&q=sh').data['results'],
+                         ['SHAFT', 'SHIM'])
+
+    def test_hierarchy_tree_and_nodes(self):
+        response = self.client.get('/api/dropdown-options/tree/')
+        tree = response.json()
+        self.assertEqual(tree['operations'], ['GRINDING', 'HOBBING', 'TURNING'])
+        self.assertEqual(tree['operation_sets'], [[1], [0, 2], []])
+        self.assertEqual(tree['customers'], {
+            'ACME': {'GEAR': {'GR-01': 0}, 'SHAFT': {'SH-01': 1}},
+            'ZENITH': {'SHAFT': {'SH-02': 2}},
+        })
+        version = tree['version']
+
+        node = self.client.get('/api/dropdown-options/tree/', {'customer': 'ACME'}).json()
+        self.assertEqual(node['version'], version)
+        self.assertEqual(node['children'], {'GEAR': {'GR-01': ['HOBBING']}, 'SHAFT': {'SH-01': ['GRINDING', 'TURNING']}})
+        leaf = self.client.get('/api/dropdown-options/tree/',
+                               {'customer': 'ACME', 'part_name': 'SHAFT', 'part_number': 'SH-01'}).json()
+        self.assertEqual(leaf['children'], ['GRINDING', 'TURNING'])
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get('/api/dropdown-options/tree/', {'customer': 'ACME'}).json(), node)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(self.client.get('/api/dropdown-options/tree/', {'customer': 'NOBODY'}).status_code, 404)
+        self.assertEqual(self.client.get('/api/dropdown-options/tree/', {'part_name': 'SHAFT'}).status_code, 400)
+
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.client.get('/api/dropdown-options/tree/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {table(L2_TABLE)} (id, part_id, report_name) VALUES (4, 3, 'FACING')")
+        call_command('refresh_master_data', stdout=StringIO())
+        tree = self.client.get('/api/dropdown-options/tree/').json()
+        self.assertNotEqual(tree['version'], version)
+        self.assertEqual(tree['operation_sets'][tree['customers']['ZENITH']['SHAFT']['SH-02']], [0])
+        self.assertEqual(self.client.get('/api/dropdown-options/tree/', {'customer': 'ZENITH'}).json()['children'],
+                         {'SHAFT': {'SH-02': ['FACING']}})
+
+    def test_hierarchy_without_part_link(self):
+        with self.settings(MASTER_DATA_L2_PART_COLUMN='l1_id'), self.assertLogs('inspectionform.masterdata', 'WARNING'):
+            master_data.invalidate()
+            tree = self.client.get('/api/dropdown-options/tree/').json()
+        self.assertEqual((tree['operations'], tree['operation_sets']), ([], [[]]))
+        self.assertEqual(tree['customers']['ACME'], {'GEAR': {'GR-01': 0}, 'SHAFT': {'SH-01': 0}})
+        master_data.invalidate()
+
+    def test_shared_cache_backend(self):
+        with self.settings(
+            MASTER_DATA_CACHE_ALIAS='default',
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        ):
+            other_worker = type(master_data)()
+            master_data.dropdown_options()
+            with CaptureQueriesContext(connection) as ctx:
+                other_worker.dropdown_options()
+            self.assertEqual(len(ctx.captured_queries), 0)
+            master_data.invalidate()
+            self.assertEqual(other_worker.version, master_data.version)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return etag, second, ctx.captured_queries
+
+    def test_report_retrieve_304_without_serializing(self):
+        report = make_report()
+        etag, response, queries = self.revalidate(f'/api/reports/{report.id}/')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(queries), 1)
+
+        payload = report_payload(items=3, slots=0)
+        self.client.put(f'/api/reports/{report.id}/', payload, format='json')
+        response = self.client.get(f'/api/reports/{report.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_schedule_edit_changes_report_etag(self):
+        report = make_report()
+        etag = self.client.get(f'/api/reports/{report.id}/')['ETag']
+        entry = report.schedule_entries.first()
+        self.client.patch(f'/api/schedule/{entry.id}/', {'value_2': '25.02'}, format='json')
+        response = self.client.get(f'/api/reports/{report.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_and_latest_304(self):
+        make_report()
+        for url in ('/api/reports/?part_name=SHAFT', '/api/reports/latest/?part_name=SHAFT'):
+            _, response, queries = self.revalidate(url)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(len(queries), 1)
+
+        etag = self.client.get('/api/reports/?part_name=SHAFT')['ETag']
+        make_report()
+        response = self.client.get('/api/reports/?part_name=SHAFT', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(self.client.get('/api/reports/?part_name=GEAR')['ETag'], etag)
+
+    def test_pdi_retrieve_304(self):
+        report = make_pdi_report()
+        _, response, _ = self.revalidate(f'/api/pdi-reports/{report.id}/')
+        self.assertEqual(response.status_code, 304)
+
+    def test_master_data_304(self):
+        seed_master_data()
+        master_data.invalidate()
+        for url in ('/api/dropdown-options/', '/api/inspection-items/?operation=TURNING'):
+            _, response, queries = self.revalidate(url)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(len(queries), 0)
+
+
+class ScheduleValuesTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_values_array_round_trip_with_more_than_twenty_slots(self):
+        payload = report_payload(items=1, slots=1)
+        payload['schedule_entries'][0]['values'] = [str(n) for n in range(1, 26)] + ['', '']
+        report_id = self.client.post('/api/reports/', payload, format='json').data['id']
+
+        entry = self.client.get(f'/api/reports/{report_id}/').data['schedule_entries'][0]
+        self.assertEqual(entry['values'], [str(n) for n in range(1, 26)])
+        self.assertNotIn('value_1', entry)
+
+    def test_legacy_value_columns_are_accepted_and_offered(self):
+        payload = report_payload(items=1, slots=1)
+        del payload['schedule_entries'][0]['values']
+        payload['schedule_entries'][0].update({'value_1': '25.01', 'value_3': '25.03', 'value_20': ''})
+        report_id = self.client.post('/api/reports/', payload, format='json').data['id']
+        self.assertEqual(ScheduleEntry.objects.get(report_id=report_id).values, ['25.01', '', '25.03'])
+
+        entry = self.client.get(f'/api/reports/{report_id}/?legacy_values=1').data['schedule_entries'][0]
+        self.assertEqual(entry['value_3'], '25.03')
+        self.assertEqual(entry['value_20'], '')
+
+    def test_legacy_patch_keeps_other_readings(self):
+        report = make_report(items=1, entries=1)
+        entry = report.schedule_entries.get()
+        self.client.patch(f'/api/schedule/{entry.id}/', {'value_2': '25.02'}, format='json')
+        entry.refresh_from_db()
+        self.assertEqual(entry.values, ['25.01', '25.02'])
+
+
+class ScheduleValuesMigrationTests(TransactionTestCase):
+    migrate_from = ('inspectionform', '0008_report_filter_indexes')
+    migrate_to = ('inspectionform', '0009_scheduleentry_values_array')
+
+    def test_columns_are_folded_into_values(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([self.migrate_from])
+        apps = executor.loader.project_state([self.migrate_from]).apps
+        Report = apps.get_model('inspectionform', 'InspectionReport')
+        Entry = apps.get_model('inspectionform', 'ScheduleEntry')
+        report = Report.objects.create()
+        Entry.objects.create(report=report, time_type='SETUP', value_1='25.01', value_4='25.04')
+        Entry.objects.create(report=report, time_type='LAST')
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([self.migrate_to])
+        apps = executor.loader.project_state([self.migrate_to]).apps
+        Entry = apps.get_model('inspectionform', 'ScheduleEntry')
+        self.assertEqual(
+            sorted(Entry.objects.values_list('values', flat=True), key=len),
+            [[], ['25.01', '', '', '25.04']],
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+class SPCTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_capability_and_control_limits(self):
+        readings = [('25.00', '25.02'), ('24.98', '25.00'), ('25.01', '25.03'), ('25.10', 'OK')]
+        for machine in ('M1', 'M2'):
+            report = InspectionReport.objects.create(part_name='SHAFT', operation_name='TURNING', date='2026-01-05')
+            InspectionItem.objects.create(report=report, sr_no=1, item='OD', spec='25.0', tolerance='±0.05')
+            for slot_index, pair in enumerate(readings):
+                for row_order, value in enumerate(pair):
+                    ScheduleEntry.objects.create(
+                        report=report, slot_index=slot_index, row_order=row_order,
+                        time_type='SETUP', machine_no=machine, values=[value],
+                    )
+
+        response = self.client.get('/api/spc/?part_name=SHAFT&machine_no=M1')
+        self.assertEqual(response.status_code, 200)
+        [stats] = response.data['characteristics']
+        self.assertEqual(stats['count'], 7)
+        self.assertEqual(stats['subgroups'], 4)
+        self.assertEqual(stats['out_of_tolerance'], 1)
+        self.assertEqual((stats['lsl'], stats['usl']), (24.95, 25.05))
+        self.assertAlmostEqual(stats['mean'], 25.02, places=3)
+        self.assertEqual(stats['control_limits']['subgroup_size'], 2)
+        self.assertAlmostEqual(stats['control_limits']['r_bar'], 0.02, places=4)
+        self.assertAlmostEqual(stats['cp'], 0.1 / (6 * 0.02 / 1.128), places=3)
+
+        both = self.client.get('/api/spc/?part_name=SHAFT').data
+        self.assertEqual(both['characteristics'][0]['count'], 14)
+
+    def test_requires_a_part_or_operation(self):
+        self.assertEqual(self.client.get('/api/spc/').status_code, 400)
+
+    def test_invalid_dates(self):
+        for query in ('date_from=garbage', 'date_from=2026-13-45', 'date_to=2026-02-30'):
+            self.assertEqual(self.client.get(f'/api/spc/?part_name=SHAFT&{query}').status_code, 400)
+        self.assertEqual(self.client.get('/api/spc/?part_name=SHAFT&date_from=2026-01-01').status_code, 200)
+
+
+class JudgmentTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def payload(self, *rows):
+        return {
+            'date': '2026-01-05', 'part_name': 'SHAFT', 'operation_name': 'TURNING',
+            'items': [
+                {'sr_no': 1, 'item': 'OD', 'spec': '25.0', 'tolerance': '±0.05'},
+                {'sr_no': 2, 'item': 'FINISH', 'spec': 'VISUAL', 'tolerance': ''},
+            ],
+            'schedule_entries': [
+                {'slot_index': i, 'row_order': 0, 'time_type': 'SETUP', 'values': values, 'judgment': judgment}
+                for i, (values, judgment) in enumerate(rows)
+            ],
+        }
+
+    def judgments(self, report_id):
+        return list(ScheduleEntry.objects.filter(report_id=report_id).order_by('slot_index').values_list('judgment', flat=True))
+
+    def test_compile_spec(self):
+        from inspectionform.specs import compile_spec
+        self.assertEqual(compile_spec('25.0', '±0.05'), (24.95, 25.05))
+        self.assertEqual(compile_spec('25.0', '+0.1/-0.05'), (24.95, 25.1))
+        self.assertEqual(compile_spec('0.8', 'MAX'), (None, 0.8))
+        self.assertEqual(compile_spec('24.9-25.1', ''), (24.9, 25.1))
+        self.assertEqual(compile_spec('24.9 - 25.1', ''), (24.9, 25.1))
+        self.assertEqual(compile_spec('24.9 TO 25.1', ''), (24.9, 25.1))
+        self.assertEqual(compile_spec('10.0 -0.1', ''), (9.9, 10.0))
+        self.assertEqual(compile_spec('10.0 +0.1', ''), (10.0, 10.1))
+        self.assertIsNone(compile_spec('VISUAL', ''))
+
+    def test_judged_on_create(self):
+        response = self.client.post('/api/reports/', self.payload(
+            (['25.01', 'OK'], ''),
+            (['25.09', 'OK'], 'OK'),
+            (['25.00', 'NG'], ''),
+            (['', ''], 'HOLD'),
+        ), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.judgments(response.data['id']), ['OK', 'NG', 'NG', 'HOLD'])
+
+    def test_rejudged_when_spec_changes(self):
+        report_id = self.client.post('/api/reports/', self.payload((['25.04'], ''),), format='json').data['id']
+        self.assertEqual(self.judgments(report_id), ['OK'])
+
+        payload = self.payload()
+        del payload['schedule_entries']
+        payload['items'][0]['tolerance'] = '±0.02'
+        response = self.client.put(f'/api/reports/{report_id}/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.judgments(report_id), ['NG'])
+
+        # The rejudge is part of this save: one version bump, so the returned ETag still saves
+        self.assertEqual(InspectionReport.objects.get(pk=report_id).version, response.data['version'])
+        payload['items'][0]['tolerance'] = '±0.05'
+        again = self.client.patch(f'/api/reports/{report_id}/', {'items': payload['items']}, format='json',
+                                  HTTP_IF_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(self.judgments(report_id), ['OK'])
+
+    def test_rejudge_command(self):
+        report = make_report(items=1, entries=2)
+        untouched = make_report(items=1, entries=0)
+        etag = self.client.get(f'/api/reports/{report.id}/')['ETag']
+        InspectionItem.objects.filter(report=report).update(spec='25.0', tolerance='±0.005')
+        out = StringIO()
+        call_command('rejudge_reports', stdout=out)
+        self.assertEqual(self.judgments(report.id), ['NG', 'NG'])
+        self.assertIn('2 changed', out.getvalue())
+
+        # Clients and the PDF cache see the new verdicts
+        self.assertEqual(InspectionReport.objects.get(pk=report.id).version, report.version + 1)
+        self.assertEqual(InspectionReport.objects.get(pk=untouched.id).version, untouched.version)
+        self.assertEqual(self.client.get(f'/api/reports/{report.id}/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def read_csv(self, response):
+        import csv
+        return list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+
+    def test_schedule_rows_are_streamed(self):
+        make_report(items=2, entries=3, part_name='SHAFT')
+        make_report(items=2, entries=2, part_name='GEAR')
+
+        response = self.client.get('/api/reports/export/?part_name=SHAFT')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        header, *rows = self.read_csv(response)
+        self.assertEqual(header[:3], ['Report ID', 'Doc No', 'Report Date'])
+        self.assertIn('Value 20', header)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0][header.index('Part Name')], 'SHAFT')
+        self.assertEqual(rows[0][header.index('Value 1')], '25.01')
+
+    def test_long_values_get_headers(self):
+        report = make_report(items=1, entries=2)
+        ScheduleEntry.objects.filter(pk=report.schedule_entries.first().pk).update(
+            values=[str(n) for n in range(1, 26)])
+        header, *rows = self.read_csv(self.client.get('/api/reports/export/'))
+        self.assertEqual(header[-1], 'Value 25')
+        self.assertEqual(max(len(row) for row in rows), len(header))
+
+    async def test_streamed_asynchronously_under_asgi(self):
+        from asgiref.sync import sync_to_async
+        await sync_to_async(make_report)(items=2, entries=3)
+        response = await self.async_client.get('/api/reports/export/')
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body.decode().splitlines()), 4)
+
+    def test_item_rows(self):
+        make_report(items=4, entries=1)
+        header, *rows = self.read_csv(self.client.get('/api/reports/export/?rows=items'))
+        self.assertEqual([row[header.index('Sr No')] for row in rows], ['1', '2', '3', '4'])
+
+    def test_pdi_rows(self):
+        make_pdi_report(items=3, customer_name='ACME')
+        make_pdi_report(items=2, customer_name='OTHER')
+        header, *rows = self.read_csv(self.client.get('/api/pdi-reports/export/?customer_name=ACME'))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row[header.index('Customer')] for row in rows}, {'ACME'})
+
+    def test_unknown_type(self):
+        self.assertEqual(self.client.get('/api/reports/export/?type=pdf').status_code, 400)
+
+    def test_unknown_rows(self):
+        self.assertEqual(self.client.get('/api/reports/export/?rows=bogus').status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/export/', {'rows': 'x"\r\n'}).status_code, 400)
+
+    def test_xlsx_without_openpyxl(self):
+        make_report(items=1, entries=1)
+        with mock.patch.dict(sys.modules, {'openpyxl': None}):
+            for url in ('/api/reports/export/?type=xlsx', '/api/pdi-reports/export/?type=xlsx'):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 501)
+                self.assertIn('openpyxl', response.data['detail'])
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def jsonl(self, *records):
+        import json
+        return '\n'.join(json.dumps(record) for record in records).encode()
+
+    def record(self, n=0, **fields):
+        record = report_payload(items=2, slots=4, part_name=f'PART-{n}')
+        record.update(fields)
+        return record
+
+    def run_import(self, data, name='reports.jsonl', **options):
+        from io import BytesIO
+        from inspectionform.importer import import_file
+        return import_file(BytesIO(data), name, name.rsplit('.', 1)[-1], **options)
+
+    def test_jsonl_import_with_row_errors(self):
+        bad = self.record(1, date='')
+        bad['schedule_entries'][0]['time_type'] = 'NEVER'
+        data = self.jsonl(self.record(0), bad, self.record(2)) + b'\n{not json\n'
+
+        job = self.run_import(data, batch_size=2)
+        self.assertEqual(job.status, 'DONE')
+        self.assertEqual((job.records_done, job.reports_created, job.entries_created), (4, 2, 8))
+        self.assertEqual([error['record'] for error in job.errors], [2, 4])
+        self.assertIn('date: This field is required.', job.errors[0]['errors'])
+        self.assertTrue(any(message.startswith('schedule_entries[0].time_type') for message in job.errors[0]['errors']))
+        self.assertEqual(ScheduleEntry.objects.filter(report__part_name='PART-2').count(), 4)
+        self.assertEqual(set(ScheduleEntry.objects.values_list('judgment', flat=True)), {'OK'})
+
+    def test_resume_after_failure(self):
+        from inspectionform import importer
+        data = self.jsonl(*[self.record(n) for n in range(5)])
+        real_write = importer.write_chunk
+        calls = []
+
+        def fail_second_chunk(*args):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('disk full')
+            return real_write(*args)
+
+        with mock.patch.object(importer, 'write_chunk', fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                self.run_import(data, batch_size=2)
+        self.assertEqual(InspectionReport.objects.count(), 2)
+
+        job = self.run_import(data, batch_size=2)
+        self.assertEqual((job.status, job.records_done), ('DONE', 5))
+        self.assertEqual(sorted(InspectionReport.objects.values_list('part_name', flat=True)),
+                         [f'PART-{n}' for n in range(5)])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.run_import(data)
+        self.assertEqual(InspectionReport.objects.count(), 5)
+        self.assertLessEqual(len(queries), 2)
+
+    def test_csv_round_trip_from_export(self):
+        make_report(items=2, entries=4, part_name='SHAFT', date='2026-01-05')
+        make_report(items=2, entries=2, part_name='GEAR', date='2026-01-06')
+        schedule = b''.join(self.client.get('/api/reports/export/').streaming_content)
+        InspectionReport.objects.all().delete()
+
+        job = self.run_import(schedule, name='export.csv')
+        self.assertEqual((job.status, job.reports_created, job.entries_created, job.error_count), ('DONE', 2, 6, 0))
+        shaft = InspectionReport.objects.get(part_name='SHAFT')
+        self.assertEqual(str(shaft.date), '2026-01-05')
+        self.assertEqual(shaft.schedule_entries.first().values, ['25.01'])
+
+    def test_api_upload(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        upload = SimpleUploadedFile('reports.jsonl', self.jsonl(self.record(0), self.record(1)))
+        response = self.client.post('/api/reports/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['status'], response.data['reports_created']), ('DONE', 2))
+
+        self.assertEqual(self.client.post('/api/reports/import/', {}, format='multipart').status_code, 400)
+
+    def test_upload_not_utf8(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        data = self.jsonl(self.record(0)).replace(b'PART-0', 'PART-Ä'.encode('latin-1'))
+        response = self.client.post('/api/reports/import/', {'file': SimpleUploadedFile('reports.jsonl', data)},
+                                    format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('UTF-8', response.data['detail'])
+        self.assertEqual(InspectionReport.objects.count(), 0)
+
+    def test_same_file_imports_once(self):
+        from inspectionform import importer
+        from inspectionform.importer import ImportInProgress
+        data = self.jsonl(*[self.record(n) for n in range(4)])
+        job = ImportJob.objects.create(source='reports.jsonl', file_type='jsonl',
+                                       checksum=hashlib.sha256(data).hexdigest())
+
+        # A running upload of the same file refuses the second one
+        with self.assertRaises(ImportInProgress):
+            self.run_import(data)
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        response = self.client.post('/api/reports/import/', {'file': SimpleUploadedFile('reports.jsonl', data)},
+                                    format='multipart')
+        self.assertEqual(response.status_code, 409)
+
+        # Another import committing a chunk under this one stops it, leaving the job to the other
+        ImportJob.objects.filter(pk=job.pk).update(status='FAILED')
+        real_write = importer.write_chunk
+
+        def overtaken(job, *args):
+            ImportJob.objects.filter(pk=job.pk).update(records_done=2)
+            return real_write(job, *args)
+
+        with mock.patch.object(importer, 'write_chunk', overtaken):
+            with self.assertRaises(ImportInProgress):
+                self.run_import(data, batch_size=2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, InspectionReport.objects.count()), ('RUNNING', 0))
+
+        # Abandoned (untouched past STALE_AFTER) is taken over
+        ImportJob.objects.filter(pk=job.pk).update(
+            records_done=0, updated_at=timezone.now() - timedelta(seconds=importer.STALE_AFTER + 1))
+        self.assertEqual(self.run_import(data).status, 'DONE')
+        self.assertEqual(InspectionReport.objects.count(), 4)
+
+    def test_command(self):
+        import tempfile
+        with tempfile.NamedTemporaryFile(suffix='.jsonl') as handle:
+            handle.write(self.jsonl(self.record(0)))
+            handle.flush()
+            out = StringIO()
+            call_command('import_reports', handle.name, stdout=out)
+        self.assertIn('1 reports', out.getvalue())
+
+
+class PrintTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        self.client = APIClient()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        settings = override_settings(PDF_CACHE_DIR=self.cache_dir, PDF_WORKERS=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def get_pdf(self, url, **headers):
+        response = self.client.get(url, **headers)
+        if response.status_code == 200:
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            response.pdf = b''.join(response.streaming_content)
+            self.assertTrue(response.pdf.startswith(b'%PDF'))
+        return response
+
+    def test_report_pdf_is_cached_per_version(self):
+        from inspectionform import pdf
+        report = make_report(items=12, entries=6)
+        url = f'/api/reports/{report.id}/pdf/'
+
+        with mock.patch.object(pdf, 'render', wraps=pdf.render) as render:
+            first = self.get_pdf(url)
+            self.get_pdf(url)
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(self.get_pdf(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+            InspectionReport.objects.filter(pk=report.pk).update(part_name='GEAR', updated_at=timezone.now())
+            self.get_pdf(url)
+            self.assertEqual(render.call_count, 2)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_pdi_pdf(self):
+        report = make_pdi_report(items=3)
+        self.assertEqual(self.get_pdf(f'/api/pdi-reports/{report.id}/pdf/').status_code, 200)
+        self.assertEqual(self.client.get('/api/pdi-reports/999999/pdf/').status_code, 404)
+
+    def test_day_batch(self):
+        for part in ('SHAFT', 'GEAR', 'PIN'):
+            make_report(items=2, entries=2, part_name=part, date='2026-01-05')
+        make_report(items=2, entries=2, date='2026-01-06')
+
+        response = self.get_pdf('/api/reports/pdf/?date=2026-01-05')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.pdf.count(b'/Type /Page\n'), 3)
+        self.assertEqual(self.client.get('/api/reports/pdf/').status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/pdf/?date=2030-01-01').status_code, 404)
+
+    def test_worker_pool(self):
+        from inspectionform.printing import PDFPrinter
+        printer = PDFPrinter()
+        with override_settings(PDF_WORKERS=1):
+            path = printer.get('pool-test', 1, 'pdi', lambda: [{'items': [{'sr_no': 1, 'item': 'OD'}]}])
+            printer.pool().shutdown()
+        with open(path, 'rb') as handle:
+            self.assertTrue(handle.read().startswith(b'%PDF'))
+
+
+@override_settings(SYNC_OVERLAP_SECONDS=0)
+class SyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params['since'] = since.isoformat()
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_full_copy_then_only_changes(self):
+        report_id = self.client.post('/api/reports/', report_payload(items=3, slots=4), format='json').data['id']
+        make_pdi_report(items=2)
+        full = self.sync()
+        self.assertEqual([len(full[key]) for key in ('reports', 'items', 'schedule_entries', 'pdi_reports', 'pdi_items')],
+                         [1, 3, 4, 1, 2])
+
+        since = timezone.now()
+        self.assertEqual(sum(len(rows) for key, rows in self.sync(since).items() if isinstance(rows, list)), 0)
+
+        # Re-saving the same form touches the report only; one edited reading ships one row
+        payload = report_payload(items=3, slots=4)
+        payload['schedule_entries'][2]['values'] = ['25.02']
+        self.client.put(f'/api/reports/{report_id}/', payload, format='json')
+        delta = self.sync(since)
+        self.assertEqual([row['id'] for row in delta['reports']], [report_id])
+        self.assertEqual(delta['items'], [])
+        self.assertEqual([row['values'] for row in delta['schedule_entries']], [['25.02']])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.sync(since)
+        self.assertEqual(len(queries), 6)
+
+    def test_deletes_leave_tombstones(self):
+        report = make_report(items=3, entries=2)
+        other = make_report(items=1, entries=1)
+        since = timezone.now()
+
+        self.client.put(f'/api/reports/{report.id}/', {'items': [
+            {'sr_no': 1, 'item': 'Item 1', 'spec': '25.0', 'tolerance': '±0.05'},
+            {'sr_no': 2, 'item': 'Item 2', 'spec': '25.0', 'tolerance': '±0.05'},
+        ]}, format='json')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.delete(f'/api/reports/{other.id}/')
+        # Children cascade with a fast DELETE, never loaded row by row
+        child_reads = [q['sql'] for q in queries if q['sql'].startswith('SELECT')
+                       and ('"inspection_items"' in q['sql'] or '"schedule_entries"' in q['sql'])]
+        self.assertEqual(child_reads, [])
+        entry = report.schedule_entries.first()
+        self.client.delete(f'/api/schedule/{entry.id}/')
+
+        deleted = self.sync(since)['deleted']
+        self.assertEqual([(row['model'], row['report']) for row in deleted],
+                         [('item', report.id), ('report', other.id), ('schedule_entry', report.id)])
+        self.assertEqual(deleted[-1]['id'], entry.id)
+
+    def test_since_validation(self):
+        self.assertEqual(self.client.get('/api/sync/?since=yesterday').status_code, 400)
+        old = (timezone.now() - timedelta(days=365)).isoformat()
+        self.assertEqual(self.client.get('/api/sync/', {'since': old}).status_code, 410)
+
+
+class EventTests(TestCase):
+    def test_broker_fan_out(self):
+        broker = InProcessBroker()
+
+        async def scenario():
+            first, second, other = broker.subscribe('report:1'), broker.subscribe('report:1'), broker.subscribe('report:2')
+            self.assertEqual(broker.publish('report:1', {'type': 'updated'}), 2)
+            events = await asyncio.gather(first.get(1), second.get(1))
+            self.assertEqual([event['type'] for event in events], ['updated', 'updated'])
+            self.assertTrue(other.queue.empty())
+            for subscription in (first, second, other):
+                broker.unsubscribe(subscription)
+            self.assertEqual(broker.subscriber_count(), 0)
+
+        asyncio.run(scenario())
+
+    def test_saves_publish_after_commit(self):
+        client = APIClient()
+        with mock.patch('inspectionform.events.get_broker') as get:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                report_id = client.post('/api/reports/', report_payload(items=2, slots=3), format='json').data['id']
+            get.return_value.publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+            self.assertEqual(get.return_value.publish.call_count, 3)
+
+            # Re-sending the form publishes only the row that changed
+            get.return_value.publish.reset_mock()
+            payload = report_payload(items=2, slots=3)
+            payload['schedule_entries'][1]['values'] = ['25.03']
+            with self.captureOnCommitCallbacks(execute=True):
+                client.put(f'/api/reports/{report_id}/', payload, format='json')
+            (topic, event), _ = get.return_value.publish.call_args
+            self.assertEqual(get.return_value.publish.call_count, 1)
+            self.assertEqual(topic, report_topic(report_id))
+            self.assertEqual((event['type'], event['values']), ('updated', ['25.03']))
+
+            entry = ScheduleEntry.objects.filter(report_id=report_id).first()
+            with self.captureOnCommitCallbacks(execute=True):
+                client.patch(f'/api/schedule/{entry.id}/', {'operator': 'SAM'}, format='json')
+            self.assertEqual(get.return_value.publish.call_args[0][1]['id'], entry.id)
+
+    async def test_event_stream(self):
+        report = await InspectionReport.objects.acreate(part_name='SHAFT')
+        self.assertEqual((await self.async_client.get('/api/reports/999999/events/')).status_code, 404)
+
+        response = await self.async_client.get(f'/api/reports/{report.id}/events/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+
+        broker = get_broker()
+        self.assertEqual(broker.subscriber_count(report_topic(report.id)), 1)
+        broker.publish(report_topic(report.id), {'type': 'created', 'report': report.id, 'id': 7})
+        chunk = (await anext(stream)).decode()
+        self.assertIn('event: created\n', chunk)
+        self.assertEqual(json.loads(chunk.split('data: ', 1)[1])['id'], 7)
+
+        # A client disconnect cancels the response task while it waits for the next event
+        waiting = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(broker.subscriber_count(report_topic(report.id)), 0)
+
+
+class BatchSaveTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def batch(self, mutations):
+        return self.client.post('/api/reports/batch/', {'mutations': mutations}, format='json')
+
+    def test_queued_saves_apply_once(self):
+        old = make_report(items=1, entries=1)
+        edited = report_payload(items=2, slots=3)
+        edited['schedule_entries'][0]['values'] = ['25.04']
+        mutations = [
+            {'key': 'tab-1', 'op': 'create', 'data': report_payload(items=2, slots=3)},
+            {'key': 'tab-2', 'op': 'update', 'ref': 'tab-1', 'data': edited},
+            {'key': 'tab-3', 'op': 'delete', 'id': old.id},
+        ]
+        response = self.batch(mutations)
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        report_id = results[0]['id']
+        self.assertEqual([(r['key'], r['op'], r['id'], r['duplicate']) for r in results],
+                         [('tab-1', 'create', report_id, False), ('tab-2', 'update', report_id, False),
+                          ('tab-3', 'delete', old.id, False)])
+        self.assertEqual(set(results[0]), {'key', 'op', 'id', 'version', 'duplicate'})
+        self.assertEqual(ScheduleEntry.objects.get(report_id=report_id, slot_index=0, row_order=0).values, ['25.04'])
+
+        # The response was lost on the way back; the tablet resends everything plus one new edit
+        again = self.batch(mutations + [{'key': 'tab-4', 'op': 'update', 'ref': 'tab-1', 'data': {'prepared_by': 'RAM'}}])
+        self.assertEqual([r['duplicate'] for r in again.data['results']], [True, True, True, False])
+        self.assertEqual(again.data['results'][0]['id'], report_id)
+        self.assertEqual(InspectionReport.objects.count(), 1)
+        self.assertEqual(InspectionReport.objects.get().prepared_by, 'RAM')
+
+    def test_batch_is_all_or_nothing(self):
+        response = self.batch([
+            {'key': 'a', 'op': 'create', 'data': report_payload(items=1, slots=1)},
+            {'key': 'b', 'op': 'update', 'id': 999999, 'data': {'prepared_by': 'RAM'}},
+            {'key': 'c', 'op': 'rename'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], [2])
+
+        response = self.batch([
+            {'key': 'a', 'op': 'create', 'data': report_payload(items=1, slots=1)},
+            {'key': 'b', 'op': 'update', 'id': 999999, 'data': {'prepared_by': 'RAM'}},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['key'] for error in response.data['errors']], ['b'])
+        self.assertFalse(InspectionReport.objects.exists())
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.batch([]).status_code, 400)
+
+
+class OptimisticConcurrencyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_stale_if_match_is_rejected(self):
+        report = make_report(items=2, entries=2)
+        url = f'/api/reports/{report.id}/'
+        etag = self.client.get(url)['ETag']
+
+        first = self.client.patch(url, {'prepared_by': 'RAM'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data['version'], 2)
+        self.assertNotEqual(first['ETag'], etag)
+
+        # The second inspector still holds the old ETag
+        second = self.client.put(url, {'prepared_by': 'SAM', 'items': []}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(second.status_code, 412)
+        self.assertEqual(second.data['version'], 2)
+        self.assertEqual(len(second.data['current']['items']), 2)
+        self.assertEqual(second['ETag'], first['ETag'])
+        report.refresh_from_db()
+        self.assertEqual((report.prepared_by, report.version, report.items.count()), ('RAM', 2, 2))
+
+        retry = self.client.put(url, {'prepared_by': 'SAM'}, format='json', HTTP_IF_MATCH=second['ETag'])
+        self.assertEqual((retry.status_code, retry.data['version']), (200, 3))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=retry['ETag']).status_code, 304)
+
+    def test_schedule_edits_bump_the_version(self):
+        report = make_report(items=1, entries=1)
+        etag = self.client.get(f'/api/reports/{report.id}/')['ETag']
+        entry = report.schedule_entries.get()
+        self.client.patch(f'/api/schedule/{entry.id}/', {'operator': 'RAM'}, format='json')
+        response = self.client.patch(f'/api/reports/{report.id}/', {'approved_by': 'QA'}, format='json',
+                                     HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+
+    def test_conditional_update_loses_race(self):
+        from inspectionform.serializers import InspectionReportCreateSerializer, VersionConflict
+
+        report = make_report(items=1, entries=1)
+        serializer = InspectionReportCreateSerializer(report, data={'prepared_by': 'RAM'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        InspectionReport.objects.filter(pk=report.pk).update(version=2)   # another save lands first
+        with self.assertRaises(VersionConflict):
+            serializer.save()
+        self.assertEqual(InspectionReport.objects.get(pk=report.pk).prepared_by, '')
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_histograms_per_view_and_action(self):
+        from inspectionform.metrics import SQL_QUERIES, REQUEST_SECONDS
+
+        make_report(items=2, entries=2)
+        labels = ('InspectionReportViewSet', 'list')
+        _, queries_before = SQL_QUERIES.series().get(labels, (None, 0))
+        for _ in range(3):
+            self.client.get('/api/reports/')
+        counts, queries = SQL_QUERIES.series()[labels]
+        self.assertGreaterEqual(queries - queries_before, 3 * 3)
+
+        self.client.get('/api/sync/')
+        self.assertIn(('sync_changes', 'get'), REQUEST_SECONDS.series())
+
+        text = self.client.get('/api/metrics/').content.decode()
+        self.assertIn('# TYPE inspection_request_seconds histogram', text)
+        self.assertIn('inspection_sql_queries_bucket{view="InspectionReportViewSet",action="list",le="+Inf"}', text)
+        self.assertIn('inspection_serialize_seconds_count{view="InspectionReportViewSet",action="list"}', text)
+        self.assertIn('inspection_responses_total{view="InspectionReportViewSet",action="list",status="200"}', text)
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_request_log_carries_sql(self):
+        report = make_report(items=1, entries=1)
+        with self.assertLogs('inspectionform.slow', level='WARNING') as logs:
+            self.client.get(f'/api/reports/{report.id}/')
+        self.assertIn('InspectionReportViewSet.retrieve', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+class SyntheticDataTests(TestCase):
+    def test_generate_data_command(self):
+        out = StringIO()
+        call_command('generate_data', '--reports', '4', '--pdi-reports', '2', '--customers', '2', '--parts', '2',
+                     '--operations', '2', stdout=out)
+        self.assertIn('Generated 4 reports', out.getvalue())
+        self.assertEqual(InspectionReport.objects.count(), 4)
+        self.assertEqual(InspectionItem.objects.count(), 4 * 20)
+        self.assertEqual(set(ScheduleEntry.objects.values_list('time_type', flat=True)), {'SETUP', '2HRS', '4HRS', 'LAST'})
+        self.assertFalse(ScheduleEntry.objects.filter(judgment='').exists())
+        self.assertEqual(PDIReport.objects.count(), 2)
+
+        # Reports are built from the master rows the dropdowns read
+        options = APIClient().get('/api/dropdown-options/').data
+        report = InspectionReport.objects.first()
+        self.assertEqual(len(options['customers']), 2)
+        self.assertIn(report.part_name, options['part_names'])
+        self.assertIn(report.operation_name, options['operations'])
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def create(self, values, **fields):
+        entries = [
+            {'slot_index': i, 'row_order': 0, 'time_type': 'SETUP', 'machine_no': 'M01', 'values': [value]}
+            for i, value in enumerate(values)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/reports/', report_payload(items=1, schedule_entries=entries, **fields),
+                                        format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def rollup(self, **key):
+        return DailyQualityRollup.objects.values('reports', 'ng_reports', 'rows', 'ok_rows', 'ng_rows').get(**key)
+
+    def test_rollups_follow_saves(self):
+        first = self.create(['25.01', '25.01', '25.20'])
+        self.create(['25.02', ''])
+        self.assertEqual(
+            self.rollup(day='2026-01-05', part_name='SHAFT', machine_no='M01'),
+            {'reports': 2, 'ng_reports': 1, 'rows': 5, 'ok_rows': 3, 'ng_rows': 1},
+        )
+
+        # Moving a report to another part recomputes both keys
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/reports/{first}/', {'part_name': 'GEAR'}, format='json')
+        self.assertEqual(self.rollup(part_name='SHAFT')['reports'], 1)
+        self.assertEqual(self.rollup(part_name='GEAR')['ng_rows'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/reports/{first}/')
+        self.assertFalse(DailyQualityRollup.objects.filter(part_name='GEAR').exists())
+
+    def test_resent_batch_after_rollback_refreshes(self):
+        entries = [{'slot_index': 0, 'row_order': 0, 'time_type': 'SETUP', 'machine_no': 'M01', 'values': ['25.01']}]
+        create = {'key': 'a', 'op': 'create', 'data': report_payload(items=1, schedule_entries=entries)}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/reports/batch/', {'mutations': [
+                create, {'key': 'b', 'op': 'update', 'id': 999999, 'data': {'prepared_by': 'RAM'}},
+            ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/reports/batch/', {'mutations': [create]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.rollup(part_name='SHAFT')['rows'], 1)
+
+    def test_pdi_rollups_and_rebuild(self):
+        report = make_pdi_report(items=2, inspection_date='2026-01-05', operation_name='TURNING')
+        report.items.filter(sr_no=1).update(cust_judge='ng')
+        make_pdi_report(items=2, inspection_date='2026-01-05', operation_name='TURNING')
+        self.create(['25.01'])
+        DailyQualityRollup.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_rollups', stdout=out)
+        self.assertIn('1 quality and 1 PDI rollup rows rebuilt', out.getvalue())
+        self.assertEqual(
+            DailyPDIRollup.objects.values('reports', 'ng_reports', 'items', 'ng_items').get(),
+            {'reports': 2, 'ng_reports': 1, 'items': 4, 'ng_items': 1},
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/pdi-reports/{report.id}/')
+        self.assertEqual(DailyPDIRollup.objects.get().ng_reports, 0)
+
+    def test_daily_and_breakdown(self):
+        self.create(['25.01', '25.20'], customer_name='ACME')
+        self.create(['25.01', '25.01'], customer_name='ZENITH', date='2026-01-07')
+        make_pdi_report(inspection_date='2026-01-05', customer_name='ACME')
+        call_command('rebuild_rollups', stdout=StringIO())
+
+        daily = self.client.get('/api/dashboard/daily/?date_from=2026-01-05&date_to=2026-01-07').json()
+        self.assertEqual([day['day'] for day in daily['days']], ['2026-01-05', '2026-01-06', '2026-01-07'])
+        self.assertEqual(daily['days'][0]['first_pass_yield'], 0.5)
+        self.assertEqual(daily['days'][0]['pdi_pass_rate'], 1.0)
+        self.assertIsNone(daily['days'][1]['first_pass_yield'])
+        self.assertEqual(daily['totals']['ng_rows'], 1)
+        self.assertEqual(daily['totals']['first_pass_yield'], 0.75)
+
+        breakdown = self.client.get('/api/dashboard/breakdown/?by=customer&date_from=2026-01-01&date_to=2026-01-31').json()
+        self.assertEqual([row['customer'] for row in breakdown['groups']], ['ACME', 'ZENITH'])
+        self.assertEqual(breakdown['groups'][1]['report_pass_rate'], 1.0)
+
+        machines = self.client.get('/api/dashboard/breakdown/?by=machine&date_from=2026-01-01&date_to=2026-01-31').json()
+        self.assertEqual(machines['groups'][0]['machine'], 'M01')
+        self.assertIsNone(machines['groups'][0]['pdi_pass_rate'])
+
+        self.assertEqual(self.client.get('/api/dashboard/daily/?date_from=2026-02-01&date_to=2026-01-01').status_code, 400)
+        self.assertEqual(self.client.get('/api/dashboard/breakdown/?by=shift').status_code, 400)
+        self.assertEqual(self.client.get('/api/dashboard/daily/?date_from=2026-02-30').status_code, 400)
+        self.assertEqual(self.client.get('/api/dashboard/breakdown/?date_to=2026-02-30').status_code, 400)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', '--date-from', '2026-02-30', stdout=StringIO())
+
+    def test_dashboard_reads_only_rollups(self):
+        self.create(['25.01'])
+        call_command('rebuild_rollups', stdout=StringIO())
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/dashboard/daily/?date_from=2026-01-01&date_to=2026-01-31')
+        self.assertEqual(len(queries), 6)
+        self.assertTrue(all('rollup_daily' in query['sql'] for query in queries))
+
+    def test_report_on_two_machines_counts_once(self):
+        entries = [
+            {'slot_index': 0, 'row_order': 0, 'time_type': 'SETUP', 'machine_no': 'M01', 'values': ['25.01']},
+            {'slot_index': 1, 'row_order': 0, 'time_type': 'SETUP', 'machine_no': 'M02', 'values': ['25.20']},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/reports/', report_payload(items=1, schedule_entries=entries), format='json')
+        params = 'date_from=2026-01-01&date_to=2026-01-31'
+
+        totals = self.client.get(f'/api/dashboard/daily/?{params}').json()['totals']
+        self.assertEqual((totals['reports'], totals['ng_reports'], totals['rows']), (1, 1, 2))
+        self.assertEqual(totals['report_pass_rate'], 0.0)
+        parts = self.client.get(f'/api/dashboard/breakdown/?by=part&{params}').json()['groups']
+        self.assertEqual(parts[0]['reports'], 1)
+
+        # Per machine the report counts on each machine it ran on
+        machines = self.client.get(f'/api/dashboard/breakdown/?by=machine&{params}').json()
+        self.assertEqual({row['machine']: row['reports'] for row in machines['groups']}, {'M01': 1, 'M02': 1})
+        self.assertEqual(machines['totals']['reports'], 2)
+        m01 = self.client.get(f'/api/dashboard/daily/?machine_no=M01&{params}').json()['totals']
+        self.assertEqual((m01['reports'], m01['ng_reports']), (1, 0))
+
+    def test_report_without_schedule_rows_counts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/reports/', report_payload(items=2, slots=0), format='json')
+            self.client.post('/api/reports/', report_payload(items=2, slots=2), format='json')
+        params = 'date_from=2026-01-01&date_to=2026-01-31'
+        listed = len(self.client.get('/api/reports/').json())
+        totals = self.client.get(f'/api/dashboard/daily/?{params}').json()['totals']
+        self.assertEqual((listed, totals['reports']), (2, 2))
+
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(self.client.get(f'/api/dashboard/daily/?{params}').json()['totals']['reports'], 2)
+
+
+@override_settings(SEARCH_BACKEND=None, SEARCH_REFRESH_SECONDS=0)
+class SearchTests(TestCase):
+    def setUp(self):
+        from inspectionform.search import get_backend
+        get_backend().invalidate()
+        self.client = APIClient()
+        self.housing = make_report(part_name='HOUSING A1', part_number='KG-01001', customer_name='ACME')
+        self.shaft = make_report(part_name='SHAFT B2', part_number='KG-02002', customer_name='ZENITH')
+        ScheduleEntry.objects.filter(report=self.shaft).update(machine_no='CNC-07', operator='PRIYA')
+        self.pdi = make_pdi_report(part_name='HOUSING A1', invoice_no='INV-55321')
+
+    def hits(self, query):
+        response = self.client.get('/api/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [(hit['kind'], hit['id']) for hit in response.data['results']]
+
+    def test_words_and_distance(self):
+        from inspectionform.search import edit_distance, words
+        self.assertEqual(words('KG-01001'), ['kg', '01001', 'kg01001'])
+        self.assertEqual(words('HOUSING A1'), ['housing', 'a1'])
+        self.assertEqual(edit_distance('hosuing', 'housing', 2), 1)
+        self.assertEqual(edit_distance('shaft', 'gear', 1), 2)
+
+    def test_prefix_typo_and_all_words(self):
+        self.assertEqual(self.hits('hou'), [('report', self.housing.id), ('pdi_report', self.pdi.id)])
+        self.assertEqual(self.hits('hosuing')[0], ('report', self.housing.id))
+        self.assertEqual(self.hits('kg01001'), [('report', self.housing.id)])
+        self.assertEqual(self.hits('KG-0200'), [('report', self.shaft.id)])
+        self.assertEqual(self.hits('inv 553'), [('pdi_report', self.pdi.id)])
+        self.assertEqual(self.hits('cnc07 priya'), [('report', self.shaft.id)])
+        self.assertEqual(self.hits('housing acme'), [('report', self.housing.id), ('pdi_report', self.pdi.id)])
+        self.assertEqual(self.hits('housing zenith'), [])
+
+        result = self.client.get('/api/search/', {'q': 'shaft'}).data['results'][0]
+        self.assertEqual(result['report']['part_number'], 'KG-02002')
+        self.assertEqual(result['matches'], [{'field': 'part_name', 'value': 'SHAFT B2'}])
+        self.assertEqual(self.client.get('/api/search/').status_code, 400)
+
+    def test_common_words_intersect_across_all_matches(self):
+        # "Chamfer 1" is on every report: a per-word top-N would be an arbitrary slice of them
+        sleeve = make_report(items=0, entries=0, part_name='SLEEVE C3', date='2025-01-01')
+        others = [make_report(items=0, entries=0, date='2026-01-05') for _ in range(60)]
+        InspectionItem.objects.bulk_create(
+            InspectionItem(report=report, sr_no=1, item='Chamfer 1') for report in [sleeve] + others
+        )
+        self.assertEqual(self.hits('sleeve cham'), [('report', sleeve.id)])
+        newest = [('report', report.id) for report in reversed(others)][:5]
+        self.assertEqual(self.hits('chamfer')[:5], newest)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.assertEqual(self.hits('gearbox'), [])
+        self.client.patch(f'/api/reports/{self.shaft.id}/', {'part_name': 'GEARBOX C3'}, format='json')
+        self.assertEqual(self.hits('gearbox'), [('report', self.shaft.id)])
+        self.assertEqual(self.hits('shaft'), [])
+
+        self.client.delete(f'/api/pdi-reports/{self.pdi.id}/')
+        self.assertEqual(self.hits('inv'), [])
+
+
+class ResponseEncodingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_fast_json_matches_drf(self):
+        from decimal import Decimal
+        import numpy as np
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        from inspectionform.renderers import FastJSONRenderer
+
+        report = make_report(items=20, entries=6)
+        data = self.client.get(f'/api/reports/{report.id}/').data
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+        odd = {'at': timezone.now(), 'day': timezone.localdate(), 'mean': Decimal('25.015'),
+               'sigma': np.float64(0.25), 'label': gettext_lazy('OK'), 'empty': None}
+        self.assertEqual(FastJSONRenderer().render(odd), JSONRenderer().render(odd))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        self.assertIn(b'\n    ', FastJSONRenderer().render(odd, 'application/json; indent=4'))
+
+    def test_large_bodies_are_gzipped(self):
+        import gzip
+        report = make_report(items=20, entries=8)
+        url = f'/api/reports/{report.id}/'
+        plain = self.client.get(url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertLess(len(response.content), len(plain.content) / 3)
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], plain['ETag'])
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+                         .status_code, 304)
+
+        small = self.client.get(f'/api/items/{report.items.first().id}/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+    def test_streams_compressed_except_events(self):
+        import gzip
+        from django.http import StreamingHttpResponse
+        from django.test import RequestFactory
+        from inspectionform.compression import CompressionMiddleware
+
+        make_report(items=2, entries=40)
+        plain = b''.join(self.client.get('/api/reports/export/').streaming_content)
+        response = self.client.get('/api/reports/export/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        chunks = list(response.streaming_content)
+        self.assertEqual(gzip.decompress(b''.join(chunks)), plain)
+        # 41 CSV lines, well under one buffer: a single compressed chunk, not one per row
+        self.assertEqual(len(chunks), 1)
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        events = StreamingHttpResponse(iter([b'data: 1\n\n']), content_type='text/event-stream')
+        events = CompressionMiddleware(lambda request: events)(request)
+        self.assertFalse(events.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(events.streaming_content), b'data: 1\n\n')
+
+    def test_accept_encoding(self):
+        from inspectionform import compression
+        self.assertIsNone(compression.accepted_encoding(''))
+        self.assertIsNone(compression.accepted_encoding('identity'))
+        self.assertIsNone(compression.accepted_encoding('gzip;q=0'))
+        self.assertEqual(compression.accepted_encoding('deflate, gzip;q=0.5'), 'gzip')
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual(compression.accepted_encoding('gzip, deflate, br'), 'gzip')
+            self.assertEqual(compression.accepted_encoding('*'), 'gzip')
+
+    @unittest.skipUnless(find_spec('brotli'), 'brotli is not installed')
+    def test_brotli_preferred(self):
+        import brotli
+        report = make_report(items=20, entries=8)
+        url = f'/api/reports/{report.id}/'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.client.get(url).content)
+
+    @unittest.skipUnless(find_spec('msgpack'), 'msgpack is not installed')
+    def test_msgpack_by_accept(self):
+        import msgpack
+        report = make_pdi_report(items=5)
+        url = f'/api/pdi-reports/{report.id}/'
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), self.client.get(url).json())
@@ -6,7 +6,16 @@ from .views import (
     ScheduleEntryViewSet,
     PDIReportViewSet,
     dropdown_options,
+    dropdown_suggest,
+    dropdown_tree,
     inspection_items_by_operation,
+    spc_summary,
+    sync_changes,
+    search_reports,
+    dashboard_daily,
+    dashboard_breakdown,
+    report_events,
+    metrics,
 )
 
 router = DefaultRouter()
@@ -22,5 +31,14 @@ router.register(r'pdi-reports', PDIReportViewSet, basename='pdi-report')
 urlpatterns = [
     path('', include(router.urls)),
     path('dropdown-options/',  dropdown_options,               name='dropdown-options'),
+    path('dropdown-options/suggest/', dropdown_suggest,        name='dropdown-suggest'),
+    path('dropdown-options/tree/',    dropdown_tree,           name='dropdown-tree'),
     path('inspection-items/',  inspection_items_by_operation,  name='inspection-items'),
+    path('spc/',               spc_summary,                    name='spc'),
+    path('reports/<int:pk>/events/', report_events,         name='report-events'),
+    path('sync/',              sync_changes,                   name='sync'),
+    path('search/',            search_reports,                 name='search'),
+    path('dashboard/daily/',     dashboard_daily,      name='dashboard-daily'),
+    path('dashboard/breakdown/', dashboard_breakdown,  name='dashboard-breakdown'),
+    path('metrics/',           metrics,                        name='metrics'),
 ]
\ No newline at end of file
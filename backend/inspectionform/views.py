@@ -1,96 +1,406 @@
+import hashlib
+import logging
+
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, action
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, F, Max
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import require_GET
+from .batch import BatchError, apply_batch, max_mutations
+from .conditional import make_etag, query_fingerprint, timestamp, not_modified, add_validators, etag_matches
+from .events import event_stream, publish_entries, report_topic
+from .export import ROW_TYPES, ExportUnavailable, export_response, schedule_rows, item_rows, pdi_rows
+from .importer import READERS, ImportFileError, ImportInProgress, import_file
+from .masterdata import master_data
+from . import metrics as request_metrics
+from . import rollups
+from .pagination import KeysetPagination
 from .models import InspectionReport, InspectionItem, ScheduleEntry, PDIReport, PDIItem
 from .serializers import (
     InspectionReportSerializer,
+    InspectionReportSummarySerializer,
     InspectionReportCreateSerializer,
+    VersionConflict,
     InspectionItemSerializer,
     ScheduleEntrySerializer,
     PDIReportSerializer,
+    PDIReportSummarySerializer,
     PDIReportCreateSerializer,
     PDIItemSerializer,
+    ImportJobSerializer,
 )
 
 
+logger = logging.getLogger(__name__)
+
+
+def export_file(request, row_iter, filename):
+    """export_response() for ?type=, an unknown or unavailable one answered as an API error"""
+    try:
+        response = export_response(row_iter, filename, request.query_params.get('type'),
+                                   asynchronous=isinstance(request._request, ASGIRequest))
+    except ExportUnavailable as e:
+        return Response({"detail": str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+    if response is None:
+        return Response({"detail": "type must be csv or xlsx."}, status=status.HTTP_400_BAD_REQUEST)
+    return response
+
+
 # ══════════════════════════════════════════
 #  DROPDOWN OPTIONS
 # ══════════════════════════════════════════
 
 @api_view(['GET'])
 def dropdown_options(request):
-    from django.db import connection
-
-    with connection.cursor() as cursor:
-        cursor.execute('SELECT DISTINCT customer_name FROM public."L1_part_info_master" WHERE customer_name IS NOT NULL AND customer_name != \'\' ORDER BY customer_name')
-        customers = [row[0] for row in cursor.fetchall()]
+    options, fingerprint = master_data.dropdown_options(with_fingerprint=True)
+    etag = make_etag('dropdown', fingerprint)
+    return not_modified(request, etag) or add_validators(Response(options), etag)
 
-        cursor.execute('SELECT DISTINCT part_name FROM public."L1_part_info_master" WHERE part_name IS NOT NULL AND part_name != \'\' ORDER BY part_name')
-        part_names = [row[0] for row in cursor.fetchall()]
 
-        cursor.execute('SELECT DISTINCT part_no FROM public."L1_part_info_master" WHERE part_no IS NOT NULL AND part_no != \'\' ORDER BY part_no')
-        part_numbers = [row[0] for row in cursor.fetchall()]
+@api_view(['GET'])
+def dropdown_suggest(request):
+    """?field=part_name&q=SHA → the first matches of one dropdown list (masterdata.SuggestIndex)"""
+    from .masterdata import SUGGEST_FIELDS
+
+    field = request.query_params.get('field', '')
+    if field not in SUGGEST_FIELDS:
+        return Response(
+            {"detail": f"field must be one of {', '.join(SUGGEST_FIELDS)}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+    except ValueError:
+        return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    query = request.query_params.get('q', '')
+
+    index = master_data.suggest_index()
+    etag = make_etag('suggest', index.fingerprint, query_fingerprint(request))
+    return not_modified(request, etag) or add_validators(
+        Response({'field': field, 'q': query, 'results': index.suggest(field, query, limit)}), etag,
+    )
 
-        cursor.execute('SELECT DISTINCT report_name FROM public."L2_process_report_master" WHERE report_name IS NOT NULL AND report_name != \'\' ORDER BY report_name')
-        operations = [row[0] for row in cursor.fetchall()]
 
-    return Response({
-        'customers': customers,
-        'part_names': part_names,
-        'part_numbers': part_numbers,
-        'operations': operations,
-    })
+@api_view(['GET'])
+def dropdown_tree(request):
+    """
+    The whole customer → part → part number → operation tree, or with
+    ?customer= [&part_name= [&part_number=]] just the subtree of one node.
+    ``version`` changes whenever the master data does; both are encoded once
+    per version.
+    """
+    fingerprint = master_data.hierarchy(with_fingerprint=True)[1]
+    customer = request.query_params.get('customer')
+    part_name = request.query_params.get('part_name')
+    part_number = request.query_params.get('part_number')
+
+    etag = make_etag('tree', fingerprint, query_fingerprint(request))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    if customer is None:
+        if part_name is not None or part_number is not None:
+            return Response({"detail": "customer is required."}, status=status.HTTP_400_BAD_REQUEST)
+        # Encoded once per version: a large master costs nothing to render again
+        body, _ = master_data.hierarchy_body()
+        return add_validators(HttpResponse(body, content_type='application/json'), etag)
+    if part_number is not None and part_name is None:
+        return Response({"detail": "part_number needs part_name."}, status=status.HTTP_400_BAD_REQUEST)
+
+    body, _ = master_data.hierarchy_node_body(customer, part_name, part_number)
+    if body is None:
+        return Response({"detail": "No such customer / part / part number."}, status=status.HTTP_404_NOT_FOUND)
+    return add_validators(HttpResponse(body, content_type='application/json'), etag)
 
 
 @api_view(['GET'])
 def inspection_items_by_operation(request):
-    from django.db import connection
-
     operation = request.query_params.get('operation', '')
     if not operation:
         return Response({'product': [], 'process': []})
 
-    with connection.cursor() as cursor:
-        cursor.execute('''
-            SELECT l3.category, l3.parameter_name, l3.specification, l3.instrument
-            FROM public."L3_parameter_detail_master" l3
-            JOIN public."L2_process_report_master" l2 ON l3.process_report_id = l2.id
-            WHERE l2.report_name = %s
-            ORDER BY l3.category, l3.id
-        ''', [operation])
-        rows = cursor.fetchall()
+    parameters, fingerprint = master_data.operation_parameters(operation, with_fingerprint=True)
+    etag = make_etag('parameters', fingerprint)
+    return not_modified(request, etag) or add_validators(Response(parameters), etag)
+
+
+# ══════════════════════════════════════════
+#  SPC ANALYTICS
+# ══════════════════════════════════════════
+
+SPC_FILTERS = ['part_name', 'operation_name', 'customer_name', 'machine_no', 'date_from', 'date_to']
+
+
+@api_view(['GET'])
+def spc_summary(request):
+    from .spc import compute_spc
+
+    params = {key: request.query_params.get(key, '') for key in SPC_FILTERS}
+    if not params['part_name'] and not params['operation_name']:
+        return Response(
+            {"detail": "part_name or operation_name is required."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    for name in ('date_from', 'date_to'):
+        if params[name]:
+            try:
+                params[name] = parse_date(params[name])
+            except ValueError:   # well formed but impossible, e.g. 2026-13-45
+                params[name] = None
+            if params[name] is None:
+                return Response({"detail": f"{name} must be a valid YYYY-MM-DD date."},
+                                status=status.HTTP_400_BAD_REQUEST)
+    return Response(compute_spc(params))
+
+
+# ══════════════════════════════════════════
+#  DELTA SYNC
+# ══════════════════════════════════════════
+
+@api_view(['GET'])
+def sync_changes(request):
+    """?since=<the previous response's next> → only rows changed or deleted after it"""
+    from .sync import changes, retention
+
+    since = request.query_params.get('since')
+    if since:
+        since = parse_datetime(since)
+        if since is None:
+            return Response({"detail": "since must be an ISO 8601 timestamp."}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        if since < timezone.now() - retention():
+            return Response(
+                {"detail": "since is older than the deletion history; fetch a full copy without since."},
+                status=status.HTTP_410_GONE
+            )
+    return Response(changes(since or None, request.query_params.get('date')))
+
+
+# ══════════════════════════════════════════
+#  SEARCH
+# ══════════════════════════════════════════
+
+@api_view(['GET'])
+def search_reports(request):
+    """?q= → inspection and PDI reports ranked by prefix / typo-tolerant match (search.py)"""
+    from .search import search
+
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({"detail": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(int(request.query_params.get('limit', 20)), 100)
+    except ValueError:
+        return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'query': query, 'results': search(query, max(limit, 1))})
+
+
+# ══════════════════════════════════════════
+#  DASHBOARD (daily rollups)
+# ══════════════════════════════════════════
+
+@api_view(['GET'])
+def dashboard_daily(request):
+    from .dashboard import DashboardError, daily
+
+    try:
+        return Response(daily(request.query_params))
+    except DashboardError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+def dashboard_breakdown(request):
+    from .dashboard import DashboardError, breakdown
+
+    try:
+        return Response(breakdown(request.query_params))
+    except DashboardError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+# ══════════════════════════════════════════
+#  METRICS
+# ══════════════════════════════════════════
+
+def metrics(request):
+    """Prometheus scrape target for the per-view histograms kept by MetricsMiddleware"""
+    return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
-    product_items = []
-    process_items = []
 
-    for row in rows:
-        category, parameter_name, specification, instrument = row
-        item = {
-            'name': parameter_name or '',
-            'spec': specification or '',
-            'instrument': instrument or '',
-        }
-        if category == 'PRODUCT':
-            product_items.append(item)
-        elif category == 'PROCESS':
-            process_items.append(item)
+# ══════════════════════════════════════════
+#  LIVE SCHEDULE EVENTS (SSE)
+# ══════════════════════════════════════════
+
+@require_GET
+async def report_events(request, pk):
+    """
+    text/event-stream of schedule-entry creates/updates for one report.
+    A plain async Django view, so each idle subscriber is just a parked
+    coroutine — serve it with an ASGI server (backend/asgi.py).
+    """
+    if not await InspectionReport.objects.filter(pk=pk).aexists():
+        return JsonResponse({"detail": f"Report with ID {pk} not found."}, status=404)
+    return StreamingHttpResponse(
+        event_stream(report_topic(pk)),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+# ══════════════════════════════════════════
+#  CONDITIONAL GET (ETag / Last-Modified)
+# ══════════════════════════════════════════
+
+class ConditionalGetMixin:
+    """
+    Validators come from updated_at, so a matching If-None-Match is answered
+    with one aggregate query and a 304 — no prefetch, no serialization.
+    """
+    etag_prefix = None
+    version_field = None     # models with optimistic concurrency tag objects by version
+
+    def list_validators(self, queryset):
+        stats = queryset.order_by().aggregate(count=Count('id'), last_modified=Max('updated_at'))
+        etag = make_etag(
+            self.etag_prefix, query_fingerprint(self.request),
+            stats['count'], timestamp(stats['last_modified']),
+        )
+        return etag, stats['last_modified']
+
+    def object_validators(self, queryset, pk):
+        if self.version_field:
+            row = queryset.filter(pk=pk).values_list('updated_at', self.version_field).first()
+            if row is None:
+                return None, None
+            return self.version_etag(pk, row[1]), row[0]
+        last_modified = queryset.filter(pk=pk).values_list('updated_at', flat=True).first()
+        if last_modified is None:
+            return None, None
+        return make_etag(self.etag_prefix, pk, timestamp(last_modified)), last_modified
+
+    def version_etag(self, pk, version):
+        return make_etag(self.etag_prefix, pk, f'v{version}')
+
+    def latest_validators(self, queryset):
+        newest = queryset.order_by('-id').values('id', 'updated_at').first()
+        if newest is None:
+            return None, None
+        etag = make_etag(
+            self.etag_prefix, query_fingerprint(self.request),
+            newest['id'], timestamp(newest['updated_at']),
+        )
+        return etag, newest['updated_at']
+
+
+class TouchReportMixin:
+    """Edits made straight through /items/ or /schedule/ still bump the report's updated_at and version."""
+
+    def touch_report(self, report_id):
+        InspectionReport.objects.filter(pk=report_id).update(updated_at=timezone.now(), version=F('version') + 1)
+        rollups.mark_reports([report_id])
+
+    def perform_create(self, serializer):
+        instance = serializer.save()
+        self.touch_report(instance.report_id)
+
+    def perform_update(self, serializer):
+        instance = serializer.save()
+        self.touch_report(instance.report_id)
+
+    def perform_destroy(self, instance):
+        report_id = instance.report_id
+        instance.delete()
+        self.touch_report(report_id)
+
+
+class PrintMixin:
+    """
+    /{id}/pdf/ and /pdf/?date= — the printable layout rendered on the server
+    (printing.py), cached on disk per report version and revalidated with
+    the same ETag / Last-Modified as the JSON.
+    """
+    pdf_kind = None
+    pdf_order = None
+
+    def pdf_response(self, path, filename, etag, last_modified):
+        response = FileResponse(open(path, 'rb'), content_type='application/pdf', filename=filename)
+        return add_validators(response, etag, last_modified)
+
+    @action(detail=True, methods=['get'])
+    def pdf(self, request, pk=None):
+        from .printing import printer
+
+        etag, last_modified = self.object_validators(self.queryset.model.objects.all(), pk)
+        if etag is None:
+            return Response({"detail": "Report not found."}, status=status.HTTP_404_NOT_FOUND)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
+        def load():
+            report = get_object_or_404(self.with_children(self.queryset.model.objects.all()), pk=pk)
+            return [self.get_serializer_class()(report, context=self.get_serializer_context()).data]
+
+        path = printer.get(f'{self.pdf_kind}-{pk}', timestamp(last_modified), self.pdf_kind, load)
+        return self.pdf_response(path, f'{self.pdf_kind}-{pk}.pdf', etag, last_modified)
+
+    @action(detail=False, methods=['get'], url_path='pdf')
+    def print_day(self, request):
+        """Every report of ?date= (narrowed by any list filter) in one PDF, for batch printing"""
+        from .printing import printer
+
+        date = request.query_params.get('date')
+        if not date:
+            return Response({"detail": "date is required."}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.get_queryset()
+        etag, last_modified = self.list_validators(queryset)
+        if last_modified is None:
+            return Response({"detail": "No report found for selected filters."}, status=status.HTTP_404_NOT_FOUND)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
 
-    return Response({'product': product_items, 'process': process_items})
+        def load():
+            reports = self.with_children(queryset).order_by(*self.pdf_order)
+            return self.get_serializer_class()(reports, many=True, context=self.get_serializer_context()).data
+
+        version = hashlib.md5(etag.encode()).hexdigest()[:12]
+        name = f'{self.pdf_kind}-day-{date}-{query_fingerprint(request)}'
+        path = printer.get(name, version, self.pdf_kind, load)
+        return self.pdf_response(path, f'{self.pdf_kind}-{date}.pdf', etag, last_modified)
 
 
 # ══════════════════════════════════════════
 #  SETUP & PATROL INSPECTION VIEWS
 # ══════════════════════════════════════════
 
-class InspectionReportViewSet(viewsets.ModelViewSet):
+class InspectionReportViewSet(ConditionalGetMixin, PrintMixin, viewsets.ModelViewSet):
     queryset = InspectionReport.objects.all()
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-date', '-id')
+    etag_prefix = 'reports'
+    version_field = 'version'
+    pdf_kind = 'inspection'
+    pdf_order = ('date', 'id')
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return InspectionReportCreateSerializer
         return InspectionReportSerializer
 
+    def with_children(self, queryset):
+        # Load items/schedule rows in one query each instead of once per report
+        return queryset.prefetch_related('items', 'schedule_entries').annotate(
+            item_count=Count('items', distinct=True)
+        )
+
     def get_queryset(self):
         queryset = InspectionReport.objects.all().order_by("-date", "-id")
         date          = self.request.query_params.get('date')
@@ -105,14 +415,115 @@ class InspectionReportViewSet(viewsets.ModelViewSet):
         return queryset
 
     def list(self, request):
-        queryset = self.get_queryset()
-        serializer = InspectionReportSerializer(queryset, many=True)
-        return Response(serializer.data)
+        etag, last_modified = self.list_validators(self.get_queryset())
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
+        # ?view=summary → header rows only, no nested items / schedule entries
+        if request.query_params.get('view') == 'summary':
+            queryset = self.get_queryset().annotate(item_count=Count('items'))
+            serializer_class = InspectionReportSummarySerializer
+        else:
+            queryset = self.with_children(self.get_queryset())
+            serializer_class = InspectionReportSerializer
+
+        # ?page_size= / ?cursor= → keyset pages; otherwise the full array as before
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(serializer_class(page, many=True, context=self.get_serializer_context()).data)
+        else:
+            response = Response(serializer_class(queryset, many=True, context=self.get_serializer_context()).data)
+        return add_validators(response, etag, last_modified)
+
+    @action(detail=False, methods=['get'])
+    def latest(self, request):
+        """Newest report (highest id) matching the list filters, with full detail"""
+        etag, last_modified = self.latest_validators(self.get_queryset())
+        if etag is None:
+            return Response(
+                {"detail": "No report found for selected filters."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
+        report = self.with_children(self.get_queryset()).order_by('-id').first()
+        return add_validators(Response(InspectionReportSerializer(report, context=self.get_serializer_context()).data), etag, last_modified)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Filtered reports as a flat file, one row per schedule entry
+        (?rows=items → one row per inspection item).  ?type=csv|xlsx
+        """
+        rows = request.query_params.get('rows', 'schedule')
+        if rows not in ROW_TYPES:
+            # Also keeps the value out of the Content-Disposition header unless it is one of these
+            return Response({"detail": f"rows must be one of {', '.join(ROW_TYPES)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        row_iter = item_rows(self.get_queryset()) if rows == 'items' else schedule_rows(self.get_queryset())
+        filename = f'inspection-{rows}-{timezone.localdate():%Y%m%d}'
+        return export_file(request, row_iter, filename)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Multipart upload of a JSONL or CSV file (field "file").  Uploading the
+        same file again resumes an interrupted import instead of duplicating it.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "Upload the file as multipart field \"file\"."}, status=status.HTTP_400_BAD_REQUEST)
+        file_type = request.query_params.get('type') or upload.name.rsplit('.', 1)[-1].lower()
+        if file_type not in READERS:
+            return Response({"detail": "type must be jsonl or csv."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            job = import_file(upload.file, upload.name, file_type)
+        except ImportFileError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ImportInProgress as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        except Exception as e:
+            logger.exception("Import of %s failed", upload.name)
+            return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(ImportJobSerializer(job).data)
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Queued offline saves in one request: {"mutations": [{key, op, id|ref, data}, ...]}.
+        All-or-nothing; keys already applied replay their stored result.
+        Returns ids and versions only, never full reports.
+        """
+        mutations = request.data.get('mutations') if isinstance(request.data, dict) else request.data
+        if not isinstance(mutations, list) or not mutations:
+            return Response({"detail": "Send a non-empty \"mutations\" list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(mutations) > max_mutations():
+            return Response({"detail": f"At most {max_mutations()} mutations per batch."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results = apply_batch(mutations)
+        except BatchError as e:
+            logger.warning("Batch rejected: %s", e.errors)
+            return Response({"detail": "No mutations were applied.", "errors": e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception("Batch save failed")
+            return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({"results": results})
 
     def retrieve(self, request, pk=None):
-        report = get_object_or_404(InspectionReport, pk=pk)
-        serializer = InspectionReportSerializer(report)
-        return Response(serializer.data)
+        etag, last_modified = self.object_validators(InspectionReport.objects.all(), pk)
+        if etag is not None:
+            cached = not_modified(request, etag, last_modified)
+            if cached is not None:
+                return cached
+
+        report = get_object_or_404(self.with_children(InspectionReport.objects.all()), pk=pk)
+        serializer = InspectionReportSerializer(report, context=self.get_serializer_context())
+        return add_validators(Response(serializer.data), etag, last_modified)
 
     def create(self, request):
         try:
@@ -125,15 +536,28 @@ class InspectionReportViewSet(viewsets.ModelViewSet):
             serializer = InspectionReportCreateSerializer(data=data)
             if serializer.is_valid():
                 report = serializer.save()
-                return Response(InspectionReportSerializer(report).data, status=status.HTTP_201_CREATED)
-            print("SERIALIZER ERRORS:", serializer.errors)
+                response = Response(InspectionReportSerializer(report, context=self.get_serializer_context()).data, status=status.HTTP_201_CREATED)
+                return add_validators(response, self.version_etag(report.pk, report.version), report.updated_at)
+            logger.warning("Report create rejected: %s", serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            import traceback
-            print("CREATE ERROR:", traceback.format_exc())
+            logger.exception("Report create failed")
             return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def update(self, request, pk=None):
+        return self.save_report(request, pk, partial=False)
+
+    def partial_update(self, request, pk=None):
+        return self.save_report(request, pk, partial=True)
+
+    def save_report(self, request, pk, partial):
+        """
+        PUT/PATCH with optimistic concurrency.  If-Match carries the ETag the
+        client read; a stale one gets 412 with the current report so the
+        client can merge just the slots that differ.  Without If-Match the
+        save is still checked against the version loaded here, and a write
+        that lands in between gets 409.
+        """
         try:
             report = InspectionReport.objects.get(pk=pk)
         except InspectionReport.DoesNotExist:
@@ -141,29 +565,44 @@ class InspectionReportViewSet(viewsets.ModelViewSet):
                 {"detail": f"Report with ID {pk} not found."},
                 status=status.HTTP_404_NOT_FOUND
             )
-        serializer = InspectionReportCreateSerializer(report, data=request.data)
-        if serializer.is_valid():
-            report = serializer.save()
-            return Response(InspectionReportSerializer(report).data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-    def partial_update(self, request, pk=None):
-        report = get_object_or_404(InspectionReport, pk=pk)
-        serializer = InspectionReportCreateSerializer(report, data=request.data, partial=True)
-        if serializer.is_valid():
+        if_match = request.META.get('HTTP_IF_MATCH')
+        if if_match is not None and not etag_matches(if_match, self.version_etag(pk, report.version)):
+            return self.stale(pk, status.HTTP_412_PRECONDITION_FAILED)
+
+        serializer = InspectionReportCreateSerializer(
+            report, data=request.data, partial=partial, context={'expected_version': report.version},
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
             report = serializer.save()
-            return Response(InspectionReportSerializer(report).data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        except VersionConflict:
+            conflict = status.HTTP_409_CONFLICT if if_match is None else status.HTTP_412_PRECONDITION_FAILED
+            return self.stale(pk, conflict)
+        response = Response(InspectionReportSerializer(report, context=self.get_serializer_context()).data)
+        return add_validators(response, self.version_etag(pk, report.version), report.updated_at)
+
+    def stale(self, pk, code):
+        report = get_object_or_404(self.with_children(InspectionReport.objects.all()), pk=pk)
+        current = InspectionReportSerializer(report, context=self.get_serializer_context()).data
+        response = Response(
+            {"detail": "Report was changed by someone else.", "version": report.version, "current": current},
+            status=code,
+        )
+        return add_validators(response, self.version_etag(pk, report.version), report.updated_at)
 
     def destroy(self, request, pk=None):
         report = get_object_or_404(InspectionReport, pk=pk)
         report.delete()
+        rollups.mark(quality=[rollups.quality_key(report)])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class InspectionItemViewSet(viewsets.ModelViewSet):
+class InspectionItemViewSet(TouchReportMixin, viewsets.ModelViewSet):
     queryset = InspectionItem.objects.all()
     serializer_class = InspectionItemSerializer
+    pagination_class = KeysetPagination
+    cursor_ordering = ('report_id', 'sr_no')
 
     def get_queryset(self):
         queryset = InspectionItem.objects.all()
@@ -173,9 +612,19 @@ class InspectionItemViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class ScheduleEntryViewSet(viewsets.ModelViewSet):
+class ScheduleEntryViewSet(TouchReportMixin, viewsets.ModelViewSet):
     queryset = ScheduleEntry.objects.all()
     serializer_class = ScheduleEntrySerializer
+    pagination_class = KeysetPagination
+    cursor_ordering = ('report_id', 'sr', 'slot_index', 'row_order', 'id')
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        publish_entries([serializer.instance], 'created')
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        publish_entries([serializer.instance], 'updated')
 
     def get_queryset(self):
         queryset = ScheduleEntry.objects.all()
@@ -189,14 +638,22 @@ class ScheduleEntryViewSet(viewsets.ModelViewSet):
 #  PDI REPORT VIEWS
 # ══════════════════════════════════════════
 
-class PDIReportViewSet(viewsets.ModelViewSet):
+class PDIReportViewSet(ConditionalGetMixin, PrintMixin, viewsets.ModelViewSet):
     queryset = PDIReport.objects.all()
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-inspection_date', '-id')
+    etag_prefix = 'pdi-reports'
+    pdf_kind = 'pdi'
+    pdf_order = ('inspection_date', 'id')
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return PDIReportCreateSerializer
         return PDIReportSerializer
 
+    def with_children(self, queryset):
+        return queryset.prefetch_related('items')
+
     def get_queryset(self):
         queryset = PDIReport.objects.all().order_by('-inspection_date', '-id')
 
@@ -213,14 +670,58 @@ class PDIReportViewSet(viewsets.ModelViewSet):
         return queryset
 
     def list(self, request):
-        queryset = self.get_queryset()
-        serializer = PDIReportSerializer(queryset, many=True)
-        return Response(serializer.data)
+        etag, last_modified = self.list_validators(self.get_queryset())
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
+        # ?view=summary → header rows only, no nested items
+        if request.query_params.get('view') == 'summary':
+            queryset = self.get_queryset()
+            serializer_class = PDIReportSummarySerializer
+        else:
+            queryset = self.with_children(self.get_queryset())
+            serializer_class = PDIReportSerializer
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(serializer_class(page, many=True, context=self.get_serializer_context()).data)
+        else:
+            response = Response(serializer_class(queryset, many=True, context=self.get_serializer_context()).data)
+        return add_validators(response, etag, last_modified)
+
+    @action(detail=False, methods=['get'])
+    def latest(self, request):
+        """Newest PDI report (highest id) matching the list filters, with items"""
+        etag, last_modified = self.latest_validators(self.get_queryset())
+        if etag is None:
+            return Response(
+                {"detail": "No PDI report found for selected filters."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
+        report = self.with_children(self.get_queryset()).order_by('-id').first()
+        return add_validators(Response(PDIReportSerializer(report).data), etag, last_modified)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Filtered PDI reports as a flat file, one row per PDI item.  ?type=csv|xlsx"""
+        filename = f'pdi-{timezone.localdate():%Y%m%d}'
+        return export_file(request, pdi_rows(self.get_queryset()), filename)
 
     def retrieve(self, request, pk=None):
-        report = get_object_or_404(PDIReport, pk=pk)
+        etag, last_modified = self.object_validators(PDIReport.objects.all(), pk)
+        if etag is not None:
+            cached = not_modified(request, etag, last_modified)
+            if cached is not None:
+                return cached
+
+        report = get_object_or_404(self.with_children(PDIReport.objects.all()), pk=pk)
         serializer = PDIReportSerializer(report)
-        return Response(serializer.data)
+        return add_validators(Response(serializer.data), etag, last_modified)
 
     def create(self, request):
         try:
@@ -228,11 +729,10 @@ class PDIReportViewSet(viewsets.ModelViewSet):
             if serializer.is_valid():
                 report = serializer.save()
                 return Response(PDIReportSerializer(report).data, status=status.HTTP_201_CREATED)
-            print("PDI SERIALIZER ERRORS:", serializer.errors)
+            logger.warning("PDI report create rejected: %s", serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            import traceback
-            print("PDI CREATE ERROR:", traceback.format_exc())
+            logger.exception("PDI report create failed")
             return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def update(self, request, pk=None):
@@ -252,4 +752,5 @@ class PDIReportViewSet(viewsets.ModelViewSet):
     def destroy(self, request, pk=None):
         report = get_object_or_404(PDIReport, pk=pk)
         report.delete()
+        rollups.mark(pdi=[rollups.pdi_key(report)])
         return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -17,7 +17,7 @@ import PDIForm from './PDIForm';
 import Scrapnoteprint from './Scrapnoteprint';
 import ScrapNoteSelection from './ScrapNoteSelection';
 import RedBinAttendance from './RedBinAttendance';
-import { getReportById, createReport, updateReport } from './services/api';
+import { getReportById, getLatestReport, createReport, updateReport } from './services/api';
 
 function FormPageWrapper({ onAddItem, items = [], currentReport = null }) {
   const navigate = useNavigate();
@@ -145,11 +145,8 @@ function AppContent() {
   const handleDateChange = async (date) => {
     try {
       setLoading(true);
-      const response = await fetch(`http://localhost:8000/api/reports/?date=${date}`);
-      const reports  = await response.json();
-      if (reports && reports.length > 0) {
-        const sorted = [...reports].sort((a, b) => b.id - a.id);
-        const full   = await getReportById(sorted[0].id);
+      const full = await getLatestReport({ date });
+      if (full) {
         applyReport(full);
       } else {
         setCurrentReport({
@@ -171,19 +168,14 @@ function AppContent() {
   const handleFilter = async ({ date, partName, operation, customerName }) => {
     try {
       setLoading(true);
-      const params = [];
-      if (date)         params.push(`date=${date}`);
-      if (partName)     params.push(`part_name=${encodeURIComponent(partName)}`);
-      if (operation)    params.push(`operation_name=${encodeURIComponent(operation)}`);
-      if (customerName) params.push(`customer_name=${encodeURIComponent(customerName)}`);
-
-      const url      = `http://localhost:8000/api/reports/?${params.join('&')}`;
-      const response = await fetch(url);
-      const reports  = await response.json();
-
-      if (reports && reports.length > 0) {
-        const sorted = [...reports].sort((a, b) => b.id - a.id);
-        const full   = await getReportById(sorted[0].id);
+      const filters = {};
+      if (date)         filters.date           = date;
+      if (partName)     filters.part_name      = partName;
+      if (operation)    filters.operation_name = operation;
+      if (customerName) filters.customer_name  = customerName;
+
+      const full = await getLatestReport(filters);
+      if (full) {
         applyReport(full);
       } else {
         alert('No report found for selected filters.');
@@ -211,7 +203,7 @@ function AppContent() {
       }));
 
       const newScheduleEntries = (formData.schedule_entries || []).map(entry => {
-        const { _isNew: _flag, values, id, ...cleanEntry } = entry;
+        const { _isNew: _flag, id, ...cleanEntry } = entry;
         return {
           ...cleanEntry,
           sr:         cleanEntry.sr         ?? 1,
@@ -321,18 +313,17 @@ function AppContent() {
       if (partName)     params.push(`part_name=${encodeURIComponent(partName)}`);
       if (customerName) params.push(`customer_name=${encodeURIComponent(customerName)}`);
 
-      const url      = `http://localhost:8000/api/pdi-reports/?${params.join('&')}`;
+      const url      = `http://localhost:8000/api/pdi-reports/latest/?${params.join('&')}`;
       const response = await fetch(url);
-      const reports  = await response.json();
 
-      if (reports && reports.length > 0) {
-        const sorted  = [...reports].sort((a, b) => b.id - a.id);
-        const fullRes = await fetch(`http://localhost:8000/api/pdi-reports/${sorted[0].id}/`);
-        const data    = await fullRes.json();
+      if (response.ok) {
+        const data = await response.json();
         setDiReport(data);
         setDiItems(data.items || []);
-      } else {
+      } else if (response.status === 404) {
         alert('No PDI report found for selected filters.');
+      } else {
+        throw new Error(`HTTP ${response.status}`);
       }
     } catch (error) {
       console.error('Dispatch filter error:', error);
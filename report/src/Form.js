@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import './Form.css';
-import { getDropdownOptions } from './services/api';
+import { getDropdownOptions, getDropdownTree } from './services/api';
+import { narrowOptions } from './services/hierarchy';
 
 const parseSpecTol = (raw = '') => {
   if (!raw) return { spec: '', tol: '' };
@@ -432,6 +433,7 @@ const Form = ({ onSubmit, onCancel, initialData={}, items=[] }) => {
   const [step, setStep] = useState(1);
   const [dbOptions, setDbOptions]     = useState({ customers:[], part_names:[], part_numbers:[], operations:[] });
   const [optionsLoading, setOptionsLoading] = useState(true);
+  const [tree, setTree] = useState(null);
 
   useEffect(() => {
     getDropdownOptions()
@@ -442,6 +444,7 @@ const Form = ({ onSubmit, onCancel, initialData={}, items=[] }) => {
           setHeader(p => ({...p, partNumber: data.part_numbers[0]}));
       })
       .catch(() => setOptionsLoading(false));
+    getDropdownTree().then(setTree).catch(() => {});
   }, []);
 
   const [header, setHeader] = useState({
@@ -450,6 +453,14 @@ const Form = ({ onSubmit, onCancel, initialData={}, items=[] }) => {
     operationName: initialData.operation_name || '',
     partNumber:    initialData.part_number    || '',
   });
+  // Parts of the chosen customer, operations and numbers of the chosen part
+  const options = narrowOptions(tree, dbOptions, {
+    customer: header.customerName, part: header.partName, operation: header.operationName,
+  });
+  useEffect(() => {
+    if (options.part_numbers.length === 1 && header.partNumber !== options.part_numbers[0])
+      setHeader(p => ({...p, partNumber: options.part_numbers[0]}));
+  }, [options.part_numbers, header.partNumber]);
   const step1Done = !!(header.customerName && header.partName && header.operationName && header.partNumber);
 
   const existingProducts  = items.filter(i=>i.sr_no<=10);
@@ -498,7 +509,8 @@ const Form = ({ onSubmit, onCancel, initialData={}, items=[] }) => {
         readingCount:2, readings:[Array(MAX_COLS).fill(''),Array(MAX_COLS).fill('')]
       };
       const vals=Array(MAX_COLS).fill('');
-      for(let i=0;i<MAX_COLS;i++) vals[i]=e[`value_${i+1}`]||'';
+      const src=e.values||[];
+      for(let i=0;i<MAX_COLS;i++) vals[i]=src[i]||'';
       const ri=e.row_order||0;
       while(map[k].readings.length<=ri) map[k].readings.push(Array(MAX_COLS).fill(''));
       map[k].readings[ri]=vals;
@@ -624,7 +636,7 @@ const Form = ({ onSubmit, onCancel, initialData={}, items=[] }) => {
       const filledAt=slot.savedAt?new Date(slot.savedAt).toISOString():new Date().toISOString();
       slot.readings.forEach((readingArr,ri)=>{
         const e={time_type:slot.type,row_order:ri,slot_index:si,operator:operatorName,machine_no:mcNo,date:slot.date||schedDate,filled_at:filledAt};
-        readingArr.forEach((v,i)=>{e[`value_${i+1}`]=v||'';});
+        e.values=readingArr.map(v=>v||'');
         scheduleEntries.push(e);
       });
     });
@@ -679,15 +691,15 @@ const Form = ({ onSubmit, onCancel, initialData={}, items=[] }) => {
               </div>
               <div className="wiz-grid-2">
                 <Field label="Customer"   value={header.customerName}  onChange={v=>setHeader(p=>({...p,customerName:v}))}  options={dbOptions.customers}    placeholder={optionsLoading?'Loading...':'Select customer...'}  required />
-                <Field label="Part Name"  value={header.partName}      onChange={v=>setHeader(p=>({...p,partName:v}))}      options={dbOptions.part_names}   placeholder={optionsLoading?'Loading...':'Select part...'}       required />
-                <Field label="Operation"  value={header.operationName} onChange={v=>setHeader(p=>({...p,operationName:v}))} options={dbOptions.operations}   placeholder={optionsLoading?'Loading...':'Select operation...'}  required />
+                <Field label="Part Name"  value={header.partName}      onChange={v=>setHeader(p=>({...p,partName:v}))}      options={options.part_names}     placeholder={optionsLoading?'Loading...':'Select part...'}       required />
+                <Field label="Operation"  value={header.operationName} onChange={v=>setHeader(p=>({...p,operationName:v}))} options={options.operations}     placeholder={optionsLoading?'Loading...':'Select operation...'}  required />
                 {header.customerName && header.partName && header.operationName
-                  ? (dbOptions.part_numbers.length===1
+                  ? (options.part_numbers.length===1
                       ? <div style={{display:'flex',flexDirection:'column',gap:4}}>
                           <label className="wiz-label">Part Number <span style={{color:'#e53935'}}>*</span></label>
                           <div style={{padding:'10px 14px',border:'1px solid #ccc',borderRadius:6,background:'#f5f5f5',fontWeight:600,color:'#333'}}>{header.partNumber}</div>
                         </div>
-                      : <Field label="Part Number" value={header.partNumber} onChange={v=>setHeader(p=>({...p,partNumber:v}))} options={dbOptions.part_numbers} placeholder="Select number..." required />
+                      : <Field label="Part Number" value={header.partNumber} onChange={v=>setHeader(p=>({...p,partNumber:v}))} options={options.part_numbers} placeholder="Select number..." required />
                     )
                   : null}
               </div>
@@ -67,7 +67,8 @@ const Inspection = ({ items=[], currentReport, onFilter, onEditForm }) => {
         const si = e.slot_index??0;
         if (!slotMap[si]) slotMap[si] = { time_type: e.time_type||'SETUP', readings: [] };
         const vals = empty20();
-        for(let i=0;i<20;i++) vals[i]=e[`value_${i+1}`]||'';
+        const src = e.values||[];
+        for(let i=0;i<20;i++) vals[i]=src[i]||'';
         slotMap[si].readings[e.row_order??0] = vals;
       });
       const timeOrder = { SETUP:0,'4HRS':1,'2HRS':1,LAST:2 };
@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
-import { getDropdownOptions } from './services/api';
+import { getDropdownOptions, getDropdownTree } from './services/api';
+import { narrowOptions } from './services/hierarchy';
 
 // ── Helpers ──
 const parseSpecTol = (raw = '') => {
@@ -223,12 +224,14 @@ const PDIForm = ({ onSubmit, onCancel, initialData = {}, items = [] }) => {
   const [step, setStep] = useState(1);
   const [dbOptions, setDbOptions] = useState({ customers: [], part_names: [], part_numbers: [], operations: [], suppliers: [] });
   const [optionsLoading, setOptionsLoading] = useState(true);
+  const [tree, setTree] = useState(null);
   const [itemsLoading, setItemsLoading] = useState(false);
 
   useEffect(() => {
     getDropdownOptions()
       .then(data => { setDbOptions(data); setOptionsLoading(false); })
       .catch(() => setOptionsLoading(false));
+    getDropdownTree().then(setTree).catch(() => {});
   }, []);
 
   const [header, setHeader] = useState({
@@ -244,6 +247,10 @@ const PDIForm = ({ onSubmit, onCancel, initialData = {}, items = [] }) => {
   });
 
   const step1Done = !!(header.customerName && header.partName && header.partNo && header.inspectionDate);
+  // Parts of the chosen customer, operations of the chosen part
+  const options = narrowOptions(tree, dbOptions, {
+    customer: header.customerName, part: header.partName, operation: header.operationName,
+  });
 
   const [productRows, setProductRows] = useState([emptyRow()]);
   const [processRows, setProcessRows] = useState([emptyRow()]);
@@ -467,7 +474,7 @@ const PDIForm = ({ onSubmit, onCancel, initialData = {}, items = [] }) => {
                   options={dbOptions.customers} placeholder={optionsLoading ? 'Loading...' : 'Select customer...'} required />
                 <Field label="Part Name *" value={header.partName}
                   onChange={v => setHeader(p => ({ ...p, partName: v }))}
-                  options={dbOptions.part_names} placeholder={optionsLoading ? 'Loading...' : 'Select part...'} required />
+                  options={options.part_names} placeholder={optionsLoading ? 'Loading...' : 'Select part...'} required />
                 <div>
                   <label style={labelStyle}>Part No <span style={{ color: '#ef4444' }}>*</span></label>
                   <input value={header.partNo} onChange={e => setHeader(p => ({ ...p, partNo: e.target.value }))}
@@ -530,7 +537,7 @@ const PDIForm = ({ onSubmit, onCancel, initialData = {}, items = [] }) => {
                       }}
                     >
                       <option value="">{optionsLoading ? 'Loading...' : 'Select operation (optional)...'}</option>
-                      {dbOptions.operations.map(o => typeof o === 'string'
+                      {options.operations.map(o => typeof o === 'string'
                         ? <option key={o} value={o}>{o}</option>
                         : <option key={o.v} value={o.v}>{o.l}</option>
                       )}
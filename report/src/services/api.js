@@ -67,6 +67,19 @@ export const getReportById = async (id) => {
   }
 };
 
+// Newest report matching the filters in one round trip — null when nothing matches
+export const getLatestReport = async (filters = {}) => {
+  try {
+    const params   = new URLSearchParams(filters).toString();
+    const response = await safeFetch(`${API_BASE_URL}/reports/latest/?${params}`);
+    if (response.status === 404) return null;
+    return await handleResponse(response);
+  } catch (error) {
+    console.error('Error fetching latest report:', error);
+    throw error;
+  }
+};
+
 export const createReport = async (reportData) => {
   try {
     const response = await safeFetch(`${API_BASE_URL}/reports/`, {
@@ -105,4 +118,15 @@ export const getDropdownOptions = async () => {
   }
 };
 
-export default { getAllReports, getReportByDate, getReportById, createReport, updateReport, getDropdownOptions };
\ No newline at end of file
+// customer → part → part number → operation tree; narrow it locally with services/hierarchy.js
+export const getDropdownTree = async () => {
+  try {
+    const response = await safeFetch(`${API_BASE_URL}/dropdown-options/tree/`);
+    return await handleResponse(response);
+  } catch (error) {
+    console.error('Error fetching dropdown tree:', error);
+    throw error;
+  }
+};
+
+export default { getAllReports, getReportByDate, getReportById, getLatestReport, createReport, updateReport, getDropdownOptions, getDropdownTree };
\ No newline at end of file
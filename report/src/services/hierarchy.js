@@ -0,0 +1,31 @@
+/*
+ * Narrow the dropdown lists with the tree from GET /api/dropdown-options/tree/:
+ *   { operations: [...], operation_sets: [[operation index, ...], ...],
+ *     customers: { CUSTOMER: { PART: { PART_NO: operation set index } } } }
+ * Each list only offers what fits the choices made above it.  A value the
+ * tree does not know (old report, master row removed) falls back to the flat
+ * lists, and so does an empty operation list (the server could not link
+ * operations to parts), so editing never gets stuck on an empty dropdown.
+ */
+const uniqueSorted = values => [...new Set(values)].sort();
+
+export const narrowOptions = (tree, flat, { customer, part, operation }) => {
+  if (!tree || !tree.customers) return flat;
+  const parts = customer ? tree.customers[customer] : null;
+  if (!parts) return flat;
+
+  const spell = leaf => (tree.operation_sets[leaf] || []).map(i => tree.operations[i]);
+  const orFlat = operations => (operations.length ? operations : flat.operations);
+  const numbers = part ? parts[part] : null;
+  const partNames = Object.keys(parts);
+  if (!numbers) {
+    const operations = uniqueSorted(Object.values(parts).flatMap(byNumber => Object.values(byNumber).flatMap(spell)));
+    return { ...flat, part_names: partNames, operations: orFlat(operations), part_numbers: uniqueSorted(Object.values(parts).flatMap(Object.keys)) };
+  }
+
+  const operations = uniqueSorted(Object.values(numbers).flatMap(spell));
+  const partNumbers = Object.keys(numbers).filter(
+    number => !operation || spell(numbers[number]).includes(operation)
+  );
+  return { ...flat, part_names: partNames, operations: orFlat(operations), part_numbers: partNumbers.length ? partNumbers : Object.keys(numbers) };
+};